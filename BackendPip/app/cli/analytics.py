@@ -0,0 +1,115 @@
+"""
+Population analytics snapshots from bulk scoring output.
+
+Streams scored results (JSONL from app.cli.rescore, or bare result objects)
+into per-window analytics aggregates and writes them as a snapshot that
+the API loads at startup (ANALYTICS_SNAPSHOT) and /api/analytics queries.
+Results are placed by a top-level time field of each line (epoch seconds or
+ISO 8601), or at --time when they have none. Snapshots merge, so a nightly
+job only has to aggregate the new day's results. With --with-workers, each
+--snapshot PATH also brings in the snapshots the API's workers save next to
+it (PATH.<pid>), for population-wide numbers across workers:
+
+    python -m app.cli.analytics results-2024-06-01.jsonl --time 2024-06-01 -o day.analytics.json --quiet
+    python -m app.cli.analytics --snapshot history.analytics.json day.analytics.json \\
+        -o history.analytics.json --summary --interval day
+    python -m app.cli.analytics --snapshot analytics.json --with-workers --summary --interval day
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from app.services.analytics import PopulationAnalytics, parse_timestamp, snapshot_paths
+from app.utils.readers import read_results
+
+INTERVALS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+
+
+def timed_results(path: str, time_field: Optional[str], default_time: float) -> Iterator[Tuple[float, dict]]:
+    # read_results groups by a top-level field, which here carries the time
+    for value, result in read_results(path, group_by=time_field, default_group=''):
+        yield (parse_timestamp(value) if value else default_time), result
+
+
+def aggregate_file(path: str, time_field: Optional[str] = None, default_time: Optional[float] = None,
+                   window_seconds: int = 3600) -> PopulationAnalytics:
+    analytics = PopulationAnalytics(window_seconds)
+    analytics.add_results(timed_results(path, time_field, time.time() if default_time is None else default_time))
+    return analytics
+
+
+def aggregate(inputs: Sequence[str], snapshots: Sequence[str] = (), time_field: Optional[str] = None,
+              default_time: Optional[float] = None, window_seconds: int = 3600,
+              workers: int = 1, with_workers: bool = False) -> PopulationAnalytics:
+    # One set of aggregates per results file (in parallel when workers > 1), merged with any saved snapshots
+    if with_workers:
+        snapshots = [found for path in snapshots for found in (snapshot_paths(path) or [path])]
+    parts: List[PopulationAnalytics] = [PopulationAnalytics.load(path) for path in snapshots]
+    n = len(inputs)
+    if workers > 1 and n > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts.extend(executor.map(aggregate_file, inputs, [time_field] * n, [default_time] * n,
+                                      [window_seconds] * n))
+    else:
+        parts.extend(aggregate_file(path, time_field, default_time, window_seconds) for path in inputs)
+
+    merged = PopulationAnalytics(min([window_seconds] + [part.window_seconds for part in parts]))
+    for part in parts:
+        merged.merge(part)
+    return merged
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m app.cli.analytics',
+        description='Aggregate scored results into a population analytics snapshot.'
+    )
+    parser.add_argument('inputs', nargs='*', help="scored results JSONL files ('-' for stdin)")
+    parser.add_argument('--snapshot', nargs='+', default=[], help='saved analytics snapshots to merge in')
+    parser.add_argument('--with-workers', action='store_true',
+                        help="also merge the API workers' snapshots saved next to each --snapshot (PATH.<pid>)")
+    parser.add_argument('-o', '--output', help='write the merged snapshot here')
+    parser.add_argument('--time-field', help='top-level field of each results line holding its scoring time')
+    parser.add_argument('--time', help='scoring time of results without one (default: now)')
+    parser.add_argument('--window-seconds', type=int, default=3600,
+                        help='aggregation window of new results (default: 3600)')
+    parser.add_argument('--summary', action='store_true', help='print the summary of the merged snapshot')
+    parser.add_argument('--start', help='summary start time (default: the first window)')
+    parser.add_argument('--end', help='summary end time, exclusive (default: after the last window)')
+    parser.add_argument('--interval', choices=sorted(INTERVALS), help='also summarize per hour, day or week')
+    parser.add_argument('--workers', type=int, default=1, help='aggregate input files in parallel (default: 1)')
+    parser.add_argument('--quiet', action='store_true', help='do not report progress on stderr')
+    args = parser.parse_args(argv)
+
+    if not args.inputs and not args.snapshot:
+        parser.error('give at least one results file or --snapshot')
+    if not args.output:
+        args.summary = True
+
+    started = time.monotonic()
+    analytics = aggregate(args.inputs, args.snapshot, time_field=args.time_field,
+                          default_time=parse_timestamp(args.time) if args.time else None,
+                          window_seconds=args.window_seconds, workers=args.workers,
+                          with_workers=args.with_workers)
+    if not args.quiet:
+        count = sum(window.count for window in analytics.windows.values())
+        sys.stderr.write(f"aggregated {count:,} scored results into {len(analytics.windows):,} windows "
+                         f"in {time.monotonic() - started:.1f}s\n")
+
+    if args.output:
+        analytics.save(args.output)
+
+    if args.summary:
+        summary = analytics.query(parse_timestamp(args.start) if args.start else None,
+                                  parse_timestamp(args.end) if args.end else None,
+                                  INTERVALS[args.interval] if args.interval else None)
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Empirical norm builder.
+
+Streams scored results (JSONL from app.cli.rescore, or bare result objects)
+into constant-memory score sketches and writes norms in the norm_data.json
+layout: mean, std_dev, percentile anchors and sample_size per dimension and
+group. Sketches can be saved and merged, so a nightly job only has to sketch
+the new day's results and merge it with the saved history:
+
+    python -m app.cli.build_norms results-2024-06-01.jsonl --save-sketch day.sketch.json --quiet
+    python -m app.cli.build_norms --sketch history.sketch.json day.sketch.json \\
+        --save-sketch history.sketch.json -o norms/groups/general_population.json
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+from app.services.norm_builder import DEFAULT_PERCENTILES, NormBuilder, merge_builders
+from app.services.norms import DEFAULT_NORM_GROUP
+from app.utils.readers import read_results
+
+
+def sketch_file(path: str, group: str = DEFAULT_NORM_GROUP, group_by: Optional[str] = None) -> NormBuilder:
+    builder = NormBuilder()
+    builder.add_results(read_results(path, group_by=group_by, default_group=group))
+    return builder
+
+
+def load_sketch(path: str) -> NormBuilder:
+    with open(path, 'r') as f:
+        return NormBuilder.from_dict(json.load(f))
+
+
+def build_norms(inputs: Sequence[str], sketches: Sequence[str] = (), group: str = DEFAULT_NORM_GROUP,
+                group_by: Optional[str] = None, workers: int = 1) -> NormBuilder:
+    # One sketch per results file (in parallel when workers > 1), merged with any saved sketches
+    builders: List[NormBuilder] = [load_sketch(path) for path in sketches]
+    if workers > 1 and len(inputs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            builders.extend(executor.map(sketch_file, inputs, [group] * len(inputs), [group_by] * len(inputs)))
+    else:
+        builders.extend(sketch_file(path, group, group_by) for path in inputs)
+    return merge_builders(builders)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m app.cli.build_norms',
+        description='Build norm tables from scored results with mergeable score sketches.'
+    )
+    parser.add_argument('inputs', nargs='*', help="scored results JSONL files ('-' for stdin)")
+    parser.add_argument('--sketch', nargs='+', default=[], help='saved sketch files to merge in')
+    parser.add_argument('-o', '--output', help="norms output file in norm_data.json layout ('-' for stdout)")
+    parser.add_argument('--save-sketch', help='write the merged sketch here for later runs')
+    parser.add_argument('--group', default=DEFAULT_NORM_GROUP,
+                        help=f'norm group name (default: {DEFAULT_NORM_GROUP})')
+    parser.add_argument('--group-by', help='top-level field of each results line that names its norm group')
+    parser.add_argument('--percentiles', type=float, nargs='+', default=list(DEFAULT_PERCENTILES),
+                        help='percentile anchors to write (default: 1 2 ... 99)')
+    parser.add_argument('--min-sample-size', type=int, default=1,
+                        help='leave out groups with fewer scored results (default: 1)')
+    parser.add_argument('--workers', type=int, default=1, help='sketch input files in parallel (default: 1)')
+    parser.add_argument('--quiet', action='store_true', help='do not report progress on stderr')
+    args = parser.parse_args(argv)
+
+    if not args.inputs and not args.sketch:
+        parser.error('give at least one results file or --sketch')
+    if not args.output and not args.save_sketch:
+        args.output = '-'
+
+    started = time.monotonic()
+    builder = build_norms(args.inputs, args.sketch, group=args.group, group_by=args.group_by,
+                          workers=args.workers)
+
+    if not args.quiet:
+        for group in sorted(builder.sketches):
+            count = max(sketch.count for sketch in builder.sketches[group].values())
+            sys.stderr.write(f"{group}: {count:,} scored results\n")
+        sys.stderr.write(f"sketched in {time.monotonic() - started:.1f}s\n")
+
+    if args.save_sketch:
+        with open(args.save_sketch, 'w') as f:
+            json.dump(builder.to_dict(), f)
+
+    if args.output:
+        norms = builder.build(args.percentiles, args.min_sample_size)
+        output = sys.stdout if args.output == '-' else open(args.output, 'w')
+        try:
+            json.dump(norms, output, indent=2)
+            output.write('\n')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Graded Response Model item calibration.
+
+Fits discrimination and thresholds for the primary Likert items by marginal
+maximum likelihood (EM) on a JSONL, CSV or Parquet export of user_responses
+and writes a versioned item parameter file that ScoringService can load.
+
+    python -m app.cli.calibrate user_responses.csv -o item_parameters.json --workers 8
+
+Responses are first reduced to one int8 category per item and respondent.
+--cache saves that matrix as .npy, and passing a .npy as input skips parsing
+on later runs. EM warm starts from the current questions/item_parameters.json
+unless --start is given.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.calibration import Expectation, GRMCalibrator
+from app.services.irt import load_item_parameters, response_categories
+from app.services.question_bank import QuestionBank
+from app.services.scoring_plan import ScoringPlan
+from app.utils.readers import FORMATS, invalid_response, read_submissions
+
+_worker_calibrator: Optional[GRMCalibrator] = None
+_worker_categories: Optional[np.ndarray] = None
+
+
+def build_calibrator(n_points: int = 41) -> GRMCalibrator:
+    snapshot = QuestionBank().snapshot
+    return GRMCalibrator(ScoringPlan(snapshot.questions, snapshot.version), n_points=n_points)
+
+
+def load_categories(path: str, calibrator: GRMCalibrator, fmt: Optional[str] = None,
+                    id_column: str = 'user_id', chunk_size: int = 20000) -> np.ndarray:
+    if path.endswith('.npy'):
+        categories = np.load(path, mmap_mode='r')
+        if categories.ndim != 2 or categories.shape[1] != len(calibrator.item_ids):
+            raise ValueError(f"Category cache {path} does not match the current question bank")
+        return categories
+
+    plan = calibrator.plan
+    submissions = read_submissions(path, fmt=fmt, id_column=id_column)
+    blocks: List[np.ndarray] = []
+    while True:
+        chunk = list(islice(submissions, chunk_size))
+        if not chunk:
+            break
+        # Submissions with a malformed answer are left out
+        chunk = [(submission_id, records) for submission_id, records in chunk if not invalid_response(records)]
+        X = np.empty((len(chunk), plan.n_items))
+        for row, (_, records) in enumerate(chunk):
+            X[row] = plan.encode_records(records)
+        categories = response_categories(X, calibrator.item_idx, calibrator.reverse, calibrator.n_categories)
+        # Respondents without a single primary answer carry no information
+        blocks.append(categories[(categories >= 0).any(axis=1)])
+
+    if not blocks:
+        return np.empty((0, len(calibrator.item_ids)), dtype=np.int8)
+    return np.concatenate(blocks)
+
+
+def _init_worker(categories_path: str, n_points: int):
+    global _worker_calibrator, _worker_categories
+    _worker_calibrator = build_calibrator(n_points)
+    _worker_categories = np.load(categories_path, mmap_mode='r')
+
+
+def _expect_range(start: int, stop: int, chunk_size: int, discrimination: np.ndarray,
+                  thresholds: np.ndarray) -> Tuple[np.ndarray, float, int]:
+    chunks = (_worker_categories[i:min(i + chunk_size, stop)] for i in range(start, stop, chunk_size))
+    return _worker_calibrator.e_step(chunks, discrimination, thresholds)
+
+
+def parallel_expectation(executor: ProcessPoolExecutor, n_rows: int, workers: int,
+                         chunk_size: int) -> Expectation:
+    # Expected counts are sums over respondents, so each worker takes a
+    # contiguous slice of the memory-mapped categories and the results are added
+    bounds = np.linspace(0, n_rows, workers + 1).astype(int)
+
+    def expectation(discrimination: np.ndarray, thresholds: np.ndarray):
+        futures = [executor.submit(_expect_range, int(start), int(stop), chunk_size, discrimination, thresholds)
+                   for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+        counts, marginal_log_likelihood, respondents = futures[0].result()
+        for future in futures[1:]:
+            part_counts, part_log_likelihood, part_respondents = future.result()
+            counts += part_counts
+            marginal_log_likelihood += part_log_likelihood
+            respondents += part_respondents
+        return counts, marginal_log_likelihood, respondents
+
+    return expectation
+
+
+def calibrate(input_path: str, fmt: Optional[str] = None, id_column: str = 'user_id',
+              start_path: Optional[str] = None, cache_path: Optional[str] = None, workers: int = 1,
+              chunk_size: int = 20000, n_points: int = 41, max_cycles: int = 200, tolerance: float = 1e-3,
+              version: Optional[str] = None, progress: bool = True) -> dict:
+    calibrator = build_calibrator(n_points)
+    start = load_item_parameters(start_path)
+    started = time.monotonic()
+
+    def report(cycle: int, marginal_log_likelihood: float, change: float):
+        if progress:
+            sys.stderr.write(f"cycle {cycle}: log-likelihood {marginal_log_likelihood:,.1f}, "
+                             f"max change {change:.5f} ({time.monotonic() - started:.1f}s)\n")
+            sys.stderr.flush()
+
+    categories = load_categories(input_path, calibrator, fmt=fmt, id_column=id_column, chunk_size=chunk_size)
+    if progress:
+        sys.stderr.write(f"calibrating on {len(categories):,} respondents\n")
+
+    if cache_path and not cache_path.endswith('.npy'):
+        cache_path += '.npy'
+    categories_path = input_path if input_path.endswith('.npy') else cache_path
+    if categories_path and categories_path != input_path:
+        np.save(categories_path, categories)
+
+    if workers <= 1:
+        def chunk_source():
+            return (categories[i:i + chunk_size] for i in range(0, len(categories), chunk_size))
+        return calibrator.fit(calibrator.streaming_expectation(chunk_source), start, max_cycles=max_cycles,
+                              tolerance=tolerance, version=version, callback=report)
+
+    # Workers memory-map the categories, so they need to be on disk
+    temporary = None
+    if not categories_path:
+        handle, temporary = tempfile.mkstemp(suffix='.npy')
+        os.close(handle)
+        np.save(temporary, categories)
+        categories_path = temporary
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(categories_path, n_points)) as executor:
+            expectation = parallel_expectation(executor, len(categories), workers, chunk_size)
+            return calibrator.fit(expectation, start, max_cycles=max_cycles, tolerance=tolerance,
+                                  version=version, callback=report)
+    finally:
+        if temporary:
+            os.remove(temporary)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m app.cli.calibrate',
+        description='Calibrate Graded Response Model item parameters on historical responses.'
+    )
+    parser.add_argument('input', help="JSONL, CSV or Parquet export of user_responses, or a .npy category cache")
+    parser.add_argument('-o', '--output', default='-', help="output parameter file (default: stdout)")
+    parser.add_argument('--format', choices=FORMATS, help='input format (default: from file extension)')
+    parser.add_argument('--id-column', default='user_id', help='column identifying a submission (default: user_id)')
+    parser.add_argument('--start', help='item parameter file to warm start from (default: current parameters)')
+    parser.add_argument('--cache', help='save the parsed response categories to this .npy file')
+    parser.add_argument('--version', help='version string for the output (default: calibrated-YYYYMMDD)')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes for the E-step (default: 1)')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='respondents per E-step chunk (default: 20000)')
+    parser.add_argument('--quadrature-points', type=int, default=41, help='quadrature grid size (default: 41)')
+    parser.add_argument('--max-cycles', type=int, default=200, help='maximum EM cycles (default: 200)')
+    parser.add_argument('--tolerance', type=float, default=1e-3,
+                        help='stop when no parameter changes by more than this (default: 0.001)')
+    parser.add_argument('--quiet', action='store_true', help='do not report progress on stderr')
+    args = parser.parse_args(argv)
+
+    parameters = calibrate(args.input, fmt=args.format, id_column=args.id_column, start_path=args.start,
+                           cache_path=args.cache, workers=args.workers, chunk_size=args.chunk_size,
+                           n_points=args.quadrature_points, max_cycles=args.max_cycles,
+                           tolerance=args.tolerance, version=args.version, progress=not args.quiet)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        json.dump(parameters, output, indent=2)
+        output.write('\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
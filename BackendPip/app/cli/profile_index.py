@@ -0,0 +1,86 @@
+"""
+Similar-profiles index builder.
+
+Builds the nearest-neighbour index over Big Five and facet scores that
+/api/similar-profiles searches (PROFILE_INDEX), from scored results: JSONL
+from app.cli.rescore, whose lines carry the user_id. With --index, the
+results are added to an existing index instead, keeping its lists:
+
+    python -m app.cli.profile_index results-*.jsonl -o profiles.index
+    python -m app.cli.profile_index today_results.jsonl --index profiles.index
+
+Results without an id or without every facet score are skipped. Added
+profiles are assigned to the existing lists; rebuild once the population
+has drifted, or grown several times over, to re-train them.
+"""
+import argparse
+import sys
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.services.profile_index import DEFAULT_NPROBE, ProfileIndex, profile_features, read_profiles
+from app.services.question_bank import QuestionBank
+from app.services.scoring_plan import ScoringPlan
+from app.utils.readers import read_results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m app.cli.profile_index',
+        description='Build or extend the similar-profiles index from scored results.'
+    )
+    parser.add_argument('inputs', nargs='+', help="scored results JSONL files ('-' for stdin)")
+    parser.add_argument('-o', '--output', help='index directory to write (default: --index)')
+    parser.add_argument('--index', help='existing index directory to add the results to')
+    parser.add_argument('--id-field', default='user_id', help='top-level field holding the id (default: user_id)')
+    parser.add_argument('--questions', help='questions.json giving the facets (default: the bundled one)')
+    parser.add_argument('--lists', type=int, help='inverted lists of a new index (default: about sqrt(profiles))')
+    parser.add_argument('--sample', type=int, help='profiles to train the lists on (default: 64 per list)')
+    parser.add_argument('--nprobe', type=int,
+                        help=f'lists a query scans by default (default: {DEFAULT_NPROBE}, or as saved)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('--quiet', action='store_true', help='do not report progress on stderr')
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.index:
+        parser.error('give -o for a new index or --index to extend one')
+
+    started = time.monotonic()
+    snapshot = QuestionBank(args.questions).snapshot
+    features = profile_features(ScoringPlan(snapshot.questions, snapshot.version))
+    index = ProfileIndex.load(args.index, mmap=False) if args.index else None
+    if index is not None and list(index.features) != features:
+        parser.error(f"{args.index} was built for different facets than the question bank")
+
+    ids: List[str] = []
+    chunks: List[np.ndarray] = []
+    skipped = 0
+    for path in args.inputs:
+        for chunk_ids, vectors, chunk_skipped in read_profiles(
+                read_results(path, group_by=args.id_field, default_group=''), features):
+            # Lines without an id come back with an empty one
+            keep = np.array([bool(id_) for id_ in chunk_ids], dtype=bool)
+            ids.extend(id_ for id_ in chunk_ids if id_)
+            chunks.append(vectors[keep].astype(np.float32))
+            skipped += chunk_skipped + int((~keep).sum())
+    vectors = np.concatenate(chunks) if chunks else np.empty((0, len(features)), dtype=np.float32)
+    if not args.quiet:
+        sys.stderr.write(f"read {len(ids):,} profiles ({skipped:,} skipped) in {time.monotonic() - started:.1f}s\n")
+
+    if index is None:
+        index = ProfileIndex.build(ids, vectors, features, n_lists=args.lists, sample_size=args.sample,
+                                   seed=args.seed, nprobe=args.nprobe or DEFAULT_NPROBE)
+    else:
+        index.add(ids, vectors)
+        index.nprobe = args.nprobe or index.nprobe
+    index.save(args.output or args.index)
+    if not args.quiet:
+        sys.stderr.write(f"indexed {len(index):,} profiles in {len(index.centroids):,} lists "
+                         f"in {time.monotonic() - started:.1f}s\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
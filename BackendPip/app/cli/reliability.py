@@ -0,0 +1,150 @@
+"""
+Psychometric reliability report.
+
+Streams JSONL, CSV or Parquet exports of user_responses (or .npy category
+caches from app.cli.calibrate --cache) into mergeable item statistics and
+reports, for every Big Five dimension and facet in questions.json,
+Cronbach's alpha, McDonald's omega, inter-item and corrected item-total
+correlations, and the GRM test information curves:
+
+    python -m app.cli.reliability responses-*.csv --workers 4 -o reliability.json
+
+Statistics are integer sums, so shards can be accumulated separately, in
+parallel or on different days, and merged without changing the report:
+
+    python -m app.cli.reliability today.csv --save-stats today.stats.json --quiet
+    python -m app.cli.reliability --stats history.stats.json today.stats.json \\
+        --save-stats history.stats.json -o reliability.json
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.services.irt import load_item_parameters, response_categories
+from app.services.question_bank import QuestionBank
+from app.services.reliability import ItemStatistics, merge_statistics, reliability_report
+from app.services.scoring_plan import ScoringPlan
+from app.utils.readers import FORMATS, invalid_response, read_submissions
+
+# Keyed Likert items have 7 categories
+N_CATEGORIES = 7
+
+
+def load_plan(questions_path: Optional[str] = None) -> ScoringPlan:
+    snapshot = QuestionBank(questions_path).snapshot
+    return ScoringPlan(snapshot.questions, snapshot.version)
+
+
+def accumulate_file(path: str, questions_path: Optional[str] = None, fmt: Optional[str] = None,
+                    id_column: str = 'user_id', chunk_size: int = 20000) -> ItemStatistics:
+    plan = load_plan(questions_path)
+    statistics = ItemStatistics([plan.item_ids[i] for i in plan.keyed_idx], plan.version)
+
+    if path.endswith('.npy'):
+        categories = np.load(path, mmap_mode='r')
+        if categories.ndim != 2 or categories.shape[1] != len(plan.keyed_idx):
+            raise ValueError(f"Category cache {path} does not match the current question bank")
+        for start in range(0, len(categories), chunk_size):
+            statistics.update(np.asarray(categories[start:start + chunk_size]))
+        return statistics
+
+    submissions = read_submissions(path, fmt=fmt, id_column=id_column)
+    while True:
+        chunk = list(islice(submissions, chunk_size))
+        if not chunk:
+            break
+        # Submissions with a malformed answer are left out
+        chunk = [(submission_id, records) for submission_id, records in chunk if not invalid_response(records)]
+        X = np.empty((len(chunk), plan.n_items))
+        for row, (_, records) in enumerate(chunk):
+            X[row] = plan.encode_records(records)
+        categories = response_categories(X, plan.keyed_idx, plan.keyed_reverse, N_CATEGORIES)
+        # Respondents without a single primary answer are not counted
+        statistics.update(categories[(categories >= 0).any(axis=1)])
+    return statistics
+
+
+def load_stats(path: str) -> ItemStatistics:
+    with open(path, 'r') as f:
+        return ItemStatistics.from_dict(json.load(f))
+
+
+def accumulate(inputs: Sequence[str], stats: Sequence[str] = (), questions_path: Optional[str] = None,
+               fmt: Optional[str] = None, id_column: str = 'user_id', chunk_size: int = 20000,
+               workers: int = 1) -> ItemStatistics:
+    # One set of statistics per input file (in parallel when workers > 1), merged with any saved ones
+    parts: List[ItemStatistics] = [load_stats(path) for path in stats]
+    n = len(inputs)
+    if workers > 1 and n > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts.extend(executor.map(accumulate_file, inputs, [questions_path] * n, [fmt] * n,
+                                      [id_column] * n, [chunk_size] * n))
+    else:
+        parts.extend(accumulate_file(path, questions_path, fmt, id_column, chunk_size) for path in inputs)
+    return merge_statistics(parts)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m app.cli.reliability',
+        description='Report scale reliability and test information from stored responses.'
+    )
+    parser.add_argument('inputs', nargs='*',
+                        help="JSONL, CSV or Parquet exports of user_responses ('-' for stdin) or .npy category caches")
+    parser.add_argument('--stats', nargs='+', default=[], help='saved statistics files to merge in')
+    parser.add_argument('-o', '--output', help="report output file ('-' for stdout)")
+    parser.add_argument('--save-stats', help='write the merged statistics here for later runs')
+    parser.add_argument('--questions', help='questions.json giving the item structure (default: the bundled one)')
+    parser.add_argument('--item-parameters', help='item parameters for the test information curves '
+                                                  '(default: questions/item_parameters.json)')
+    parser.add_argument('--format', choices=FORMATS, help='input format (default: from file extension)')
+    parser.add_argument('--id-column', default='user_id', help='column identifying a submission (default: user_id)')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='respondents per chunk (default: 20000)')
+    parser.add_argument('--workers', type=int, default=1, help='accumulate input files in parallel (default: 1)')
+    parser.add_argument('--no-correlations', action='store_true',
+                        help='leave the inter-item correlation matrices out of the report')
+    parser.add_argument('--quiet', action='store_true', help='do not report progress on stderr')
+    args = parser.parse_args(argv)
+
+    if not args.inputs and not args.stats:
+        parser.error('give at least one responses file or --stats')
+    if not args.output and not args.save_stats:
+        args.output = '-'
+
+    started = time.monotonic()
+    plan = load_plan(args.questions)
+    statistics = accumulate(args.inputs, args.stats, questions_path=args.questions, fmt=args.format,
+                            id_column=args.id_column, chunk_size=args.chunk_size, workers=args.workers)
+    if not args.quiet:
+        sys.stderr.write(f"accumulated {statistics.respondents:,} respondents "
+                         f"in {time.monotonic() - started:.1f}s\n")
+
+    if args.save_stats:
+        with open(args.save_stats, 'w') as f:
+            json.dump(statistics.to_dict(), f)
+
+    if args.output:
+        report = reliability_report(statistics, plan, load_item_parameters(args.item_parameters),
+                                    include_correlations=not args.no_correlations)
+        if not args.quiet:
+            for dimension, summary in report['dimensions'].items():
+                sys.stderr.write(f"  {dimension:<18} alpha {summary['alpha']}  omega {summary['omega']}  "
+                                 f"mean r {summary['mean_inter_item_r']}\n")
+        output = sys.stdout if args.output == '-' else open(args.output, 'w')
+        try:
+            json.dump(report, output, indent=2)
+            output.write('\n')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Bulk re-scoring of exported submissions.
+
+Streams a JSONL, CSV or Parquet export of user_responses through the scoring
+and interpretation pipeline in fixed-size chunks and appends one JSON line per
+submission to the output, so memory stays bounded regardless of input size.
+
+    python -m app.cli.rescore user_responses.csv -o results.jsonl --workers 4
+"""
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.pipeline import AssessmentPipeline
+from app.utils.readers import FORMATS, Record, invalid_response, read_submissions
+
+Chunk = List[Tuple[str, List[Record]]]
+
+_worker_pipeline: Optional[AssessmentPipeline] = None
+
+
+def _init_worker():
+    # Each worker compiles the question bank and norms once
+    global _worker_pipeline
+    _worker_pipeline = AssessmentPipeline()
+
+
+def score_chunk(chunk: Chunk, id_column: str = 'user_id', pipeline: Optional[AssessmentPipeline] = None,
+                norm_group: Optional[str] = None) -> Tuple[List[str], int]:
+    pipeline = pipeline or _worker_pipeline
+    plan = pipeline.scoring_service.plan
+
+    X = np.empty((len(chunk), plan.n_items))
+    counts = []
+    invalid = {}
+    for row, (_, records) in enumerate(chunk):
+        error = invalid_response(records)
+        if error:
+            # Scored as an empty submission, then reported with its own error
+            invalid[row] = error
+            X[row] = np.nan
+            counts.append(0)
+        else:
+            X[row] = plan.encode_records(records)
+            counts.append(len(records))
+    outcomes = pipeline.score_encoded_batch(X, counts, [norm_group] * len(chunk))
+
+    lines = []
+    errors = 0
+    for row, ((submission_id, _), outcome) in enumerate(zip(chunk, outcomes)):
+        error = invalid.get(row) or outcome['error']
+        if error:
+            errors += 1
+            entry = {id_column: submission_id, 'error': error}
+        else:
+            entry = {id_column: submission_id, 'result': outcome['result']}
+        lines.append(json.dumps(entry))
+    return lines, errors
+
+
+def _chunks(submissions: Iterator, size: int) -> Iterator[Chunk]:
+    while True:
+        chunk = list(islice(submissions, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _Progress:
+    def __init__(self, enabled: bool, interval: float = 2.0):
+        self.enabled = enabled
+        self.interval = interval
+        self.rows = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+
+    def update(self, rows: int, errors: int):
+        self.rows += rows
+        self.errors += errors
+        now = time.monotonic()
+        if self.enabled and now - self._last_report >= self.interval:
+            self._last_report = now
+            self._report(now)
+
+    def finish(self):
+        if self.enabled:
+            self._report(time.monotonic())
+            sys.stderr.write('\n')
+
+    def _report(self, now: float):
+        elapsed = max(now - self.started, 1e-9)
+        sys.stderr.write(f"\rscored {self.rows:,} submissions ({self.errors:,} errors) "
+                         f"in {elapsed:.1f}s - {self.rows / elapsed:,.0f} rows/s")
+        sys.stderr.flush()
+
+
+def rescore(input_path: str, output, fmt: Optional[str] = None, id_column: str = 'user_id',
+            chunk_size: int = 2000, workers: int = 1, progress: bool = True,
+            norm_group: Optional[str] = None) -> Tuple[int, int]:
+    submissions = read_submissions(input_path, fmt=fmt, id_column=id_column)
+    chunks = _chunks(submissions, chunk_size)
+    tracker = _Progress(progress)
+
+    def write(lines: List[str], errors: int):
+        if lines:
+            output.write('\n'.join(lines))
+            output.write('\n')
+            output.flush()
+        tracker.update(len(lines), errors)
+
+    if workers > 1:
+        # At most two chunks per worker in flight keeps memory bounded; results
+        # are written in input order
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(score_chunk, chunk, id_column, None, norm_group))
+                if len(pending) >= workers * 2:
+                    write(*pending.popleft().result())
+            while pending:
+                write(*pending.popleft().result())
+    else:
+        pipeline = AssessmentPipeline()
+        for chunk in chunks:
+            write(*score_chunk(chunk, id_column, pipeline, norm_group))
+
+    tracker.finish()
+    return tracker.rows, tracker.errors
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m app.cli.rescore',
+        description='Re-score exported assessment submissions in bounded memory.'
+    )
+    parser.add_argument('input', help="JSONL, CSV or Parquet export of user_responses ('-' for JSONL on stdin)")
+    parser.add_argument('-o', '--output', default='-', help="output JSONL file (default: stdout)")
+    parser.add_argument('--format', choices=FORMATS, help='input format (default: from file extension)')
+    parser.add_argument('--id-column', default='user_id', help='column identifying a submission (default: user_id)')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='submissions scored per batch (default: 2000)')
+    parser.add_argument('--norm-group', help='norm group for percentiles (default: general_population)')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes (default: 1, no pool)')
+    parser.add_argument('--quiet', action='store_true', help='do not report progress on stderr')
+    args = parser.parse_args(argv)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        rescore(args.input, output, fmt=args.format, id_column=args.id_column,
+                chunk_size=args.chunk_size, workers=args.workers, progress=not args.quiet,
+                norm_group=args.norm_group)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
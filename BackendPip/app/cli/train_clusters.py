@@ -0,0 +1,92 @@
+"""
+Personality cluster training.
+
+Fits a Gaussian mixture to historical Big Five scores (JSONL results from
+app.cli.rescore, or an (N, 5) .npy score matrix) and writes a versioned
+cluster model with means, precisions and weights that ScoringService loads
+from norms/cluster_model.json:
+
+    python -m app.cli.train_clusters results.jsonl -o norms/cluster_model.json --components 3 4 5 6
+
+With several --components, the count with the lowest BIC is kept.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.services.clusters import train_cluster_model
+from app.services.scoring_plan import BIG_FIVE_DIMENSIONS
+from app.utils.readers import read_results
+
+
+def load_scores(paths: Sequence[str]) -> np.ndarray:
+    # Combined 0-100 scores in BIG_FIVE_DIMENSIONS order, NaN where missing
+    blocks: List[np.ndarray] = []
+    for path in paths:
+        if path.endswith('.npy'):
+            scores = np.load(path)
+            if scores.ndim != 2 or scores.shape[1] != len(BIG_FIVE_DIMENSIONS):
+                raise ValueError(f"{path} is not an (N, {len(BIG_FIVE_DIMENSIONS)}) score matrix")
+            blocks.append(scores.astype(np.float64))
+            continue
+        rows = [
+            [result['big_five'].get('scores', {}).get(dimension, np.nan) for dimension in BIG_FIVE_DIMENSIONS]
+            for _, result in read_results(path)
+        ]
+        blocks.append(np.array(rows, dtype=np.float64).reshape(-1, len(BIG_FIVE_DIMENSIONS)))
+    return np.concatenate(blocks) if blocks else np.empty((0, len(BIG_FIVE_DIMENSIONS)))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m app.cli.train_clusters',
+        description='Fit the personality cluster Gaussian mixture on historical Big Five scores.'
+    )
+    parser.add_argument('inputs', nargs='+', help="scored results JSONL files ('-' for stdin) or .npy score matrices")
+    parser.add_argument('-o', '--output', default='-', help="output cluster model file (default: stdout)")
+    parser.add_argument('--components', type=int, nargs='+', default=[4],
+                        help='mixture components to try, lowest BIC wins (default: 4)')
+    parser.add_argument('--covariance-type', choices=('full', 'tied', 'diag', 'spherical'), default='full',
+                        help='covariance structure (default: full)')
+    parser.add_argument('--sample', type=int, help='fit on a random sample of this many respondents')
+    parser.add_argument('--n-init', type=int, default=3, help='EM restarts per component count (default: 3)')
+    parser.add_argument('--max-iter', type=int, default=500, help='maximum EM iterations (default: 500)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('--version', help='version string for the output (default: trained-YYYYMMDD)')
+    parser.add_argument('--quiet', action='store_true', help='do not report progress on stderr')
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    scores = load_scores(args.inputs)
+    if args.sample and args.sample < len(scores):
+        rng = np.random.RandomState(args.seed)
+        scores = scores[rng.choice(len(scores), args.sample, replace=False)]
+
+    model = train_cluster_model(scores, n_components=args.components, covariance_type=args.covariance_type,
+                                n_init=args.n_init, max_iter=args.max_iter, random_state=args.seed,
+                                version=args.version)
+
+    if not args.quiet:
+        training = model['training']
+        sys.stderr.write(f"fitted {training['components']} clusters on {training['respondents']:,} respondents "
+                         f"(BIC {training['bic']:,.1f}) in {time.monotonic() - started:.1f}s\n")
+        for cluster in model['clusters']:
+            sys.stderr.write(f"  {cluster['name']:<16} weight {cluster['weight']:.3f}  "
+                             f"mean {' '.join(f'{value:5.1f}' for value in cluster['mean'])}\n")
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        json.dump(model, output, indent=2)
+        output.write('\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,46 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.routers import assessment
-import uvicorn
+from app.services.analytics import worker_snapshot_path
+
+async def snapshot_analytics(path: str, seconds: float):
+    # Best effort, like the result cache's disk tier: a failed write is retried next time.
+    # Each tick also picks up the other workers' latest snapshots; a worker's file is
+    # folded into the shared one once it has exited and missed two ticks
+    while True:
+        await asyncio.sleep(seconds)
+        try:
+            await asyncio.to_thread(assessment.population_analytics.sync_worker, path, 2 * seconds)
+        except OSError:
+            pass
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the scoring artifacts and start the worker processes in the background,
+    # so the server accepts connections at once; /ready answers 503 until it is done
+    warm_up = asyncio.create_task(assessment.scoring_executor.warm_up())
+    # This worker's ANALYTICS_SNAPSHOT file is rewritten every ANALYTICS_SNAPSHOT_SECONDS and at shutdown
+    snapshot_path = (os.environ['ANALYTICS_SNAPSHOT']
+                     if assessment.population_analytics and os.environ.get('ANALYTICS_SNAPSHOT') else None)
+    snapshots = (asyncio.create_task(snapshot_analytics(
+        snapshot_path, float(os.environ.get('ANALYTICS_SNAPSHOT_SECONDS', '300')))) if snapshot_path else None)
+    yield
+    warm_up.cancel()
+    if snapshots:
+        snapshots.cancel()
+        assessment.population_analytics.save(worker_snapshot_path(snapshot_path))
+    # Stop the scoring thread or process pool with the server
+    assessment.scoring_executor.shutdown()
 
 app = FastAPI(
     title="Personality Assessment API",
     description="Comprehensive personality assessment integrating Big Five, MBTI, and Jungian psychology",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -29,5 +63,21 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    executor = assessment.scoring_executor
+    if not executor.ready:
+        status = 'failed' if executor.warmup_error else 'warming up'
+        return JSONResponse({"status": status, "error": executor.warmup_error}, status_code=503)
+    return {"status": "ready", "warmup_seconds": round(executor.warmup_seconds, 3)}
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text format; each uvicorn worker reports its own process
+    content = assessment.pipeline_metrics.render(assessment.scoring_executor.stats())
+    return Response(content=content, media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    # Not imported above: workers started by the uvicorn CLI never need it
+    import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -37,7 +37,7 @@ class Question(BaseModel):
 
 class QuestionResponse(BaseModel):
     question_id: str
-    response_value: Optional[int] = None  # For Likert scales
+    response_value: Optional[int] = Field(None, ge=1, le=7)  # For Likert scales; 1-5 for likert_5 items
     selected_option: Optional[str] = None  # For forced choice ('a' or 'b')
 
 class AssessmentStartRequest(BaseModel):
@@ -52,12 +52,23 @@ class BigFiveScores(BaseModel):
     percentiles: Dict[str, float]
     confidence_intervals: Dict[str, Dict[str, float]]
     facet_scores: Optional[Dict[str, Dict[str, float]]] = None
+    norm_group: Optional[str] = None
+
+class TypeProbability(BaseModel):
+    type: str
+    probability: float
+
+class TypeDistribution(BaseModel):
+    # The most probable of the 16 types, and the entropy of all 16 in bits (0 to 4)
+    top_types: List[TypeProbability]
+    entropy: float
 
 class MBTIResult(BaseModel):
     primary_type: str
     probability: float
     secondary_type: Optional[str] = None
     dimension_probabilities: Dict[str, float]
+    type_distribution: Optional[TypeDistribution] = None
 
 class CognitiveFunction(BaseModel):
     function: str
@@ -79,6 +90,14 @@ class JungianDepth(BaseModel):
     archetype_profile: Optional[Dict[str, float]] = None
     individuation_stage: Optional[str] = None
 
+class ResponseQuality(BaseModel):
+    longstring: int  # Longest run of identical Likert answers
+    irv: Optional[float] = None  # Standard deviation of the Likert answers
+    even_odd_consistency: Optional[float] = None
+    mahalanobis_d2: Optional[float] = None  # Distance from the norm group; None unless its norms were built
+    person_fit_lz: Optional[float] = None
+    flags: List[str] = []  # Indices past their cutoff; empty for an attentive submission
+
 class AssessmentResults(BaseModel):
     big_five: BigFiveScores
     mbti: MBTIResult
@@ -87,6 +106,121 @@ class AssessmentResults(BaseModel):
     jungian_depth: JungianDepth
     interpretation: str
     development_suggestions: List[str]
+    response_quality: Optional[ResponseQuality] = None
 
 class AssessmentSubmission(BaseModel):
-    responses: List[QuestionResponse]
\ No newline at end of file
+    responses: List[QuestionResponse]
+    norm_group: Optional[str] = None  # Defaults to general_population
+
+class BatchScoreRequest(BaseModel):
+    submissions: List[AssessmentSubmission]
+
+class BatchScoreItem(BaseModel):
+    index: int
+    result: Optional[AssessmentResults] = None
+    error: Optional[str] = None
+
+class BatchScoreResponse(BaseModel):
+    results: List[BatchScoreItem]
+    scored: int
+    failed: int
+
+class NormGroupsResponse(BaseModel):
+    groups: List[str]
+    default: str
+
+class ResultCacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    bytes: int
+    disk: bool
+    disk_entries: int
+    disk_bytes: int
+    max_disk_bytes: int
+    disk_evictions: int
+    hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+class ScoreDistribution(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    std_dev: Optional[float] = None
+    percentiles: Dict[str, Optional[float]] = {}  # Interpolated from the histogram; Big Five only
+    histogram: List[int]  # Fixed-width bins: 1 point on 0-100, 0.1 on the 0-1 archetype scale
+
+class PopulationSummary(BaseModel):
+    start: Optional[str] = None  # Segments only
+    end: Optional[str] = None
+    respondents: int
+    flagged: int  # Submissions with any response quality flag
+    mbti_types: Dict[str, int]
+    clusters: Dict[str, int]
+    big_five: Dict[str, ScoreDistribution]
+    archetypes: Dict[str, ScoreDistribution]
+
+class PopulationAnalyticsResponse(BaseModel):
+    window_seconds: int
+    start: Optional[str] = None
+    end: Optional[str] = None
+    total: PopulationSummary
+    segments: List[PopulationSummary] = []
+
+class SimilarProfilesRequest(BaseModel):
+    # The same fields as BigFiveScores, so a result's big_five can be sent as it is
+    scores: Dict[str, float]
+    facet_scores: Dict[str, Dict[str, float]]
+    k: int = Field(10, ge=1, le=100)
+    exclude_id: Optional[str] = None  # Usually the requester's own stored profile
+
+class ProfileNeighbour(BaseModel):
+    id: str
+    distance: float  # Root mean square difference over the Big Five and facet scores, in score points
+
+class SimilarProfilesResponse(BaseModel):
+    profiles: int  # Profiles in the index
+    neighbours: List[ProfileNeighbour]
+
+class WireFormatLayout(BaseModel):
+    content_type: str
+    format_version: int
+    question_bank_version: str
+    item_ids: List[str]  # Answer byte order of the binary format
+
+class SessionCreateRequest(BaseModel):
+    norm_group: Optional[str] = None  # Defaults to general_population
+    responses: List[QuestionResponse] = []
+
+class SessionAnswersRequest(BaseModel):
+    responses: List[QuestionResponse]
+
+class SessionState(BaseModel):
+    session_id: str
+    answered: int
+    required: int
+    complete: bool
+    norm_group: Optional[str] = None
+
+class SessionResults(BaseModel):
+    session_id: str
+    answered: int
+    provisional: bool  # True until the minimum number of responses is answered
+    results: AssessmentResults
+
+class AdaptiveStartRequest(BaseModel):
+    user_seed: Optional[str] = None
+    norm_group: Optional[str] = None
+    se_threshold: float = Field(0.3, gt=0, le=1)  # Stop once every Big Five theta SE is below this
+    max_items: Optional[int] = Field(None, ge=1)  # Cap on adaptive (primary) items
+
+class AdaptiveStep(BaseModel):
+    session_id: str
+    answered: int
+    required: int
+    next_question: Optional[Question] = None  # Next primary item; None once the adaptive phase is over
+    adaptive_complete: bool
+    standard_errors: Dict[str, float]  # Current theta SE per Big Five dimension
+    remaining_questions: List[Question] = []  # Secondary and tertiary layers, once adaptive_complete
+    complete: bool
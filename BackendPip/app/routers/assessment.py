@@ -1,27 +1,151 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-import random
-import json
+import asyncio
 import os
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from typing import List, Literal, Optional, Type, Union
 from app.models.assessment import (
+    AdaptiveStartRequest,
+    AdaptiveStep,
     AssessmentStartRequest,
     AssessmentStartResponse, 
     AssessmentSubmission,
     AssessmentResults,
+    BatchScoreRequest,
+    BatchScoreResponse,
+    NormGroupsResponse,
+    PopulationAnalyticsResponse,
     Question,
     QuestionResponse,
-    BigFiveScores,
-    MBTIResult,
-    CognitiveFunctionStack,
-    PersonalityCluster,
-    JungianDepth
+    ResultCacheStats,
+    SessionAnswersRequest,
+    SessionCreateRequest,
+    SessionResults,
+    SessionState,
+    SimilarProfilesRequest,
+    SimilarProfilesResponse,
+    WireFormatLayout
 )
+from app.services.question_bank import QuestionBank
 from app.services.scoring import ScoringService
 from app.services.interpretation import InterpretationService
+from app.services.pipeline import AssessmentPipeline, MIN_RESPONSES
+from app.services.norms import DEFAULT_NORM_GROUP
+from app.services.result_cache import ResultCache, submission_key, vector_key
+from app.services.sessions import ScoringSession, SessionStore
+from app.services.adaptive import AdaptiveTester
+from app.services.analytics import PopulationAnalytics, parse_timestamp
+from app.services.profile_index import ProfileIndex, profile_features, profile_vector
+from app.services.executor import ExecutorSaturated, ScoringExecutor
+from app.services.metrics import PipelineMetrics
+from app.services import wire_format
+from app.utils import fast_json
+from app.utils.fast_json import ResponseEncoder
+
+# Upper bound on submissions per /score-batch request
+MAX_BATCH_SIZE = 5000
+ANALYTICS_INTERVALS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+
+def _population_analytics() -> Optional[PopulationAnalytics]:
+    if os.environ.get('ANALYTICS_ENABLED', '1') == '0':
+        return None
+    retention = int(float(os.environ.get('ANALYTICS_RETENTION_DAYS', '90')) * 86400)
+    window_seconds = int(os.environ.get('ANALYTICS_WINDOW_SECONDS', '3600'))
+    path = os.environ.get('ANALYTICS_SNAPSHOT')
+    if path:
+        # One snapshot file per server worker, so workers never overwrite or double count each other
+        return PopulationAnalytics.load_worker(path, window_seconds, retention)
+    return PopulationAnalytics(window_seconds, retention)
+
+def _fast_json() -> bool:
+    if os.environ.get('FAST_JSON') != '1':
+        return False
+    # Refuse rather than quietly serve the slower pydantic path that was opted out of
+    if fast_json.orjson is None:
+        raise ImportError("FAST_JSON=1 needs orjson, which is not installed")
+    return True
+
+def _profile_index(scoring: ScoringService) -> Optional[ProfileIndex]:
+    path = os.environ.get('PROFILE_INDEX')
+    if not path:
+        return None
+    index = ProfileIndex.load(path)
+    if list(index.features) != profile_features(scoring.plan):
+        raise ValueError(f"Profile index at {path} was built for different facets than the question bank")
+    if os.environ.get('PROFILE_INDEX_NPROBE'):
+        index.nprobe = int(os.environ['PROFILE_INDEX_NPROBE'])
+    return index
 
 router = APIRouter()
-scoring_service = ScoringService()
+question_bank = QuestionBank()
+scoring_service = ScoringService(question_bank)
 interpretation_service = InterpretationService()
+pipeline = AssessmentPipeline(scoring_service, interpretation_service)
+# Serialized results of recent submissions; RESULT_CACHE_DIR adds an on-disk tier of up to RESULT_CACHE_DIR_MB
+result_cache = ResultCache(int(os.environ.get('RESULT_CACHE_SIZE', '1024')),
+                           os.environ.get('RESULT_CACHE_DIR') or None,
+                           int(os.environ.get('RESULT_CACHE_DIR_MB', '512')) * 1024 * 1024)
+# Assessments in progress, scored incrementally as answers arrive
+session_store = SessionStore(pipeline)
+# Counts over newly scored submit-assessment results per time window (ANALYTICS_WINDOW_SECONDS,
+# default an hour) for ANALYTICS_RETENTION_DAYS (default 90); ANALYTICS_SNAPSHOT keeps them
+# across restarts. ANALYTICS_ENABLED=0 turns them off
+population_analytics = _population_analytics()
+adaptive_tester = AdaptiveTester(session_store, question_bank)
+# Stored profiles for /similar-profiles, built by app.cli.profile_index and memory-mapped from
+# PROFILE_INDEX; PROFILE_INDEX_NPROBE trades recall for latency
+profile_index = _profile_index(scoring_service)
+# Per-stage latency histograms for /metrics; SERVER_TIMING=1 also returns them per request
+pipeline_metrics = PipelineMetrics(os.environ.get('METRICS_ENABLED', '1') != '0',
+                                   os.environ.get('SERVER_TIMING') == '1')
+# Where scoring runs: SCORING_BACKEND=inline, thread (default) or process; at most
+# SCORING_MAX_PENDING calls wait or run at once, beyond that requests get a 429
+# FAST_JSON=1 writes results with orjson from the pipeline's dicts, without re-validating them
+scoring_executor = ScoringExecutor(pipeline, os.environ.get('SCORING_BACKEND', 'thread'),
+                                   int(os.environ.get('SCORING_WORKERS', '0')) or None,
+                                   int(os.environ.get('SCORING_MAX_PENDING', '0')) or None,
+                                   _fast_json(), population_analytics)
+session_results_encoder = ResponseEncoder(SessionResults)
+analytics_encoder = ResponseEncoder(PopulationAnalyticsResponse)
+
+def _saturated(error: ExecutorSaturated) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(error), headers={'Retry-After': '1'})
+
+def _timing_headers(endpoint: str, timer, cache: str = '') -> dict:
+    server_timing = pipeline_metrics.record(endpoint, timer, cache)
+    return {'Server-Timing': server_timing} if server_timing else {}
+
+def _request_body(model: Type[BaseModel]) -> dict:
+    # OpenAPI for endpoints that take either the JSON model or the binary wire format
+    return {'requestBody': {'required': True, 'content': {
+        'application/json': {'schema': model.model_json_schema()},
+        wire_format.CONTENT_TYPE: {'schema': {'type': 'string', 'format': 'binary'}}
+    }}}
+
+def _check_answers(responses: List[QuestionResponse]):
+    # Model validation bounds every Likert value to 1-7; likert_5 items only go up to 5
+    error = scoring_service.plan.answer_errors(scoring_service.plan.encode(responses))[0]
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+async def _read_body(request: Request, model: Type[BaseModel]) -> Union[BaseModel, tuple]:
+    """
+    The JSON body as model, or for a wire_format body the decoded
+    (X, answered counts, norm group), without building any response models.
+    """
+    body = await request.body()
+    if request.headers.get('content-type', '').split(';')[0].strip() == wire_format.CONTENT_TYPE:
+        try:
+            return wire_format.decode(body, scoring_service.plan)
+        except wire_format.QuestionBankMismatch as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except wire_format.WireFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, 'loc': ('body', *error['loc'])}
+                                      for error in e.errors()])
 
 @router.post("/start-assessment", response_model=AssessmentStartResponse)
 async def start_assessment(request: AssessmentStartRequest = AssessmentStartRequest()):
@@ -31,167 +155,272 @@ async def start_assessment(request: AssessmentStartRequest = AssessmentStartRequ
     If user_seed is provided, uses deterministic shuffling for consistent order.
     """
     try:
-        # Load questions
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        questions_path = os.path.join(current_dir, '../../questions/questions.json')
-        
-        # Ensure path exists
-        if not os.path.exists(questions_path):
-            raise FileNotFoundError(f"Questions file not found at: {questions_path}")
-            
-        with open(questions_path, 'r') as f:
-            data = json.load(f)
-        
-        all_questions = data['questions']
-        
-        # Separate by layer
-        primary = [q for q in all_questions if q['assessment_layer'] == 'primary']
-        secondary = [q for q in all_questions if q['assessment_layer'] == 'secondary']
-        tertiary = [q for q in all_questions if q['assessment_layer'] == 'tertiary']
-        
-        # Create a random instance with seed if provided
-        if request.user_seed:
-            # Use a seeded random for deterministic shuffling
-            rng = random.Random(request.user_seed)
-            rng.shuffle(primary)
-            rng.shuffle(secondary)
-            rng.shuffle(tertiary)
-        else:
-            # Use regular random shuffle for anonymous users
-            random.shuffle(primary)
-            random.shuffle(secondary)
-            random.shuffle(tertiary)
-        
-        # Combine in order
-        shuffled_questions = primary + secondary + tertiary
-        
-        # Convert to Question models
-        questions = [Question(**q) for q in shuffled_questions]
-        
-        return AssessmentStartResponse(
-            questions=questions,
-            total_questions=len(questions)
-        )
+        timer = pipeline_metrics.timer()
+        # Questions are validated and pre-encoded once per question bank version,
+        # so a request is just a permutation and a byte concatenation
+        content = question_bank.snapshot.render_start_response(request.user_seed)
+        timer.lap('render')
+        return Response(content=content, media_type="application/json",
+                        headers=_timing_headers('start-assessment', timer))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting assessment: {str(e)}")
 
-@router.post("/submit-assessment", response_model=AssessmentResults)
-async def submit_assessment(submission: AssessmentSubmission):
+@router.post("/submit-assessment", response_model=AssessmentResults,
+             openapi_extra=_request_body(AssessmentSubmission))
+async def submit_assessment(request: Request):
     """
     Process all responses and return complete results.
+    Takes an AssessmentSubmission as JSON, or one row in the binary wire format.
     """
     try:
-        responses = submission.responses
+        timer = pipeline_metrics.timer()
+        submission = await _read_body(request, AssessmentSubmission)
+        timer.lap('parse')
+        if isinstance(submission, AssessmentSubmission):
+            count, norm_group = len(submission.responses), submission.norm_group
+            _check_answers(submission.responses)
+        else:
+            X, counts, norm_group = submission
+            if X.shape[0] != 1:
+                raise HTTPException(status_code=400, detail=f"Expected one submission, received {X.shape[0]}.")
+            count = int(counts[0])
         
         # Validate minimum responses (80% = 160 questions)
-        if len(responses) < 160:
+        if count < MIN_RESPONSES:
             raise HTTPException(
                 status_code=400, 
-                detail=f"Insufficient responses. Received {len(responses)}, minimum required is 160."
+                detail=f"Insufficient responses. Received {count}, minimum required is {MIN_RESPONSES}."
             )
         
-        # Separate response types
-        likert_responses = [r for r in responses if r.response_value is not None]
-        forced_choice = [r for r in responses if r.selected_option is not None]
-        
-        # Calculate Big Five scores
-        raw_scores = scoring_service.calculate_raw_scores(likert_responses)
-        irt_scores = scoring_service.calculate_irt_scores(likert_responses)
+        if norm_group and norm_group not in scoring_service.norm_registry:
+            raise HTTPException(status_code=400, detail=f"Unknown norm group '{norm_group}'")
         
-        # Standardize scores
-        standardized = scoring_service.standardize_scores(raw_scores, irt_scores)
-        
-        # Calculate confidence intervals
-        confidence_intervals = scoring_service.calculate_confidence_intervals(
-            standardized['scores'],
-            standardized['standard_errors']
-        )
-        
-        # Calculate facet scores
-        facet_scores = scoring_service.calculate_facet_scores(likert_responses)
-        
-        # Determine MBTI type
-        mbti_result = scoring_service.classify_mbti_type(
-            standardized['scores'],
-            forced_choice
-        )
-        
-        # Determine cognitive functions
-        depth_responses = [r for r in responses if 'JD_' in r.question_id]
-        function_stack = scoring_service.determine_function_stack(
-            mbti_result['primary_type'],
-            standardized['scores'],
-            depth_responses
-        )
-        
-        # Cluster classification
-        big_five_list = [
-            standardized['scores']['Extraversion'],
-            standardized['scores']['Agreeableness'],
-            standardized['scores']['Conscientiousness'],
-            standardized['scores']['Neuroticism'],
-            standardized['scores']['Openness']
-        ]
-        cluster_result = scoring_service.classify_to_cluster(big_five_list)
-        
-        # Analyze depth responses
-        depth_analysis = scoring_service.analyze_depth_responses(responses)
-        
-        # Prepare structured results for interpretation
-        results_dict = {
-            'big_five': {
-                'scores': standardized['scores'],
-                'percentiles': standardized['percentiles'],
-                'confidence_intervals': confidence_intervals,
-                'facet_scores': facet_scores
-            },
-            'mbti': mbti_result,
-            'cognitive_functions': function_stack,
-            'personality_cluster': cluster_result,
-            'jungian_depth': depth_analysis
-        }
-        
-        # Generate interpretation
-        interpretation = interpretation_service.generate_integrated_interpretation(results_dict)
-        
-        # Generate development suggestions
-        development_suggestions = interpretation_service.generate_development_suggestions(results_dict)
-        
-        # Create response models
-        big_five_response = BigFiveScores(
-            scores=standardized['scores'],
-            percentiles=standardized['percentiles'],
-            confidence_intervals=confidence_intervals,
-            facet_scores=facet_scores
-        )
-        
-        mbti_response = MBTIResult(**mbti_result)
-        
-        cognitive_response = CognitiveFunctionStack(**function_stack)
+        # Report views re-submit identical responses, so results are cached by a
+        # hash of the sorted responses, norm group and scoring data versions
+        if isinstance(submission, AssessmentSubmission):
+            key = submission_key(submission.responses, norm_group or DEFAULT_NORM_GROUP, scoring_service.versions())
+        else:
+            key = vector_key(X[0], norm_group or DEFAULT_NORM_GROUP, scoring_service.versions())
+        content = result_cache.get(key)
+        timer.lap('cache')
+        cache_status = 'HIT'
+        if content is None:
+            # Raw, IRT, standardization, CIs, facets, MBTI, functions, cluster,
+            # depth, interpretation and suggestions over one encoded response vector
+            if isinstance(submission, AssessmentSubmission):
+                content = await scoring_executor.score_responses(submission.responses, norm_group, timer)
+            else:
+                content = await scoring_executor.score_vector(X[0], norm_group, timer)
+            result_cache.put(key, content)
+            timer.lap('cache')
+            cache_status = 'MISS'
         
-        cluster_response = PersonalityCluster(
-            primary_cluster=cluster_result['primary_cluster'],
-            cluster_probabilities=cluster_result['cluster_probabilities'],
-            cluster_description=cluster_result.get('cluster_description')
-        )
+        headers = {'X-Cache': cache_status}
+        headers.update(_timing_headers('submit-assessment', timer, cache_status.lower()))
+        return Response(content=content, media_type="application/json", headers=headers)
         
-        depth_response = JungianDepth(
-            shadow_integration=depth_analysis['shadow_integration'],
-            archetype_profile=depth_analysis.get('archetype_profile'),
-            individuation_stage=depth_analysis.get('individuation_stage')
+    except (HTTPException, RequestValidationError):
+        raise
+    except ExecutorSaturated as e:
+        raise _saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing assessment: {str(e)}")
+
+@router.post("/score-batch", response_model=BatchScoreResponse, openapi_extra=_request_body(BatchScoreRequest))
+async def score_batch(request: Request):
+    """
+    Score many completed assessments in one call (e.g. re-scoring historical data).
+    Results are returned in request order; rows that cannot be scored carry an error instead.
+    Takes a BatchScoreRequest as JSON, or rows in the binary wire format sharing one norm group.
+    """
+    timer = pipeline_metrics.timer()
+    batch = await _read_body(request, BatchScoreRequest)
+    timer.lap('parse')
+    size = len(batch.submissions) if isinstance(batch, BatchScoreRequest) else batch[0].shape[0]
+    if size > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large. Received {size}, maximum is {MAX_BATCH_SIZE}."
         )
-        
-        return AssessmentResults(
-            big_five=big_five_response,
-            mbti=mbti_response,
-            cognitive_functions=cognitive_response,
-            personality_cluster=cluster_response,
-            jungian_depth=depth_response,
-            interpretation=interpretation,
-            development_suggestions=development_suggestions
+
+    try:
+        if isinstance(batch, BatchScoreRequest):
+            content = await scoring_executor.score_batch([s.responses for s in batch.submissions],
+                                                         [s.norm_group for s in batch.submissions], timer)
+        else:
+            X, counts, norm_group = batch
+            content = await scoring_executor.score_matrix(X, counts, [norm_group] * size, timer)
+        return Response(content=content, media_type="application/json",
+                        headers=_timing_headers('score-batch', timer))
+    except ExecutorSaturated as e:
+        raise _saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing batch: {str(e)}")
+
+@router.get("/wire-format", response_model=WireFormatLayout)
+async def get_wire_format():
+    """
+    Layout of the binary submission format for the current question bank:
+    answers are sent in item_ids order. A body encoded for another
+    question_bank_version is rejected with 409.
+    """
+    plan = scoring_service.plan
+    return WireFormatLayout(content_type=wire_format.CONTENT_TYPE, format_version=wire_format.FORMAT_VERSION,
+                            question_bank_version=plan.version, item_ids=list(plan.item_ids))
+
+@router.get("/norm-groups", response_model=NormGroupsResponse)
+async def list_norm_groups():
+    """
+    Norm groups that submissions can be compared against via norm_group.
+    """
+    return NormGroupsResponse(groups=scoring_service.norm_registry.groups, default=DEFAULT_NORM_GROUP)
+
+@router.get("/cache-stats", response_model=ResultCacheStats)
+async def cache_stats():
+    """
+    Hit, miss and eviction counts of the submit-assessment result cache.
+    """
+    return ResultCacheStats(**result_cache.stats())
+
+@router.get("/analytics", response_model=PopulationAnalyticsResponse)
+async def get_population_analytics(start: Optional[str] = None, end: Optional[str] = None,
+                                   interval: Optional[Literal['hour', 'day', 'week']] = Query(None)):
+    """
+    MBTI type, cluster, archetype and Big Five score distributions of the
+    submissions scored in [start, end), from the in-memory aggregates rather
+    than the responses. With interval, also one summary per hour, day or week.
+    Times are ISO 8601 dates or times (UTC unless they carry an offset) or epoch seconds.
+    """
+    if population_analytics is None:
+        raise HTTPException(status_code=404, detail="Population analytics are disabled")
+    try:
+        summary = population_analytics.query(
+            parse_timestamp(start) if start else None, parse_timestamp(end) if end else None,
+            ANALYTICS_INTERVALS[interval] if interval else None
         )
-        
-    except HTTPException:
-        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=analytics_encoder.encode(summary, scoring_executor.fast_json),
+                    media_type="application/json")
+
+@router.post("/similar-profiles", response_model=SimilarProfilesResponse)
+async def similar_profiles(request: SimilarProfilesRequest):
+    """
+    The k stored profiles nearest to a Big Five and facet profile, by root
+    mean square score difference, each id once. Search is approximate: it
+    scans the inverted lists nearest to the profile, not every profile.
+    """
+    if profile_index is None:
+        raise HTTPException(status_code=404, detail="Similar-profile search is not configured")
+    try:
+        vector = profile_vector(request.model_dump(), profile_index.features)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # NumPy releases the GIL while scanning, so searches do not hold up the event loop
+    neighbours = await asyncio.to_thread(profile_index.search, vector, request.k, None, request.exclude_id)
+    return SimilarProfilesResponse(
+        profiles=len(profile_index),
+        neighbours=[{'id': id_, 'distance': round(distance, 2)} for id_, distance in neighbours]
+    )
+
+def _session_state(session: ScoringSession) -> SessionState:
+    return SessionState(session_id=session.session_id, answered=session.answered, required=session.required,
+                        complete=session.complete, norm_group=session.norm_group or DEFAULT_NORM_GROUP)
+
+def _get_session(session_id: str) -> ScoringSession:
+    try:
+        return session_store.get(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+
+@router.post("/sessions", response_model=SessionState, status_code=201)
+async def create_session(request: SessionCreateRequest = SessionCreateRequest()):
+    """
+    Start an incremental scoring session, optionally with answers already given.
+    """
+    if request.norm_group and request.norm_group not in scoring_service.norm_registry:
+        raise HTTPException(status_code=400, detail=f"Unknown norm group '{request.norm_group}'")
+    session = session_store.create(request.norm_group)
+    if request.responses:
+        session_store.answer(session, request.responses)
+    return _session_state(session)
+
+@router.get("/sessions/{session_id}", response_model=SessionState)
+async def get_session(session_id: str):
+    return _session_state(_get_session(session_id))
+
+@router.post("/sessions/{session_id}/responses", response_model=SessionState)
+async def add_session_responses(session_id: str, request: SessionAnswersRequest):
+    """
+    Apply new or changed answers; each one updates the session's running sums.
+    A response with neither response_value nor selected_option withdraws the answer.
+    """
+    session = _get_session(session_id)
+    _check_answers(request.responses)
+    session_store.answer(session, request.responses)
+    return _session_state(session)
+
+@router.get("/sessions/{session_id}/results", response_model=SessionResults)
+async def get_session_results(session_id: str):
+    """
+    Results from the answers so far. They are provisional until the minimum
+    number of responses has been answered, and final from then on.
+    """
+    session = _get_session(session_id)
+    try:
+        results = (await scoring_executor.score_statistics(session_store.statistics(session),
+                                                           [session.norm_group]))[0]
+    except ExecutorSaturated as e:
+        raise _saturated(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing assessment: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error processing assessment: {str(e)}")
+    content = session_results_encoder.encode({'session_id': session.session_id, 'answered': session.answered,
+                                              'provisional': not session.complete, 'results': results},
+                                             scoring_executor.fast_json)
+    return Response(content=content, media_type="application/json")
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+    return Response(status_code=204)
+
+def _adaptive_step(session: ScoringSession, next_question_id: Optional[str]) -> AdaptiveStep:
+    by_id = question_bank.snapshot.by_id
+    finished = session.adaptive.finished
+    return AdaptiveStep(
+        session_id=session.session_id,
+        answered=session.answered,
+        required=session.required,
+        next_question=Question(**by_id[next_question_id]) if next_question_id else None,
+        adaptive_complete=finished,
+        standard_errors=adaptive_tester.standard_errors(session),
+        remaining_questions=[Question(**by_id[q]) for q in session.adaptive.remaining if q in by_id] if finished else [],
+        complete=session.complete
+    )
+
+@router.post("/adaptive-assessment", response_model=AdaptiveStep, status_code=201)
+async def start_adaptive_assessment(request: AdaptiveStartRequest = AdaptiveStartRequest()):
+    """
+    Start a computerized adaptive assessment. Primary questions are served one at
+    a time, each the most informative at the current trait estimate, until every
+    Big Five standard error is below se_threshold. The secondary and tertiary
+    layers then follow as in start-assessment. Results come from the session
+    endpoints.
+    """
+    if request.norm_group and request.norm_group not in scoring_service.norm_registry:
+        raise HTTPException(status_code=400, detail=f"Unknown norm group '{request.norm_group}'")
+    session = adaptive_tester.start(request.norm_group, request.user_seed, request.se_threshold, request.max_items)
+    return _adaptive_step(session, session.adaptive.pending)
+
+@router.post("/adaptive-assessment/{session_id}/responses", response_model=AdaptiveStep)
+async def answer_adaptive_assessment(session_id: str, request: SessionAnswersRequest):
+    """
+    Apply answers and return the next question. A served question left unanswered is skipped.
+    """
+    session = _get_session(session_id)
+    if session.adaptive is None:
+        raise HTTPException(status_code=400, detail=f"Session '{session_id}' is not adaptive")
+    _check_answers(request.responses)
+    next_question_id = adaptive_tester.answer(session, request.responses)
+    return _adaptive_step(session, next_question_id)
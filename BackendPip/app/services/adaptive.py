@@ -0,0 +1,161 @@
+import math
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from app.models.assessment import AssessmentLayer, QuestionResponse
+from app.services.irt import GradedResponseModel
+from app.services.pipeline import MIN_RESPONSES
+from app.services.question_bank import QuestionBank
+from app.services.sessions import ScoringSession, SessionStore
+
+# Posterior SD of theta at which a dimension stops receiving items (reliability ~0.91)
+DEFAULT_SE_THRESHOLD = 0.3
+
+
+class AdaptivePlan:
+    """
+    Item selection tables for one version of the GRM. For every dimension
+    and quadrature point, the dimension's primary items are ranked by Fisher
+    information once, so choosing the next item is a scan down one short,
+    precomputed list for the first item not yet asked.
+    """
+
+    def __init__(self, irt_model: GradedResponseModel, item_ids: List[str]):
+        self.irt_model = irt_model
+        self.item_ids = item_ids
+        self.position = {item_id: k for k, item_id in enumerate(item_ids)}
+        self.grid = irt_model.grid
+        self.step = self.grid[1] - self.grid[0]
+        # ranked[d][g]: positions (into irt_model.item_idx) of dimension d's items,
+        # most informative at grid point g first. Plain lists, since a pick
+        # touches only a few entries and NumPy scalar access would dominate
+        self.ranked = [
+            items[np.argsort(-irt_model.information[items], axis=0, kind='stable')].T.tolist()
+            for items in irt_model.dimension_items
+        ]
+        self.information = irt_model.information.T.tolist()
+
+    def grid_index(self, theta: float) -> int:
+        return min(max(int(round((theta - self.grid[0]) / self.step)), 0), len(self.grid) - 1)
+
+    def next_item(self, theta: np.ndarray, open_dimensions: np.ndarray, asked: np.ndarray) -> Optional[int]:
+        # Most informative unasked item at the current estimate, over dimensions still above the SE threshold
+        best, best_information = None, -1.0
+        asked = asked.tolist()
+        for d in np.flatnonzero(open_dimensions).tolist():
+            g = self.grid_index(float(theta[d]))
+            information = self.information[g]
+            for position in self.ranked[d][g]:
+                if not asked[position]:
+                    if information[position] > best_information:
+                        best, best_information = position, information[position]
+                    break
+        return best
+
+
+class AdaptiveState:
+    """
+    Computerized adaptive testing state of one ScoringSession: primary items
+    are served one at a time until every Big Five SE is below se_threshold
+    (or max_items have been asked), then the remaining layers follow in
+    start-assessment order.
+    """
+
+    def __init__(self, se_threshold: float, max_items: Optional[int], remaining: List[str],
+                 remaining_required: int):
+        self.se_threshold = se_threshold
+        self.max_items = max_items
+        self.remaining = remaining
+        self.remaining_required = remaining_required
+        self.skipped: Set[str] = set()
+        self.pending: Optional[str] = None
+        self.finished = False
+        self.theta: Optional[np.ndarray] = None
+        self.standard_errors: Optional[np.ndarray] = None
+
+    def required(self, session: ScoringSession) -> int:
+        # Every adaptive answer plus the usual share of the remaining layers
+        primary = len(session.answers) - sum(1 for question_id in self.remaining if question_id in session.answers)
+        return primary + self.remaining_required
+
+    def step(self, session: ScoringSession, plan: AdaptivePlan) -> Optional[str]:
+        irt = plan.irt_model
+        if self.pending is not None and self.pending not in session.answers:
+            # Served but not answered: treat it as skipped
+            self.skipped.add(self.pending)
+        self.pending = None
+
+        self.theta, self.standard_errors = irt.eap(session.statistics['log_likelihood'][0])
+        asked = ~np.isnan(session.values[irt.item_idx])
+        for question_id in self.skipped:
+            position = plan.position.get(question_id)
+            if position is not None:
+                asked[position] = True
+
+        open_dimensions = self.standard_errors >= self.se_threshold
+        if self.max_items is not None and int(asked.sum()) >= self.max_items:
+            open_dimensions[:] = False
+        position = plan.next_item(self.theta, open_dimensions, asked) if open_dimensions.any() else None
+
+        if position is None:
+            self.finished = True
+            return None
+        self.pending = plan.item_ids[position]
+        return self.pending
+
+
+class AdaptiveTester:
+    """
+    Starts and advances adaptive sessions in a SessionStore. Answers and
+    results go through the store like any other session.
+    """
+
+    def __init__(self, store: SessionStore, question_bank: QuestionBank):
+        self.store = store
+        self.question_bank = question_bank
+        self._plan: Optional[AdaptivePlan] = None
+
+    def plan(self) -> AdaptivePlan:
+        compiled = self.store.compiled()
+        plan = self._plan
+        if plan is None or plan.irt_model is not compiled.irt_model:
+            item_ids = [compiled.plan.item_ids[i] for i in compiled.irt_model.item_idx]
+            plan = AdaptivePlan(compiled.irt_model, item_ids)
+            self._plan = plan
+        return plan
+
+    def start(self, norm_group: Optional[str] = None, user_seed: Optional[str] = None,
+              se_threshold: float = DEFAULT_SE_THRESHOLD, max_items: Optional[int] = None) -> ScoringSession:
+        snapshot = self.question_bank.snapshot
+        primary = set(snapshot.layers[AssessmentLayer.PRIMARY.value])
+        remaining = [snapshot.questions[i]['id'] for i in snapshot.shuffled_order(user_seed) if i not in primary]
+
+        # Same share of the remaining layers as MIN_RESPONSES is of a full assessment
+        remaining_required = math.ceil(len(remaining) * MIN_RESPONSES / len(snapshot))
+
+        session = self.store.create(norm_group)
+        session.adaptive = AdaptiveState(se_threshold, max_items, remaining, remaining_required)
+        self.advance(session)
+        return session
+
+    def answer(self, session: ScoringSession, responses: List[QuestionResponse]) -> Optional[str]:
+        self.store.answer(session, responses)
+        return self.advance(session)
+
+    def advance(self, session: ScoringSession) -> Optional[str]:
+        # Next primary question id, or None once the adaptive phase is over
+        if session.adaptive is None:
+            raise ValueError(f"Session '{session.session_id}' is not adaptive")
+        plan = self.plan()
+        with session.lock:
+            if session.adaptive.finished:
+                return None
+            return session.adaptive.step(session, plan)
+
+    def standard_errors(self, session: ScoringSession) -> Dict[str, float]:
+        adaptive = session.adaptive
+        if adaptive is None or adaptive.standard_errors is None:
+            return {}
+        dimensions = self.plan().irt_model.dimensions
+        return {dimension: round(float(se), 3) for dimension, se in zip(dimensions, adaptive.standard_errors)}
@@ -0,0 +1,580 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; worker snapshots are then never folded into the shared one
+    fcntl = None
+
+from app.services.mbti import TYPE_CODES
+from app.services.scoring_plan import BIG_FIVE_DIMENSIONS
+
+SNAPSHOT_FORMAT = 'population-analytics/1'
+
+# Fixed-width histogram bins: 1 point on the 0-100 Big Five scale, 0.1 on the 0-1 archetype scale
+SCORE_BINS = 100
+ARCHETYPE_BINS = 10
+SUMMARY_PERCENTILES = (10, 25, 50, 75, 90)
+# Whole days are also kept combined, so a long query merges days rather than every window
+ROLLUP_SECONDS = 86400
+# Most segments one query may return, which bounds its latency
+MAX_SEGMENTS = 1000
+
+# What one scored result contributes: MBTI type, primary cluster, whether any quality flag
+# was raised, Big Five scores (NaN where missing) and archetype scores
+Observation = Tuple[Optional[str], Optional[str], bool, Tuple[float, ...], Tuple[Tuple[str, float], ...]]
+
+
+def observation(results: Dict) -> Observation:
+    """The parts of an AssessmentResults dict that the population analytics count."""
+    scores = results.get('big_five', {}).get('scores', {})
+    cluster = results.get('personality_cluster') or {}
+    return (
+        results.get('mbti', {}).get('primary_type'),
+        _cluster_name(cluster.get('primary_cluster'), cluster.get('cluster_description')),
+        bool((results.get('response_quality') or {}).get('flags')),
+        tuple(float(scores.get(dimension, np.nan)) for dimension in BIG_FIVE_DIMENSIONS),
+        tuple((name, float(value))
+              for name, value in results.get('jungian_depth', {}).get('archetype_profile', {}).items())
+    )
+
+
+def _cluster_name(primary_cluster: Optional[int], description: Optional[str]) -> Optional[str]:
+    # The primary cluster's archetype name, or its number as GaussianMixtureClassifier names unnamed clusters
+    if description:
+        return description
+    return f"Cluster {primary_cluster + 1}" if primary_cluster is not None else None
+
+
+def _bins(values: np.ndarray, high: float, bins: int) -> np.ndarray:
+    # The top of the range falls in the last bin; the tolerance keeps e.g. 0.3 * 10 out of bin 2
+    return np.minimum((np.clip(values, 0.0, high) * (bins / high) + 1e-9).astype(np.intp), bins - 1)
+
+
+class Aggregate:
+    """
+    Mergeable counts over a set of scored results: MBTI type and cluster
+    frequencies, quality-flagged submissions, and per Big Five dimension and
+    archetype a fixed-bin histogram with the sum and sum of squares of the
+    scores. Everything is a count or a sum, so aggregates of time windows or
+    shards add up in any order.
+    """
+
+    def __init__(self, dimensions: Sequence[str] = BIG_FIVE_DIMENSIONS):
+        self.dimensions = tuple(dimensions)
+        self.count = 0
+        self.flagged = 0
+        self.types = np.zeros(len(TYPE_CODES), dtype=np.int64)
+        self.clusters: Dict[str, int] = {}
+        self.scores = np.zeros((len(self.dimensions), SCORE_BINS), dtype=np.int64)
+        # Per dimension: scored results, sum and sum of squares
+        self.moments = np.zeros((len(self.dimensions), 3))
+        self.archetypes: Dict[str, np.ndarray] = {}
+        self.archetype_moments: Dict[str, np.ndarray] = {}
+
+    def add(self, observations: Sequence[Observation]):
+        if not observations:
+            return
+        type_index = {code: t for t, code in enumerate(TYPE_CODES)}
+        scores = np.array([o[3] for o in observations], dtype=np.float64).reshape(len(observations), -1)
+        archetype_values: Dict[str, List[float]] = {}
+        for mbti_type, cluster, flagged, _, archetypes in observations:
+            if mbti_type in type_index:
+                self.types[type_index[mbti_type]] += 1
+            if cluster is not None:
+                self.clusters[cluster] = self.clusters.get(cluster, 0) + 1
+            self.flagged += flagged
+            for name, value in archetypes:
+                archetype_values.setdefault(name, []).append(value)
+
+        self.count += len(observations)
+        for j in range(len(self.dimensions)):
+            column = scores[:, j]
+            column = column[~np.isnan(column)]
+            self.scores[j] += np.bincount(_bins(column, 100.0, SCORE_BINS), minlength=SCORE_BINS)
+            self.moments[j] += (len(column), column.sum(), (column ** 2).sum())
+        for name, values in archetype_values.items():
+            values = np.array(values)
+            if name not in self.archetypes:
+                self.archetypes[name] = np.zeros(ARCHETYPE_BINS, dtype=np.int64)
+                self.archetype_moments[name] = np.zeros(3)
+            self.archetypes[name] += np.bincount(_bins(values, 1.0, ARCHETYPE_BINS), minlength=ARCHETYPE_BINS)
+            self.archetype_moments[name] += (len(values), values.sum(), (values ** 2).sum())
+
+    def merge(self, other: 'Aggregate') -> 'Aggregate':
+        if other.dimensions != self.dimensions:
+            raise ValueError("Cannot merge aggregates over different dimensions")
+        self.count += other.count
+        self.flagged += other.flagged
+        self.types += other.types
+        for cluster, count in other.clusters.items():
+            self.clusters[cluster] = self.clusters.get(cluster, 0) + count
+        self.scores += other.scores
+        self.moments += other.moments
+        for name, histogram in other.archetypes.items():
+            if name not in self.archetypes:
+                self.archetypes[name] = np.zeros(ARCHETYPE_BINS, dtype=np.int64)
+                self.archetype_moments[name] = np.zeros(3)
+            self.archetypes[name] += histogram
+            self.archetype_moments[name] += other.archetype_moments[name]
+        return self
+
+    @classmethod
+    def combine(cls, aggregates: Sequence['Aggregate'],
+                dimensions: Sequence[str] = BIG_FIVE_DIMENSIONS) -> 'Aggregate':
+        # merge() over many aggregates at once: one stacked sum per array instead of one add per aggregate
+        combined = cls(dimensions)
+        if not aggregates:
+            return combined
+        combined.count = sum(a.count for a in aggregates)
+        combined.flagged = sum(a.flagged for a in aggregates)
+        combined.types = np.sum([a.types for a in aggregates], axis=0)
+        combined.scores = np.sum([a.scores for a in aggregates], axis=0)
+        combined.moments = np.sum([a.moments for a in aggregates], axis=0)
+        for aggregate in aggregates:
+            for cluster, count in aggregate.clusters.items():
+                combined.clusters[cluster] = combined.clusters.get(cluster, 0) + count
+        for name in {name for aggregate in aggregates for name in aggregate.archetypes}:
+            combined.archetypes[name] = np.sum([a.archetypes[name] for a in aggregates if name in a.archetypes],
+                                               axis=0)
+            combined.archetype_moments[name] = np.sum(
+                [a.archetype_moments[name] for a in aggregates if name in a.archetype_moments], axis=0)
+        return combined
+
+    def summary(self) -> Dict:
+        percentiles = _percentiles(self.scores, 100.0)
+        moments = self.moments.tolist()
+        return {
+            'respondents': self.count,
+            'flagged': self.flagged,
+            'mbti_types': {code: int(count) for code, count in zip(TYPE_CODES, self.types)},
+            'clusters': dict(sorted(self.clusters.items())),
+            'big_five': {
+                dimension: {
+                    **_moments(*moments[j]),
+                    'percentiles': percentiles[j],
+                    'histogram': self.scores[j].tolist()
+                }
+                for j, dimension in enumerate(self.dimensions)
+            },
+            'archetypes': {
+                name: {**_moments(*self.archetype_moments[name].tolist()),
+                       'histogram': self.archetypes[name].tolist()}
+                for name in sorted(self.archetypes)
+            }
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'flagged': self.flagged,
+            'types': self.types.tolist(),
+            'clusters': self.clusters,
+            'scores': self.scores.tolist(),
+            'moments': self.moments.tolist(),
+            'archetypes': {name: histogram.tolist() for name, histogram in self.archetypes.items()},
+            'archetype_moments': {name: moments.tolist() for name, moments in self.archetype_moments.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, dimensions: Sequence[str] = BIG_FIVE_DIMENSIONS) -> 'Aggregate':
+        aggregate = cls(dimensions)
+        aggregate.count = data['count']
+        aggregate.flagged = data['flagged']
+        aggregate.types = np.array(data['types'], dtype=np.int64)
+        aggregate.clusters = dict(data['clusters'])
+        aggregate.scores = np.array(data['scores'], dtype=np.int64).reshape(len(aggregate.dimensions), SCORE_BINS)
+        aggregate.moments = np.array(data['moments'], dtype=np.float64).reshape(len(aggregate.dimensions), 3)
+        aggregate.archetypes = {name: np.array(h, dtype=np.int64) for name, h in data['archetypes'].items()}
+        aggregate.archetype_moments = {name: np.array(m, dtype=np.float64)
+                                       for name, m in data['archetype_moments'].items()}
+        return aggregate
+
+
+class PopulationAnalytics:
+    """
+    Aggregates of scored results per time window (window_seconds long,
+    aligned to the UTC epoch), kept in memory. Windows older than
+    retention_seconds behind the newest are dropped as new ones open.
+    A query merges the windows it covers, optionally grouped into longer
+    segments, so it never touches responses or re-scores anything.
+
+    record() only appends to a buffer, so it costs a request about a
+    microsecond; buffered observations are folded into their windows
+    fold_size at a time, where the histogram updates vectorize, and before
+    any query or snapshot. Each whole day's windows are combined once and
+    reused until one of them changes, so a query over months merges days.
+    record() is called from request handlers and save() from a snapshot
+    task, so both take the lock.
+    """
+
+    def __init__(self, window_seconds: int = 3600, retention_seconds: Optional[int] = None,
+                 dimensions: Sequence[str] = BIG_FIVE_DIMENSIONS, fold_size: int = 1024):
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be positive")
+        self.window_seconds = int(window_seconds)
+        self.retention_seconds = retention_seconds
+        self.dimensions = tuple(dimensions)
+        self.windows: Dict[int, Aggregate] = {}
+        self.fold_size = fold_size
+        self._pending: Dict[int, List[Observation]] = {}
+        self._pending_count = 0
+        self.rollup_seconds = (ROLLUP_SECONDS if ROLLUP_SECONDS > self.window_seconds
+                               and ROLLUP_SECONDS % self.window_seconds == 0 else None)
+        self._rollups: Dict[int, Aggregate] = {}
+        # Read-only aggregates that queries include but snapshots leave out (see load_worker)
+        self.history: Optional['PopulationAnalytics'] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        # Picklable for process pools: the lock is recreated on the other side
+        with self._lock:
+            self._fold()
+            return {key: value for key, value in self.__dict__.items() if key != '_lock'}
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _window(self, timestamp: float) -> int:
+        return int(timestamp // self.window_seconds) * self.window_seconds
+
+    def record(self, observations: Sequence[Observation], timestamp: Optional[float] = None):
+        start = self._window(time.time() if timestamp is None else timestamp)
+        with self._lock:
+            self._pending.setdefault(start, []).extend(observations)
+            self._pending_count += len(observations)
+            if self._pending_count >= self.fold_size:
+                self._fold()
+
+    def _fold(self):
+        # Caller holds the lock
+        for start, observations in self._pending.items():
+            self.windows.setdefault(start, Aggregate(self.dimensions)).add(observations)
+            self._invalidate(start)
+        self._pending = {}
+        self._pending_count = 0
+        self._expire()
+
+    def _expire(self):
+        # Caller holds the lock
+        if self.retention_seconds is None or not self.windows:
+            return
+        cutoff = max(self.windows) - self.retention_seconds
+        for start in [start for start in self.windows if start + self.window_seconds <= cutoff]:
+            del self.windows[start]
+            self._invalidate(start)
+
+    def _invalidate(self, start: int):
+        # Caller holds the lock
+        if self.rollup_seconds:
+            self._rollups.pop(start // self.rollup_seconds * self.rollup_seconds, None)
+
+    def _rollup(self, day: int, starts: Sequence[int]) -> Aggregate:
+        # Caller holds the lock; starts are all of the day's windows
+        if day not in self._rollups:
+            self._rollups[day] = Aggregate.combine([self.windows[start] for start in starts], self.dimensions)
+        return self._rollups[day]
+
+    def add_results(self, results: Iterable[Tuple[float, Dict]]) -> int:
+        # results: (timestamp, AssessmentResults dict) pairs, e.g. read back from bulk scoring output
+        added = 0
+        for timestamp, result in results:
+            self.record([observation(result)], timestamp)
+            added += 1
+        return added
+
+    def merge(self, other: 'PopulationAnalytics') -> 'PopulationAnalytics':
+        if other.dimensions != self.dimensions:
+            raise ValueError("Cannot merge analytics over different dimensions")
+        if other.window_seconds % self.window_seconds:
+            raise ValueError(f"Cannot merge {other.window_seconds}s windows into {self.window_seconds}s windows")
+        with other._lock:
+            other._fold()
+        with self._lock:
+            self._fold()
+            for start, aggregate in other.windows.items():
+                # Longer windows merge into the one holding their start
+                mine = self.windows.setdefault(start, Aggregate(self.dimensions))
+                mine.merge(aggregate)
+                self._invalidate(start)
+            self._expire()
+        return self
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              interval: Optional[int] = None) -> Dict:
+        """
+        Summary of the windows starting in [start, end) (all of them by
+        default), and with interval (a multiple of window_seconds) one
+        summary per interval-long segment that has any results.
+        """
+        if interval is not None and (interval <= 0 or interval % self.window_seconds):
+            raise ValueError(f"interval must be a positive multiple of {self.window_seconds} seconds")
+        history = self.history
+        with self._lock:
+            starts, units = self._units(start, end, interval)
+            if history is not None:
+                with history._lock:
+                    history_starts, history_units = history._units(start, end, interval)
+                starts = sorted(set(starts).union(history_starts))
+                units += history_units
+
+            total = Aggregate.combine([aggregate for _, aggregate in units], self.dimensions)
+            grouped: Dict[int, List[Aggregate]] = {}
+            if interval is not None:
+                for unit_start, aggregate in units:
+                    grouped.setdefault(int(unit_start // interval) * interval, []).append(aggregate)
+            if len(grouped) > MAX_SEGMENTS:
+                raise ValueError(f"{len(grouped)} segments requested, at most {MAX_SEGMENTS}: "
+                                 f"narrow the range or lengthen the interval")
+
+            # summary() does not modify an aggregate, so a lone one is used as it is
+            first, last = (starts[0], starts[-1] + self.window_seconds) if starts else (start, end)
+            return {
+                'window_seconds': self.window_seconds,
+                'start': _isoformat(start if start is not None else first),
+                'end': _isoformat(end if end is not None else last),
+                'total': total.summary(),
+                'segments': [
+                    {
+                        'start': _isoformat(segment),
+                        'end': _isoformat(segment + interval),
+                        **(aggregates[0] if len(aggregates) == 1
+                           else Aggregate.combine(aggregates, self.dimensions)).summary()
+                    }
+                    for segment, aggregates in sorted(grouped.items())
+                ]
+            }
+
+    def _units(self, start: Optional[float], end: Optional[float],
+               interval: Optional[int]) -> Tuple[List[int], List[Tuple[int, Aggregate]]]:
+        # Caller holds the lock. The starts of the windows in [start, end), and the
+        # aggregates covering them: whole days from the rollups, unless segments are
+        # shorter than a day, and single windows otherwise
+        self._fold()
+        starts = sorted(window_start for window_start in self.windows
+                        if (start is None or window_start >= start) and (end is None or window_start < end))
+        rollup = self.rollup_seconds
+        if not rollup or (interval is not None and interval % rollup):
+            return starts, [(window_start, self.windows[window_start]) for window_start in starts]
+        units: List[Tuple[int, Aggregate]] = []
+        days: Dict[int, List[int]] = {}
+        for window_start in starts:
+            days.setdefault(window_start // rollup * rollup, []).append(window_start)
+        for day, day_starts in days.items():
+            if (start is None or day >= start) and (end is None or day + rollup <= end):
+                units.append((day, self._rollup(day, day_starts)))
+            else:
+                units.extend((window_start, self.windows[window_start]) for window_start in day_starts)
+        return starts, units
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            self._fold()
+            return {
+                'format': SNAPSHOT_FORMAT,
+                'window_seconds': self.window_seconds,
+                'dimensions': list(self.dimensions),
+                'windows': {str(start): aggregate.to_dict() for start, aggregate in sorted(self.windows.items())}
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict, retention_seconds: Optional[int] = None) -> 'PopulationAnalytics':
+        if data.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Not a population analytics snapshot (expected format '{SNAPSHOT_FORMAT}')")
+        analytics = cls(data['window_seconds'], retention_seconds, data['dimensions'])
+        analytics.windows = {int(start): Aggregate.from_dict(window, analytics.dimensions)
+                             for start, window in data['windows'].items()}
+        return analytics
+
+    def save(self, path: str):
+        # Write to a temporary file and rename, so a crash never leaves a partial snapshot
+        data = self.to_dict()
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            # One dumps call: json.dump writes through the much slower chunked encoder
+            with os.fdopen(handle, 'w') as f:
+                f.write(json.dumps(data))
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    @classmethod
+    def load(cls, path: str, retention_seconds: Optional[int] = None) -> 'PopulationAnalytics':
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Analytics snapshot not found at: {path}")
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f), retention_seconds)
+
+    @classmethod
+    def load_merged(cls, paths: Sequence[str], window_seconds: int,
+                    retention_seconds: Optional[int] = None) -> 'PopulationAnalytics':
+        merged = cls(window_seconds, retention_seconds)
+        for path in paths:
+            merged.merge(cls.load(path))
+        return merged
+
+    @classmethod
+    def load_worker(cls, path: str, window_seconds: int = 3600,
+                    retention_seconds: Optional[int] = None) -> 'PopulationAnalytics':
+        """
+        Aggregates for one of several server processes sharing the snapshot
+        path. Each process saves only what it counted itself, to
+        worker_snapshot_path(path), and continues its own earlier snapshot (a
+        live pid is never shared, so that file's writer has exited). The
+        shared snapshot and the other processes' ones become history, which
+        queries include but save() leaves out, so nothing is counted twice.
+        sync_worker() keeps the history current.
+        """
+        own = worker_snapshot_path(path)
+        with _snapshot_lock(path, exclusive=False):
+            analytics = (cls.load(own, retention_seconds) if os.path.exists(own)
+                         else cls(window_seconds, retention_seconds))
+        analytics.reload_history(path)
+        return analytics
+
+    def reload_history(self, path: str):
+        # The shared snapshot and the other processes' ones, as of now
+        own = worker_snapshot_path(path)
+        with _snapshot_lock(path, exclusive=False):
+            others = [other for other in snapshot_paths(path) if other != own]
+            history = (self.load_merged(others, self.window_seconds, self.retention_seconds)
+                       if others else None)
+        self.history = history
+
+    def sync_worker(self, path: str, stale_seconds: float):
+        """
+        One snapshot tick of a server process: saves its own snapshot, folds
+        the snapshots of processes that have exited into the shared one, and
+        reloads the history, so every process serves the same totals up to
+        its siblings' last tick.
+        """
+        self.save(worker_snapshot_path(path))
+        fold_exited_workers(path, stale_seconds, self.window_seconds)
+        self.reload_history(path)
+
+
+def worker_snapshot_path(path: str) -> str:
+    # Where this process saves its own aggregates: the shared path suffixed with the pid
+    return f"{path}.{os.getpid()}"
+
+
+@contextmanager
+def _snapshot_lock(path: str, exclusive: bool) -> Iterator[None]:
+    # Readers of the snapshot files share the lock; folding holds it alone, since it deletes files
+    if fcntl is None or not os.path.isdir(os.path.dirname(os.path.abspath(path))):
+        yield
+        return
+    with open(f"{path}.lock", 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _exited(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        # e.g. another user's process
+        return False
+    return False
+
+
+def fold_exited_workers(path: str, stale_seconds: float, window_seconds: int = 3600) -> List[str]:
+    """
+    Merges the worker snapshots next to path whose process has exited into
+    the shared snapshot at path, and deletes them. A snapshot only counts as
+    exited once it is also older than stale_seconds: live processes rewrite
+    theirs every tick, and a pid can look dead from another container
+    sharing the directory. Returns the folded paths.
+    """
+    if fcntl is None:
+        return []
+    with _snapshot_lock(path, exclusive=True):
+        now = time.time()
+        exited = []
+        for worker_path in [other for other in snapshot_paths(path) if other != path]:
+            pid = int(worker_path.rsplit('.', 1)[1])
+            if pid != os.getpid() and _exited(pid) and now - os.path.getmtime(worker_path) > stale_seconds:
+                exited.append(worker_path)
+        if not exited:
+            return []
+        shared = (PopulationAnalytics.load(path) if os.path.exists(path)
+                  else PopulationAnalytics(window_seconds))
+        for worker_path in exited:
+            shared.merge(PopulationAnalytics.load(worker_path))
+        shared.save(path)
+        for worker_path in exited:
+            os.remove(worker_path)
+        return exited
+
+
+def snapshot_paths(path: str) -> List[str]:
+    """The snapshot at path, if there is one, and every worker snapshot saved next to it."""
+    directory, name = os.path.split(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        return []
+    prefix = name + '.'
+    workers = sorted((entry for entry in os.listdir(directory) if entry.startswith(prefix)
+                      and entry[len(prefix):].isdigit()), key=lambda entry: int(entry[len(prefix):]))
+    return ([path] if os.path.exists(path) else []) + [os.path.join(directory, entry) for entry in workers]
+
+
+def parse_timestamp(value: Union[str, int, float, datetime]) -> float:
+    """Epoch seconds from epoch seconds or an ISO 8601 string; naive times are UTC."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, datetime):
+        try:
+            return float(value)
+        except ValueError:
+            value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _moments(count: float, total: float, squares: float) -> Dict:
+    if count == 0:
+        return {'count': 0, 'mean': None, 'std_dev': None}
+    mean = total / count
+    variance = (squares - count * mean ** 2) / (count - 1) if count > 1 else 0.0
+    return {'count': int(count), 'mean': round(mean, 2), 'std_dev': round(math.sqrt(max(variance, 0.0)), 2)}
+
+
+def _percentiles(histograms: np.ndarray, high: float) -> List[Dict[str, Optional[float]]]:
+    # Per histogram row, interpolated within the bin that reaches each percentile
+    n_bins = histograms.shape[1]
+    totals = histograms.sum(axis=1)
+    cumulative = np.cumsum(histograms, axis=1)
+    targets = totals[:, np.newaxis] * (np.array(SUMMARY_PERCENTILES) / 100)
+    bins = np.minimum((cumulative[:, :, np.newaxis] < targets[:, np.newaxis, :]).sum(axis=1), n_bins - 1)
+    rows = np.arange(len(histograms))[:, np.newaxis]
+    below = np.where(bins > 0, cumulative[rows, bins - 1], 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = (bins + (targets - below) / histograms[rows, bins]) * (high / n_bins)
+    return [
+        {str(p): round(float(value), 1) if total else None for p, value in zip(SUMMARY_PERCENTILES, row)}
+        for row, total in zip(values.tolist(), totals.tolist())
+    ]
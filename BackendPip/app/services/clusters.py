@@ -0,0 +1,212 @@
+import json
+import math
+import os
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.scoring_plan import BIG_FIVE_DIMENSIONS
+
+# Hand-set profiles (in BIG_FIVE_DIMENSIONS order) used as the untrained
+# model and to name trained components
+CLUSTER_PROTOTYPES = {
+    'Resilient': [65, 60, 65, 35, 60],
+    'Overcontrolled': [35, 50, 55, 70, 45],
+    'Undercontrolled': [55, 35, 35, 60, 55],
+    'Average': [50, 50, 50, 50, 50]
+}
+
+
+def default_cluster_model_path() -> str:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(current_dir, '../../norms/cluster_model.json')
+
+
+def load_cluster_model(path: Optional[str] = None) -> Dict:
+    path = path or default_cluster_model_path()
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Cluster model file not found at: {path}")
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def prototype_cluster_model(std_dev: float = 15.0, version: str = 'prototypes-1') -> Dict:
+    """
+    An equally weighted, isotropic mixture centred on CLUSTER_PROTOTYPES.
+    Its most probable cluster is the nearest prototype. Models trained by
+    app.cli.train_clusters replace it.
+    """
+    precision = (np.eye(len(BIG_FIVE_DIMENSIONS)) / std_dev ** 2).tolist()
+    return {
+        'version': version,
+        'model': 'gaussian_mixture',
+        'dimensions': list(BIG_FIVE_DIMENSIONS),
+        'source': 'hand-set prototypes',
+        'clusters': [
+            {'name': name, 'weight': round(1 / len(CLUSTER_PROTOTYPES), 6), 'mean': profile, 'precision': precision}
+            for name, profile in CLUSTER_PROTOTYPES.items()
+        ]
+    }
+
+
+def name_components(means: np.ndarray) -> List[str]:
+    # One prototype name per component, matched by least total distance;
+    # components beyond the prototypes are numbered
+    from scipy.optimize import linear_sum_assignment
+
+    names = list(CLUSTER_PROTOTYPES)
+    profiles = np.array([CLUSTER_PROTOTYPES[name] for name in names], dtype=np.float64)
+    distances = np.sqrt(((means[:, np.newaxis, :] - profiles) ** 2).sum(axis=2))
+    component_names = [f"Cluster {k + 1}" for k in range(len(means))]
+    for component, prototype in zip(*linear_sum_assignment(distances)):
+        component_names[component] = names[prototype]
+    return component_names
+
+
+def train_cluster_model(scores: np.ndarray, n_components: Sequence[int] = (4,), covariance_type: str = 'full',
+                        n_init: int = 3, max_iter: int = 500, random_state: int = 0,
+                        version: Optional[str] = None) -> Dict:
+    """
+    Fits a Gaussian mixture to standardized (N, 5) Big Five scores, keeping
+    the component count with the lowest BIC, and returns a cluster model dict
+    ready to be written out. The scaler is folded back into the means and
+    precisions, so serving works on raw 0-100 scores.
+    """
+    # Only the offline trainer needs scikit-learn
+    from sklearn.mixture import GaussianMixture
+    from sklearn.preprocessing import StandardScaler
+
+    scores = np.asarray(scores, dtype=np.float64)
+    scores = scores[~np.isnan(scores).any(axis=1)]
+    if len(scores) < max(n_components):
+        raise ValueError(f"Need at least {max(n_components)} complete score rows, got {len(scores)}")
+
+    scaler = StandardScaler().fit(scores)
+    standardized = scaler.transform(scores)
+
+    best, best_bic = None, math.inf
+    for k in n_components:
+        mixture = GaussianMixture(n_components=k, covariance_type=covariance_type, n_init=n_init,
+                                  max_iter=max_iter, random_state=random_state).fit(standardized)
+        bic = mixture.bic(standardized)
+        if bic < best_bic:
+            best, best_bic = mixture, bic
+
+    # x = mean + scale * z, so precision_x = precision_z / (scale scale^T)
+    n_dimensions = scores.shape[1]
+    precisions = best.precisions_
+    if covariance_type == 'diag':
+        precisions = np.array([np.diag(p) for p in precisions])
+    elif covariance_type == 'spherical':
+        precisions = np.array([np.eye(n_dimensions) * p for p in precisions])
+    elif covariance_type == 'tied':
+        precisions = np.repeat(precisions[np.newaxis], best.n_components, axis=0)
+    means = scaler.mean_ + best.means_ * scaler.scale_
+    precisions = precisions / np.outer(scaler.scale_, scaler.scale_)
+
+    # Prototype-named components come first, in CLUSTER_PROTOTYPES order, so
+    # primary_cluster indexes the same archetype as with the prototype model;
+    # any further components follow by weight
+    names = name_components(means)
+    rank = {name: i for i, name in enumerate(CLUSTER_PROTOTYPES)}
+    order = sorted(range(best.n_components), key=lambda k: (rank.get(names[k], len(rank)), -best.weights_[k]))
+    return {
+        'version': version or f"trained-{date.today().strftime('%Y%m%d')}",
+        'model': 'gaussian_mixture',
+        'dimensions': list(BIG_FIVE_DIMENSIONS),
+        'source': 'Gaussian mixture fitted to historical scores',
+        'training': {
+            'respondents': len(scores),
+            'components': int(best.n_components),
+            'covariance_type': covariance_type,
+            'converged': bool(best.converged_),
+            'bic': round(float(best_bic), 3),
+            'mean_log_likelihood': round(float(best.score(standardized) - np.log(scaler.scale_).sum()), 6)
+        },
+        'clusters': [
+            {
+                'name': names[k],
+                'weight': round(float(best.weights_[k]), 6),
+                'mean': [round(float(value), 4) for value in means[k]],
+                'precision': precisions[k].tolist()
+            }
+            for k in order
+        ]
+    }
+
+
+class GaussianMixtureClassifier:
+    """
+    Posterior cluster probabilities from a saved Gaussian mixture.
+
+    Each component's precision matrix is factored once as L L^T, so its log
+    density at x is a constant minus half of |(x - mean) L|^2. All components
+    are stacked into one (dimensions, components * dimensions) matrix, so a
+    batch is one broadcast multiply-and-sum over the five dimensions. Like
+    GradedResponseModel, every reduction runs per row, so a batch row is
+    bit-identical to the same scores classified alone.
+    """
+
+    def __init__(self, parameters: Dict, dimensions: Sequence[str] = BIG_FIVE_DIMENSIONS):
+        self.version = parameters.get('version', '')
+        self.dimensions = tuple(dimensions)
+        clusters = parameters.get('clusters') or []
+        if not clusters:
+            raise ValueError("Cluster model has no clusters")
+
+        model_dimensions = parameters.get('dimensions', list(BIG_FIVE_DIMENSIONS))
+        missing = [d for d in self.dimensions if d not in model_dimensions]
+        if missing:
+            raise ValueError(f"Cluster model has no {', '.join(missing)} dimension")
+        columns = [model_dimensions.index(d) for d in self.dimensions]
+
+        self.names = [cluster.get('name') or f"Cluster {k + 1}" for k, cluster in enumerate(clusters)]
+        means = np.array([cluster['mean'] for cluster in clusters], dtype=np.float64)[:, columns]
+        precisions = np.array([cluster['precision'] for cluster in clusters], dtype=np.float64)
+        precisions = precisions[:, columns][:, :, columns]
+        weights = np.array([cluster['weight'] for cluster in clusters], dtype=np.float64)
+
+        n_clusters, n_dimensions = means.shape
+        factors = np.empty_like(precisions)
+        for k in range(n_clusters):
+            try:
+                factors[k] = np.linalg.cholesky(precisions[k])
+            except np.linalg.LinAlgError:
+                raise ValueError(f"Precision of cluster '{self.names[k]}' is not positive definite")
+
+        self.n_clusters = n_clusters
+        self.means = means
+        self.weights = weights / weights.sum()
+        self.precisions = precisions
+        # x @ projection[:, k*D:(k+1)*D] == x @ L_k; offset holds mean_k @ L_k
+        self.projection = factors.transpose(1, 0, 2).reshape(n_dimensions, n_clusters * n_dimensions)
+        self.offset = np.einsum('kd,kde->ke', means, factors).ravel()
+        self.log_constant = (np.log(weights / weights.sum())
+                             + np.log(np.diagonal(factors, axis1=1, axis2=2)).sum(axis=1)
+                             - 0.5 * n_dimensions * np.log(2 * np.pi))
+
+    def log_joint(self, scores: np.ndarray) -> np.ndarray:
+        # log(weight_k * N(x | mean_k, precision_k^-1)), shape (N, clusters)
+        projected = (scores[:, :, np.newaxis] * self.projection).sum(axis=1) - self.offset
+        squared = (projected ** 2).reshape(len(scores), self.n_clusters, -1).sum(axis=2)
+        return self.log_constant - 0.5 * squared
+
+    def predict_proba(self, scores: np.ndarray) -> np.ndarray:
+        log_joint = self.log_joint(np.asarray(scores, dtype=np.float64))
+        log_joint -= log_joint.max(axis=1, keepdims=True)
+        joint = np.exp(log_joint)
+        return joint / joint.sum(axis=1, keepdims=True)
+
+    def classify(self, scores: np.ndarray) -> List[Dict]:
+        probabilities = self.predict_proba(scores)
+        primary_clusters = probabilities.argmax(axis=1)
+        return [
+            {
+                'primary_cluster': int(primary),
+                'cluster_probabilities': row,
+                'cluster_description': self.names[primary]
+            }
+            for primary, row in zip(primary_clusters.tolist(), probabilities.tolist())
+        ]
@@ -0,0 +1,230 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.assessment import AssessmentResults, BatchScoreResponse, QuestionResponse
+from app.services.analytics import Observation, PopulationAnalytics, observation
+from app.services.metrics import NULL_TIMER, StageTimer
+from app.services.pipeline import AssessmentPipeline
+from app.utils.fast_json import ResponseEncoder
+
+BACKENDS = ('inline', 'thread', 'process')
+
+# (question_id, response_value, selected_option), cheaper to send to a process than the models
+Record = Tuple[str, Optional[int], Optional[str]]
+
+
+class ExecutorSaturated(RuntimeError):
+    pass
+
+
+def _records(responses: List[QuestionResponse]) -> List[Record]:
+    return [(r.question_id, r.response_value, r.selected_option) for r in responses]
+
+
+RESULTS_ENCODER = ResponseEncoder(AssessmentResults)
+BATCH_ENCODER = ResponseEncoder(BatchScoreResponse)
+
+# Scoring functions return the serialized response: JSON is also the cheapest
+# form to send back from a worker process, and the event loop never serializes.
+# Single submissions also return their analytics observation, a small tuple
+
+def _score_records(pipeline: AssessmentPipeline, records: List[Record], norm_group: Optional[str],
+                   fast_json: bool, timer=NULL_TIMER) -> Tuple[bytes, Observation]:
+    x = pipeline.scoring_service.plan.encode_records(records)
+    timer.lap('encode')
+    return _score_vector(pipeline, x, norm_group, fast_json, timer)
+
+
+def _score_vector(pipeline: AssessmentPipeline, x: np.ndarray, norm_group: Optional[str], fast_json: bool,
+                  timer=NULL_TIMER) -> Tuple[bytes, Observation]:
+    results = pipeline.score_matrix(x[np.newaxis, :], [norm_group], timer)[0]
+    content = RESULTS_ENCODER.encode(results, fast_json)
+    timer.lap('serialize')
+    return content, observation(results)
+
+
+def _score_record_batch(pipeline: AssessmentPipeline, submissions: List[List[Record]],
+                        norm_groups: Sequence[Optional[str]], fast_json: bool, timer=NULL_TIMER) -> bytes:
+    plan = pipeline.scoring_service.plan
+    X = np.full((len(submissions), plan.n_items), np.nan)
+    for row, records in enumerate(submissions):
+        X[row] = plan.encode_records(records)
+    timer.lap('encode')
+    return _score_matrix(pipeline, X, [len(records) for records in submissions], norm_groups, fast_json, timer)
+
+
+def _score_matrix(pipeline: AssessmentPipeline, X: np.ndarray, response_counts: Sequence[int],
+                  norm_groups: Sequence[Optional[str]], fast_json: bool, timer=NULL_TIMER) -> bytes:
+    outcomes = pipeline.score_encoded_batch(X, response_counts, norm_groups, timer)
+    failed = sum(1 for outcome in outcomes if outcome['error'])
+    content = BATCH_ENCODER.encode({'results': outcomes, 'scored': len(outcomes) - failed, 'failed': failed},
+                                   fast_json)
+    timer.lap('serialize')
+    return content
+
+
+def _score_statistics(pipeline: AssessmentPipeline, statistics: Dict, norm_groups: Sequence[Optional[str]],
+                      timer=NULL_TIMER) -> List[Dict]:
+    return pipeline.score_statistics(statistics, norm_groups, timer)
+
+
+def _warm_up(pipeline: AssessmentPipeline, fast_json: bool, timer=NULL_TIMER):
+    # Scores one midpoint submission through both request paths, which compiles the
+    # scoring plan, IRT grid, quality model, default norm table and the encoders
+    plan = pipeline.scoring_service.plan
+    x = np.full(plan.n_items, 4.0)
+    x[plan.forced_choice_idx] = 1.0
+    _score_vector(pipeline, x, None, fast_json)
+    _score_matrix(pipeline, x[np.newaxis, :], [plan.n_items], [None], fast_json)
+
+
+# Each process pool worker builds its pipeline once; the question bank, norm
+# tables and IRT grid are then compiled on its first request and reused
+_worker_pipeline: Optional[AssessmentPipeline] = None
+
+
+def _init_worker():
+    global _worker_pipeline
+    _worker_pipeline = AssessmentPipeline()
+
+
+def _run_in_worker(function: Callable, args: tuple, timed: bool) -> Tuple[object, Dict[str, float]]:
+    timer = StageTimer() if timed else NULL_TIMER
+    result = function(_worker_pipeline, *args, timer=timer)
+    return result, (timer.durations if timed else {})
+
+
+class ScoringExecutor:
+    """
+    Runs the CPU-bound scoring off the event loop, so one slow submission
+    does not stall every other request on the worker. The backend is
+    'inline' (on the event loop, as before), 'thread' (a thread pool sharing
+    the process's pipeline) or 'process' (a pool of processes, each with its
+    own pipeline). At most max_pending calls are queued or running; beyond
+    that run() raises ExecutorSaturated instead of queueing without bound.
+    fast_json serializes results with ResponseEncoder's fast path. Single
+    submissions scored here are counted in analytics, when given; batches
+    are not, as they mostly re-score people already counted.
+    """
+
+    def __init__(self, pipeline: AssessmentPipeline, backend: str = 'thread', workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, fast_json: bool = False,
+                 analytics: Optional[PopulationAnalytics] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown scoring backend '{backend}', expected one of: {', '.join(BACKENDS)}")
+        self.pipeline = pipeline
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 16
+        self.fast_json = fast_json
+        self.analytics = analytics
+        self.pending = 0
+        self.rejected = 0
+        self.ready = False
+        self.warmup_seconds: Optional[float] = None
+        self.warmup_error: Optional[str] = None
+        self._pool: Optional[Executor] = None
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            if self.backend == 'thread':
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='scoring')
+            else:
+                # spawn rather than fork: the server process already runs threads
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_worker)
+        return self._pool
+
+    async def run(self, function: Callable, *args, timer=NULL_TIMER):
+        # Called from the event loop only, so the pending count needs no lock
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturated(f"Scoring queue is full ({self.max_pending} pending)")
+        self.pending += 1
+        try:
+            if self.backend == 'inline':
+                return function(self.pipeline, *args, timer=timer)
+            loop = asyncio.get_running_loop()
+            if self.backend == 'thread':
+                return await loop.run_in_executor(self._executor(), self._run_in_thread, function, args, timer)
+            result, durations = await loop.run_in_executor(self._executor(), _run_in_worker, function, args,
+                                                           timer is not NULL_TIMER)
+            # Stages ran in the worker; the rest of the wait was queueing and pickling
+            timer.absorb(durations, 'queue')
+            return result
+        finally:
+            self.pending -= 1
+
+    def _run_in_thread(self, function: Callable, args: tuple, timer):
+        timer.lap('queue')
+        return function(self.pipeline, *args, timer=timer)
+
+    async def warm_up(self):
+        """
+        Compiles everything the first request would otherwise pay for, and
+        starts the worker processes, then sets ready. Runs off the event loop
+        for every backend, so the server answers meanwhile.
+        """
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            # The server process's own pipeline also scores sessions, whatever the backend;
+            # None runs it on the event loop's default thread pool
+            pool = self._executor() if self.backend == 'thread' else None
+            await loop.run_in_executor(pool, _warm_up, self.pipeline, self.fast_json)
+            if self.backend == 'process':
+                # One call per worker makes the pool start all of them; each warms the pipeline it runs on
+                await asyncio.gather(*(loop.run_in_executor(self._executor(), _run_in_worker, _warm_up,
+                                                            (self.fast_json,), False)
+                                       for _ in range(self.workers)))
+        except Exception as e:
+            self.warmup_error = f"{type(e).__name__}: {e}"
+            return
+        self.warmup_seconds = time.perf_counter() - start
+        self.ready = True
+
+    async def score_responses(self, responses: List[QuestionResponse], norm_group: Optional[str] = None,
+                              timer=NULL_TIMER) -> bytes:
+        content, observed = await self.run(_score_records, _records(responses), norm_group, self.fast_json,
+                                           timer=timer)
+        self._observe(observed)
+        return content
+
+    async def score_batch(self, submissions: Sequence[List[QuestionResponse]],
+                          norm_groups: Sequence[Optional[str]], timer=NULL_TIMER) -> bytes:
+        return await self.run(_score_record_batch, [_records(responses) for responses in submissions],
+                              list(norm_groups), self.fast_json, timer=timer)
+
+    async def score_vector(self, x: np.ndarray, norm_group: Optional[str] = None, timer=NULL_TIMER) -> bytes:
+        # An already encoded response vector, e.g. from a binary request body
+        content, observed = await self.run(_score_vector, x, norm_group, self.fast_json, timer=timer)
+        self._observe(observed)
+        return content
+
+    def _observe(self, observed: Observation):
+        if self.analytics is not None:
+            self.analytics.record([observed])
+
+    async def score_matrix(self, X: np.ndarray, response_counts: Sequence[int],
+                           norm_groups: Sequence[Optional[str]], timer=NULL_TIMER) -> bytes:
+        return await self.run(_score_matrix, X, list(response_counts), list(norm_groups), self.fast_json,
+                              timer=timer)
+
+    async def score_statistics(self, statistics: Dict, norm_groups: Sequence[Optional[str]],
+                               timer=NULL_TIMER) -> List[Dict]:
+        return await self.run(_score_statistics, statistics, list(norm_groups), timer=timer)
+
+    def stats(self) -> Dict:
+        return {'backend': self.backend, 'workers': self.workers, 'pending': self.pending,
+                'max_pending': self.max_pending, 'rejected': self.rejected, 'ready': self.ready}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
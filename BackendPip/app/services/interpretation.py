@@ -1,7 +1,138 @@
-from typing import Dict, List
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Narrative bands of each Big Five score: (cutoffs it can fall below, cutoffs it can exceed).
+# The band is the number of upper cutoffs exceeded minus the number of lower cutoffs undercut,
+# so every threshold in the text below is a band comparison
+TRAIT_CUTOFFS = {
+    'Openness': ((35, 40), (55, 70)),
+    'Conscientiousness': ((35, 40), (65, 70)),
+    'Extraversion': ((35, 40), (65, 70)),
+    'Agreeableness': ((35, 40), (65, 70)),
+    'Neuroticism': ((35,), (65,))
+}
+SHADOW_CUTOFFS = ((0.5,), (0.5, 0.7))
+
+# Trait highlights in narrative order: trait -> {band: insight}
+TRAIT_INSIGHTS = (
+    ('Extraversion', {
+        2: "highly extraverted nature energizes you in social situations",
+        1: "highly extraverted nature energizes you in social situations",
+        -2: "introverted tendencies give you depth in reflection and focused work"
+    }),
+    ('Openness', {
+        2: "exceptional openness drives your creativity and intellectual curiosity",
+        1: "above-average openness supports your innovative thinking"
+    }),
+    ('Conscientiousness', {
+        2: "strong conscientiousness ensures reliability and achievement",
+        1: "strong conscientiousness ensures reliability and achievement",
+        -2: "flexible approach allows for spontaneity and adaptability"
+    }),
+    ('Agreeableness', {
+        2: "high agreeableness fosters harmony and cooperation",
+        1: "high agreeableness fosters harmony and cooperation",
+        -2: "analytical nature prioritizes truth over harmony"
+    }),
+    ('Neuroticism', {
+        -1: "emotional stability provides resilience under pressure",
+        1: "emotional sensitivity offers deep awareness and empathy"
+    })
+)
+
+SHADOW_INSIGHTS = {
+    2: ("\nYour high shadow integration score indicates advanced self-awareness "
+        "and acceptance of your complete personality, including aspects you may "
+        "have previously rejected."),
+    1: ("\nYou show moderate shadow integration, suggesting growing awareness "
+        "of your unconscious patterns and projections.")
+}
+
+CLUSTER_MEANINGS = {
+    'Resilient': 'strong adaptation across multiple life domains with high functionality',
+    'Overcontrolled': 'careful, cautious approach with heightened emotional sensitivity',
+    'Undercontrolled': 'spontaneous, flexible style with preference for immediate experience',
+    'Average': 'balanced traits without extreme tendencies in any direction'
+}
+
+# Suggestion for the lowest trait when it falls in the bottom band
+LOWEST_TRAIT_SUGGESTIONS = {
+    'Extraversion': "Practice initiating social connections in comfortable settings to expand your interpersonal comfort zone",
+    'Agreeableness': "Develop empathy through active listening exercises and considering others' perspectives before responding",
+    'Conscientiousness': "Implement simple organizational systems and time-blocking to enhance productivity without losing flexibility",
+    'Openness': "Explore new experiences in small doses - try a new cuisine, read outside your usual genres, or learn a new skill"
+}
+
+# Type-specific growth edges: (letter position, trait, {letter: (trait bands, suggestion)})
+TYPE_SUGGESTIONS = (
+    (0, 'Extraversion', {
+        'I': ((-2, -1), "Balance introspection with external engagement through structured social activities"),
+        'E': ((2,), "Cultivate reflective practices like meditation or journaling to deepen self-awareness")
+    }),
+    (1, 'Openness', {
+        'N': ((2,), "Ground innovative ideas with practical implementation steps and concrete details"),
+        'S': ((-2, -1), "Stretch your comfort zone by exploring abstract concepts and future possibilities")
+    }),
+    (2, 'Agreeableness', {
+        'T': ((-2, -1), "Practice expressing appreciation and considering emotional impacts in decision-making"),
+        'F': ((2,), "Develop objective analysis skills and practice setting healthy boundaries")
+    }),
+    (3, 'Conscientiousness', {
+        'J': ((2,), "Build flexibility by intentionally leaving some plans open-ended and embracing spontaneity"),
+        'P': ((-2, -1), "Create loose structures and routines that support your goals while maintaining adaptability")
+    })
+)
+
+STAGE_SUGGESTIONS = {
+    'Early Development': "Begin exploring your authentic self through values clarification exercises",
+    'Emerging Awareness': "Deepen self-knowledge through therapy, coaching, or structured self-reflection",
+    'Active Integration': "Continue integrating disparate aspects of self through creative expression and meaningful relationships"
+}
+
+GENERIC_SUGGESTIONS = (
+    "Practice mindfulness to increase present-moment awareness and emotional regulation",
+    "Seek feedback from trusted others to gain perspective on blind spots",
+    "Engage in activities that challenge your comfort zone in manageable ways",
+    "Develop a growth mindset by viewing challenges as opportunities for development",
+    "Create a personal development plan with specific, measurable goals"
+)
+
+# Inferior functions developed below this level get a suggestion
+INFERIOR_LEVEL = 0.3
+
+
+def _band(value: float, cutoffs: Tuple[Tuple[float, ...], Tuple[float, ...]]) -> int:
+    below, above = cutoffs
+    band = 0
+    for cutoff in above:
+        if value > cutoff:
+            band += 1
+    for cutoff in below:
+        if value < cutoff:
+            band -= 1
+    return band
+
+
+# What the narrative needs from the Big Five scores: ((trait, band), ...), the
+# highest trait, and the lowest trait counted from the end and from the start
+# (the summary and the suggestions break ties differently)
+Profile = Tuple[Tuple[Tuple[str, int], ...], str, str, str]
+
 
 class InterpretationService:
-    def __init__(self):
+    """
+    Every threshold in the narrative is a lookup on a band (see the tables
+    above), and each part of the text is memoized on the few bands, names
+    and type letters it depends on. A request looks the parts up and formats
+    only the numbers it quotes. The score bands come from profiles(), which
+    batches compute for all rows at once; without one they are computed
+    from the results.
+    """
+
+    def __init__(self, cache_size: int = 1024):
         self.type_descriptions = {
             'INTJ': 'Architect - Independent, strategic, and driven by competence',
             'INTP': 'Thinker - Analytical, innovative, and intellectually curious',
@@ -20,200 +151,156 @@ class InterpretationService:
             'ESTP': 'Entrepreneur - Energetic, perceptive, and live in the moment',
             'ESFP': 'Entertainer - Spontaneous, enthusiastic, and love life'
         }
+        memoize = lru_cache(maxsize=cache_size)
+        self._score_profile = memoize(self._compile_profile)
+        self._opening = memoize(self._compile_opening)
+        self._trait_sentence = memoize(self._compile_trait_sentence)
+        self._cluster_sentence = memoize(self._compile_cluster_sentence)
+        self._archetype_sentence = memoize(self._compile_archetype_sentence)
+        self._summary_sentence = memoize(self._compile_summary_sentence)
+        self._type_suggestions = memoize(self._compile_type_suggestions)
+
+    def profiles(self, scores: np.ndarray, dimensions: Sequence[str]) -> List[Profile]:
+        """The Profile of each row of an (N, len(dimensions)) score matrix."""
+        bands = np.zeros(scores.shape, dtype=np.intp)
+        for j, dimension in enumerate(dimensions):
+            below, above = TRAIT_CUTOFFS.get(dimension, ((), ()))
+            for cutoff in above:
+                bands[:, j] += scores[:, j] > cutoff
+            for cutoff in below:
+                bands[:, j] -= scores[:, j] < cutoff
+        highest = scores.argmax(axis=1)
+        lowest = scores.shape[1] - 1 - scores[:, ::-1].argmin(axis=1)
+        lowest_first = scores.argmin(axis=1)
+        return [(tuple(zip(dimensions, row_bands)), dimensions[h], dimensions[l], dimensions[f])
+                for row_bands, h, l, f in zip(bands.tolist(), highest.tolist(), lowest.tolist(),
+                                              lowest_first.tolist())]
+
+    def _profile(self, big_five: Dict[str, float]) -> Profile:
+        # Memoized on the scores, so the interpretation and suggestions of one result share it
+        return self._score_profile(tuple(big_five.items()))
 
-    def generate_integrated_interpretation(self, results: Dict) -> str:
-        big_five = results['big_five']['scores']
+    def _compile_profile(self, scores: Tuple[Tuple[str, float], ...]) -> Profile:
+        items = [(trait, float(score)) for trait, score in scores]
+        trait_bands = tuple((trait, _band(score, TRAIT_CUTOFFS.get(trait, ((), ())))) for trait, score in items)
+        # max and min keep the first of equal scores
+        return (trait_bands, max(items, key=itemgetter(1))[0], min(reversed(items), key=itemgetter(1))[0],
+                min(items, key=itemgetter(1))[0])
+
+    def generate_integrated_interpretation(self, results: Dict, profile: Optional[Profile] = None) -> str:
         mbti = results['mbti']
         functions = results['cognitive_functions']
-        cluster = results['personality_cluster']
         depth = results['jungian_depth']
-        
-        interpretation = []
-        
-        # Opening with MBTI type
-        type_desc = self.type_descriptions.get(mbti['primary_type'], 'Unique personality type')
-        interpretation.append(f"Your personality profile indicates {mbti['primary_type']} preferences - {type_desc}. "
-                            f"This classification shows {mbti['probability']*100:.1f}% confidence.")
-        
-        # Big Five trait highlights
-        trait_insights = []
-        
-        # Extraversion
-        e_score = big_five['Extraversion']
-        if e_score > 65:
-            trait_insights.append("highly extraverted nature energizes you in social situations")
-        elif e_score < 35:
-            trait_insights.append("introverted tendencies give you depth in reflection and focused work")
-        
-        # Openness
-        o_score = big_five['Openness']
-        if o_score > 70:
-            trait_insights.append("exceptional openness drives your creativity and intellectual curiosity")
-        elif o_score > 55:
-            trait_insights.append("above-average openness supports your innovative thinking")
-        
-        # Conscientiousness
-        c_score = big_five['Conscientiousness']
-        if c_score > 65:
-            trait_insights.append("strong conscientiousness ensures reliability and achievement")
-        elif c_score < 35:
-            trait_insights.append("flexible approach allows for spontaneity and adaptability")
-        
-        # Agreeableness
-        a_score = big_five['Agreeableness']
-        if a_score > 65:
-            trait_insights.append("high agreeableness fosters harmony and cooperation")
-        elif a_score < 35:
-            trait_insights.append("analytical nature prioritizes truth over harmony")
-        
-        # Neuroticism
-        n_score = big_five['Neuroticism']
-        if n_score < 35:
-            trait_insights.append("emotional stability provides resilience under pressure")
-        elif n_score > 65:
-            trait_insights.append("emotional sensitivity offers deep awareness and empathy")
-        
-        if trait_insights:
-            interpretation.append(f"\nYour {', '.join(trait_insights[:2])}. "
-                                f"{'Additionally, your ' + trait_insights[2] if len(trait_insights) > 2 else ''}")
-        
-        # Cognitive functions
+        mbti_type = mbti['primary_type']
+        trait_bands, highest, lowest, _ = profile or self._profile(results['big_five']['scores'])
+
+        interpretation = [self._opening(mbti_type).format(mbti['probability'] * 100)]
+
+        trait_sentence = self._trait_sentence(trait_bands)
+        if trait_sentence:
+            interpretation.append(trait_sentence)
+
         if functions['primary_stack']:
             dominant = functions['primary_stack'][0]
             auxiliary = functions['primary_stack'][1]
             dom_level = functions['development_levels'].get(dominant, 0)
             aux_level = functions['development_levels'].get(auxiliary, 0)
-            
+
             interpretation.append(f"\nYour cognitive function stack reveals {dominant} as your dominant function "
-                                f"(developed to {dom_level*100:.0f}%), supported by {auxiliary} "
-                                f"({aux_level*100:.0f}% developed). This combination creates a unique lens "
-                                f"through which you perceive and interact with the world.")
-        
-        # Cluster insight
-        cluster_desc = cluster.get('cluster_description', 'unique')
-        interpretation.append(f"\nYour overall personality pattern aligns with the '{cluster_desc}' cluster, "
-                            f"suggesting {self._get_cluster_meaning(cluster_desc)}.")
-        
-        # Depth psychology insights
-        if depth['shadow_integration'] > 0.7:
-            interpretation.append("\nYour high shadow integration score indicates advanced self-awareness "
-                                "and acceptance of your complete personality, including aspects you may "
-                                "have previously rejected.")
-        elif depth['shadow_integration'] > 0.5:
-            interpretation.append("\nYou show moderate shadow integration, suggesting growing awareness "
-                                "of your unconscious patterns and projections.")
-        
+                                  f"(developed to {dom_level*100:.0f}%), supported by {auxiliary} "
+                                  f"({aux_level*100:.0f}% developed). This combination creates a unique lens "
+                                  f"through which you perceive and interact with the world.")
+
+        interpretation.append(self._cluster_sentence(
+            results['personality_cluster'].get('cluster_description', 'unique')))
+
+        shadow_band = _band(float(depth['shadow_integration']), SHADOW_CUTOFFS)
+        if shadow_band in SHADOW_INSIGHTS:
+            interpretation.append(SHADOW_INSIGHTS[shadow_band])
+
         if depth.get('primary_archetype'):
-            interpretation.append(f"\nYour primary archetype appears to be the {depth['primary_archetype']}, "
-                                f"which influences your life narrative and core motivations.")
-        
-        # Integration summary
-        interpretation.append("\n\nThis integrated profile reveals a complex individual who combines "
-                            f"{self._get_integration_summary(big_five, mbti['primary_type'])}. "
-                            "Remember that personality is dynamic and continues to develop throughout life.")
-        
+            interpretation.append(self._archetype_sentence(depth['primary_archetype']))
+
+        interpretation.append(self._summary_sentence(mbti_type, highest, lowest))
+
         return ' '.join(interpretation)
 
+    def _compile_opening(self, mbti_type: str) -> str:
+        # A str.format template for the type's probability in percent
+        type_desc = self.type_descriptions.get(mbti_type, 'Unique personality type')
+        opening = f"Your personality profile indicates {mbti_type} preferences - {type_desc}. "
+        return opening.replace('{', '{{').replace('}', '}}') + "This classification shows {:.1f}% confidence."
+
+    def _compile_trait_sentence(self, trait_bands: Tuple[Tuple[str, int], ...]) -> Optional[str]:
+        bands = dict(trait_bands)
+        trait_insights = [insights[bands[trait]] for trait, insights in TRAIT_INSIGHTS
+                          if bands.get(trait) in insights]
+        if not trait_insights:
+            return None
+        return (f"\nYour {', '.join(trait_insights[:2])}. "
+                f"{'Additionally, your ' + trait_insights[2] if len(trait_insights) > 2 else ''}")
+
+    def _compile_cluster_sentence(self, cluster_desc: str) -> str:
+        return (f"\nYour overall personality pattern aligns with the '{cluster_desc}' cluster, "
+                f"suggesting {self._get_cluster_meaning(cluster_desc)}.")
+
+    def _compile_archetype_sentence(self, archetype: str) -> str:
+        return (f"\nYour primary archetype appears to be the {archetype}, "
+                f"which influences your life narrative and core motivations.")
+
+    def _compile_summary_sentence(self, mbti_type: str, highest: str, lowest: str) -> str:
+        return ("\n\nThis integrated profile reveals a complex individual who combines "
+                f"{self._get_integration_summary(mbti_type, highest, lowest)}. "
+                "Remember that personality is dynamic and continues to develop throughout life.")
+
     def _get_cluster_meaning(self, cluster_name: str) -> str:
-        meanings = {
-            'Resilient': 'strong adaptation across multiple life domains with high functionality',
-            'Overcontrolled': 'careful, cautious approach with heightened emotional sensitivity',
-            'Undercontrolled': 'spontaneous, flexible style with preference for immediate experience',
-            'Average': 'balanced traits without extreme tendencies in any direction'
-        }
-        return meanings.get(cluster_name, 'a unique personality configuration')
-
-    def _get_integration_summary(self, big_five: Dict[str, float], mbti_type: str) -> str:
-        # Create a brief integration summary based on highest and lowest traits
-        sorted_traits = sorted(big_five.items(), key=lambda x: x[1], reverse=True)
-        highest = sorted_traits[0][0].lower()
-        lowest = sorted_traits[-1][0].lower()
-        
-        if mbti_type.startswith('I'):
-            style = "reflective depth"
-        else:
-            style = "engaging energy"
-        
-        if mbti_type[1] == 'N':
-            approach = "innovative vision"
-        else:
-            approach = "practical wisdom"
-        
-        return f"{style} with {approach}, anchored by strong {highest} while managing lower {lowest}"
-
-    def generate_development_suggestions(self, results: Dict) -> List[str]:
+        return CLUSTER_MEANINGS.get(cluster_name, 'a unique personality configuration')
+
+    def _get_integration_summary(self, mbti_type: str, highest: str, lowest: str) -> str:
+        style = "reflective depth" if mbti_type.startswith('I') else "engaging energy"
+        approach = "innovative vision" if mbti_type[1] == 'N' else "practical wisdom"
+        return f"{style} with {approach}, anchored by strong {highest.lower()} while managing lower {lowest.lower()}"
+
+    def generate_development_suggestions(self, results: Dict, profile: Optional[Profile] = None) -> List[str]:
         suggestions = []
-        
-        big_five = results['big_five']['scores']
-        mbti = results['mbti']['primary_type']
+
         functions = results['cognitive_functions']
         depth = results['jungian_depth']
-        
-        # Suggestions based on lowest Big Five trait
-        sorted_traits = sorted(big_five.items(), key=lambda x: x[1])
-        lowest_trait, lowest_score = sorted_traits[0]
-        
-        if lowest_trait == 'Extraversion' and lowest_score < 35:
-            suggestions.append("Practice initiating social connections in comfortable settings to expand your interpersonal comfort zone")
-        elif lowest_trait == 'Agreeableness' and lowest_score < 35:
-            suggestions.append("Develop empathy through active listening exercises and considering others' perspectives before responding")
-        elif lowest_trait == 'Conscientiousness' and lowest_score < 35:
-            suggestions.append("Implement simple organizational systems and time-blocking to enhance productivity without losing flexibility")
-        elif lowest_trait == 'Openness' and lowest_score < 35:
-            suggestions.append("Explore new experiences in small doses - try a new cuisine, read outside your usual genres, or learn a new skill")
-        
-        # Suggestions based on cognitive functions
+        trait_bands, _, _, lowest_trait = profile or self._profile(results['big_five']['scores'])
+
+        if lowest_trait in LOWEST_TRAIT_SUGGESTIONS and dict(trait_bands)[lowest_trait] == -2:
+            suggestions.append(LOWEST_TRAIT_SUGGESTIONS[lowest_trait])
+
         if functions['primary_stack'] and len(functions['primary_stack']) >= 4:
             inferior = functions['primary_stack'][3]
-            inferior_level = functions['development_levels'].get(inferior, 0.2)
-            
-            if inferior_level < 0.3:
-                suggestions.append(f"Work on developing your inferior function ({inferior}) through low-stakes practice and gradual exposure")
-        
-        # Shadow work suggestions
-        if depth['shadow_integration'] < 0.5:
-            suggestions.append("Explore shadow work through journaling about what triggers strong emotional reactions in others")
-        
-        # Type-specific growth edges
-        if mbti.startswith('I') and big_five['Extraversion'] < 40:
-            suggestions.append("Balance introspection with external engagement through structured social activities")
-        elif mbti.startswith('E') and big_five['Extraversion'] > 70:
-            suggestions.append("Cultivate reflective practices like meditation or journaling to deepen self-awareness")
-        
-        if mbti[1] == 'N' and big_five['Openness'] > 70:
-            suggestions.append("Ground innovative ideas with practical implementation steps and concrete details")
-        elif mbti[1] == 'S' and big_five['Openness'] < 40:
-            suggestions.append("Stretch your comfort zone by exploring abstract concepts and future possibilities")
-        
-        if mbti[2] == 'T' and big_five['Agreeableness'] < 40:
-            suggestions.append("Practice expressing appreciation and considering emotional impacts in decision-making")
-        elif mbti[2] == 'F' and big_five['Agreeableness'] > 70:
-            suggestions.append("Develop objective analysis skills and practice setting healthy boundaries")
-        
-        if mbti[3] == 'J' and big_five['Conscientiousness'] > 70:
-            suggestions.append("Build flexibility by intentionally leaving some plans open-ended and embracing spontaneity")
-        elif mbti[3] == 'P' and big_five['Conscientiousness'] < 40:
-            suggestions.append("Create loose structures and routines that support your goals while maintaining adaptability")
-        
-        # Individuation suggestions
-        if depth.get('individuation_stage') == 'Early Development':
-            suggestions.append("Begin exploring your authentic self through values clarification exercises")
-        elif depth.get('individuation_stage') == 'Emerging Awareness':
-            suggestions.append("Deepen self-knowledge through therapy, coaching, or structured self-reflection")
-        elif depth.get('individuation_stage') == 'Active Integration':
-            suggestions.append("Continue integrating disparate aspects of self through creative expression and meaningful relationships")
-        
-        # Ensure we have at least 5 suggestions
-        while len(suggestions) < 5:
-            generic_suggestions = [
-                "Practice mindfulness to increase present-moment awareness and emotional regulation",
-                "Seek feedback from trusted others to gain perspective on blind spots",
-                "Engage in activities that challenge your comfort zone in manageable ways",
-                "Develop a growth mindset by viewing challenges as opportunities for development",
-                "Create a personal development plan with specific, measurable goals"
-            ]
-            for sugg in generic_suggestions:
-                if sugg not in suggestions and len(suggestions) < 5:
-                    suggestions.append(sugg)
-        
-        return suggestions[:5]  # Return top 5 suggestions
\ No newline at end of file
+            if functions['development_levels'].get(inferior, 0.2) < INFERIOR_LEVEL:
+                suggestions.append(f"Work on developing your inferior function ({inferior}) through low-stakes "
+                                   f"practice and gradual exposure")
+
+        if _band(float(depth['shadow_integration']), SHADOW_CUTOFFS) < 0:
+            suggestions.append("Explore shadow work through journaling about what triggers strong emotional "
+                               "reactions in others")
+
+        suggestions.extend(self._type_suggestions(results['mbti']['primary_type'], trait_bands))
+
+        stage = depth.get('individuation_stage')
+        if stage in STAGE_SUGGESTIONS:
+            suggestions.append(STAGE_SUGGESTIONS[stage])
+
+        # Fill up to 5 with generic suggestions
+        for suggestion in GENERIC_SUGGESTIONS:
+            if len(suggestions) >= 5:
+                break
+            if suggestion not in suggestions:
+                suggestions.append(suggestion)
+
+        return suggestions[:5]
+
+    def _compile_type_suggestions(self, mbti_type: str, trait_bands: Tuple[Tuple[str, int], ...]) -> Tuple[str, ...]:
+        bands = dict(trait_bands)
+        suggestions = []
+        for position, trait, by_letter in TYPE_SUGGESTIONS:
+            growth_bands, suggestion = by_letter.get(mbti_type[position], ((), None))
+            if bands[trait] in growth_bands:
+                suggestions.append(suggestion)
+        return tuple(suggestions)
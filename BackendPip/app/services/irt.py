@@ -0,0 +1,174 @@
+import json
+import math
+import os
+from statistics import NormalDist
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.scoring_plan import ScoringPlan
+
+# Logistic scaling constant that approximates the normal ogive
+LOGISTIC_SCALE = 1.7
+
+
+def default_item_parameters_path() -> str:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(current_dir, '../../questions/item_parameters.json')
+
+
+def load_item_parameters(path: Optional[str] = None) -> Dict:
+    path = path or default_item_parameters_path()
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Item parameters file not found at: {path}")
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def derive_item_parameters(questions: Sequence[Dict], categories: int = 7, version: str = 'loadings-1') -> Dict:
+    """
+    Starting GRM parameters from the factor loadings in questions.json, using
+    the normal-ogive factor model conversion a = 1.7 * l / sqrt(1 - l^2),
+    b_k = tau_k / l, with thresholds tau_k placed for equally likely categories.
+    Parameters calibrated by app.cli.calibrate replace these.
+    """
+    taus = [NormalDist().inv_cdf(k / categories) for k in range(1, categories)]
+    items = {}
+    for q in questions:
+        if q.get('response_type') != 'likert_7' or not q.get('factor_loadings') or not q.get('dimension'):
+            continue
+        loading = min(abs(q['factor_loadings'].get(q['dimension'], 0.0)), 0.95) or 0.3
+        items[q['id']] = {
+            'discrimination': round(LOGISTIC_SCALE * loading / math.sqrt(1 - loading ** 2), 4),
+            'thresholds': [round(tau / loading, 4) for tau in taus]
+        }
+    return {
+        'version': version,
+        'model': 'graded_response',
+        'categories': categories,
+        'source': 'derived from factor loadings',
+        'items': items
+    }
+
+
+def category_probabilities(discrimination: np.ndarray, thresholds: np.ndarray, theta: np.ndarray) -> np.ndarray:
+    """
+    GRM category probabilities, shape (items, categories, len(theta)), from
+    discrimination (items,) and ordered thresholds (items, categories - 1).
+    """
+    theta = np.atleast_1d(theta)
+    z = discrimination[:, np.newaxis, np.newaxis] * (theta - thresholds[:, :, np.newaxis])
+    cumulative = 1 / (1 + np.exp(-z))
+    ones = np.ones((len(discrimination), 1, len(theta)))
+    cumulative = np.concatenate([ones, cumulative, np.zeros_like(ones)], axis=1)
+    return cumulative[:, :-1, :] - cumulative[:, 1:, :]
+
+
+def item_information(discrimination: np.ndarray, thresholds: np.ndarray, theta: np.ndarray) -> np.ndarray:
+    """
+    GRM Fisher information, shape (items, len(theta)): the sum over
+    categories of P_k'^2 / P_k, where P_k' = a * (Q_k - Q_k+1) and
+    Q_k = P*_k (1 - P*_k) for each cumulative boundary.
+    """
+    theta = np.atleast_1d(theta)
+    z = discrimination[:, np.newaxis, np.newaxis] * (theta - thresholds[:, :, np.newaxis])
+    cumulative = 1 / (1 + np.exp(-z))
+    zeros = np.zeros((len(discrimination), 1, len(theta)))
+    slopes = np.concatenate([zeros, cumulative * (1 - cumulative), zeros], axis=1)
+    derivatives = discrimination[:, np.newaxis, np.newaxis] * (slopes[:, :-1, :] - slopes[:, 1:, :])
+    probabilities = np.maximum(category_probabilities(discrimination, thresholds, theta), 1e-300)
+    return (derivatives ** 2 / probabilities).sum(axis=1)
+
+
+def parameter_arrays(item_parameters: Dict, item_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    items = item_parameters['items']
+    missing = [item_id for item_id in item_ids if item_id not in items]
+    if missing:
+        raise ValueError(f"No item parameters for: {', '.join(missing[:5])}")
+
+    discrimination = np.array([items[item_id]['discrimination'] for item_id in item_ids], dtype=np.float64)
+    thresholds = np.array([items[item_id]['thresholds'] for item_id in item_ids], dtype=np.float64)
+    if np.any(np.diff(thresholds, axis=1) <= 0):
+        raise ValueError("Item thresholds must be strictly increasing")
+    return discrimination, thresholds
+
+
+def response_categories(X: np.ndarray, item_idx: np.ndarray, reverse: np.ndarray, n_categories: int) -> np.ndarray:
+    # Keyed 0..K-1 category per item, -1 for unanswered or out-of-range answers
+    values = X[:, item_idx]
+    keyed = np.where(reverse, n_categories - values, values - 1)
+    valid = ~np.isnan(keyed) & (keyed >= 0) & (keyed <= n_categories - 1)
+    return np.where(valid, keyed, -1).astype(np.int8)
+
+
+class GradedResponseModel:
+    """
+    Samejima's Graded Response Model scored by EAP over a fixed quadrature grid.
+
+    Category log-probabilities for every item are tabulated on the grid once,
+    so a person's log-likelihood curve per dimension is a gather of one table
+    row per answered item and a sum over items. All reductions run per row,
+    so a batch row is bit-identical to the same submission scored alone.
+    """
+
+    def __init__(self, item_parameters: Dict, plan: ScoringPlan, n_points: int = 61, bound: float = 4.0,
+                 block_rows: int = 256):
+        self.version = item_parameters.get('version', '')
+        self.plan_version = plan.version
+        self.dimensions = plan.dimensions
+
+        self.grid = np.linspace(-bound, bound, n_points)
+        log_prior = -0.5 * self.grid ** 2
+        self.log_prior = log_prior - np.log(np.exp(log_prior).sum())
+
+        # Items keyed to a Big Five dimension, in ScoringPlan order
+        self.item_idx = plan.keyed_idx
+        self.reverse = plan.keyed_reverse
+        self.item_dimension = plan.dimension_membership.argmax(axis=1)
+
+        self.discrimination, self.thresholds = parameter_arrays(
+            item_parameters, [plan.item_ids[i] for i in self.item_idx]
+        )
+        self.n_categories = self.thresholds.shape[1] + 1
+
+        # (items, categories, grid) probability tables
+        self.probabilities = category_probabilities(self.discrimination, self.thresholds, self.grid)
+        self.log_probabilities = np.log(np.maximum(self.probabilities, 1e-300))
+        # (items, grid) Fisher information, for adaptive item selection
+        self.information = item_information(self.discrimination, self.thresholds, self.grid)
+
+        self.item_range = np.arange(len(self.item_idx))
+        self.dimension_items = [np.flatnonzero(self.item_dimension == d) for d in range(len(self.dimensions))]
+        # Rows gathered at a time, bounding the (rows, items, grid) temporary
+        self.block_rows = block_rows
+
+    def categories(self, X: np.ndarray) -> np.ndarray:
+        return response_categories(X, self.item_idx, self.reverse, self.n_categories)
+
+    def log_likelihood(self, categories: np.ndarray) -> np.ndarray:
+        n_rows = categories.shape[0]
+        result = np.empty((n_rows, len(self.dimensions), len(self.grid)))
+        for start in range(0, n_rows, self.block_rows):
+            block = categories[start:start + self.block_rows]
+            gathered = self.log_probabilities[self.item_range, np.maximum(block, 0)]
+            gathered[block < 0] = 0.0
+            for d, items in enumerate(self.dimension_items):
+                result[start:start + len(block), d] = gathered[:, items].sum(axis=1)
+        return result
+
+    def posterior(self, log_likelihood: np.ndarray) -> np.ndarray:
+        log_posterior = log_likelihood + self.log_prior
+        log_posterior -= log_posterior.max(axis=-1, keepdims=True)
+        posterior = np.exp(log_posterior)
+        return posterior / posterior.sum(axis=-1, keepdims=True)
+
+    def eap(self, log_likelihood: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Posterior mean and standard deviation per dimension
+        posterior = self.posterior(log_likelihood)
+        theta = (posterior * self.grid).sum(axis=-1)
+        variance = (posterior * self.grid ** 2).sum(axis=-1) - theta ** 2
+        return theta, np.sqrt(np.maximum(variance, 0.0))
+
+    def score(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self.eap(self.log_likelihood(self.categories(X)))
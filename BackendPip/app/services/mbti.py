@@ -0,0 +1,88 @@
+from itertools import product
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app.services.scoring_plan import PREFERENCE_LETTERS
+
+# The four dichotomies, in type code order
+DICHOTOMIES = (('E', 'I'), ('S', 'N'), ('T', 'F'), ('J', 'P'))
+TYPE_CODES = tuple(''.join(letters) for letters in product(*DICHOTOMIES))
+
+# Chance that a respondent picks the forced-choice option keyed to their own preference
+FORCED_CHOICE_ACCURACY = 0.7
+# Letter favoured by a high score -> (Big Five dimension, absolute correlation of the
+# dichotomy with it, McCrae & Costa 1989)
+TRAIT_CORRELATIONS = {
+    'E': ('Extraversion', 0.74),
+    'N': ('Openness', 0.72),
+    'F': ('Agreeableness', 0.44),
+    'J': ('Conscientiousness', 0.49)
+}
+# Shrinks the summed log-odds: answers to one dichotomy are not independent given the
+# type, so the raw sum is overconfident. Fitted on synthetic respondents
+# (benchmarks/bench_mbti.py --fit), where it minimizes both the calibration error and
+# the log loss
+TEMPERATURE = 0.6
+TOP_K = 3
+
+
+class TypePosterior:
+    """
+    A probability distribution over the 16 types, for a whole batch in one
+    pass. Each dichotomy's log-odds add up the evidence of the forced-choice
+    answers (logit(FORCED_CHOICE_ACCURACY) per keyed answer) and of the
+    related Big Five score, in norm group standard deviations (the probit
+    slope of a latent preference correlated TRAIT_CORRELATIONS with it, on
+    the logit scale). Both are compiled into letter x type and dimension x
+    type weight matrices, so the type log-odds are two weighted sums.
+    """
+
+    def __init__(self, dimensions: Sequence[str], forced_choice_weight: float):
+        # +1/2 where a type has the letter, -1/2 where it has the opposite one
+        letter_signs = np.zeros((len(PREFERENCE_LETTERS), len(TYPE_CODES)))
+        for t, code in enumerate(TYPE_CODES):
+            for position, pair in enumerate(DICHOTOMIES):
+                for letter in pair:
+                    letter_signs[PREFERENCE_LETTERS.index(letter), t] = 0.5 if code[position] == letter else -0.5
+
+        # Preference totals arrive multiplied by forced_choice_weight
+        answer_log_odds = np.log(FORCED_CHOICE_ACCURACY / (1 - FORCED_CHOICE_ACCURACY))
+        self.letter_weights = TEMPERATURE * answer_log_odds / forced_choice_weight * letter_signs
+        self.letter_types = (letter_signs > 0).astype(np.float64)
+
+        self.dimension_weights = np.zeros((len(dimensions), len(TYPE_CODES)))
+        for letter, (dimension, correlation) in TRAIT_CORRELATIONS.items():
+            slope = 1.702 * correlation / np.sqrt(1 - correlation ** 2)
+            self.dimension_weights[list(dimensions).index(dimension)] = (
+                TEMPERATURE * slope * letter_signs[PREFERENCE_LETTERS.index(letter)])
+
+    def probabilities(self, preferences: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """
+        (N, 16) type probabilities, in TYPE_CODES order, from (N, 8) weighted
+        preference totals and (N, dimensions) scores in norm group SDs.
+        """
+        # Per-row reductions rather than matmul, so a row's result does not depend on the batch
+        log_odds = ((preferences[:, :, np.newaxis] * self.letter_weights).sum(axis=1)
+                    + (z[:, :, np.newaxis] * self.dimension_weights).sum(axis=1))
+        log_odds -= log_odds.max(axis=1, keepdims=True)
+        odds = np.exp(log_odds)
+        return odds / odds.sum(axis=1, keepdims=True)
+
+    def letter_probabilities(self, probabilities: np.ndarray) -> np.ndarray:
+        # (N, 8) probability of each letter, in PREFERENCE_LETTERS order: the sum over the types that have it
+        return (probabilities[:, np.newaxis, :] * self.letter_types).sum(axis=2)
+
+    def summarize(self, probabilities: np.ndarray, k: int = TOP_K) -> List[Dict]:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            entropy = -np.where(probabilities > 0, probabilities * np.log2(probabilities), 0.0).sum(axis=1)
+        # Stable, so equally probable types keep TYPE_CODES order
+        top = np.argsort(-probabilities, axis=1, kind='stable')[:, :k]
+        top_probabilities = np.take_along_axis(probabilities, top, axis=1).round(3).tolist()
+        return [
+            {
+                'top_types': [{'type': TYPE_CODES[t], 'probability': p} for t, p in zip(types, row_probabilities)],
+                'entropy': round(float(row_entropy), 3)
+            }
+            for types, row_probabilities, row_entropy in zip(top.tolist(), top_probabilities, entropy.tolist())
+        ]
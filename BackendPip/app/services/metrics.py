@@ -0,0 +1,149 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds, from a tenth of a millisecond (one small stage) to a large batch
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+
+class StageTimer:
+    """
+    Monotonic-clock spans of one request. lap(stage) charges the time since
+    the previous lap to stage; a stage that runs more than once (per row, or
+    in both the sums and the finishing pass) accumulates.
+    """
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.durations[stage] = self.durations.get(stage, 0.0) + (now - self.last)
+        self.last = now
+
+    def absorb(self, durations: Dict[str, float], stage: str):
+        # Adds stages timed elsewhere (e.g. in a worker process) and charges
+        # the rest of the time since the previous lap to stage
+        now = time.perf_counter()
+        for timed_stage, seconds in durations.items():
+            self.durations[timed_stage] = self.durations.get(timed_stage, 0.0) + seconds
+        remainder = max(now - self.last - sum(durations.values()), 0.0)
+        self.durations[stage] = self.durations.get(stage, 0.0) + remainder
+        self.last = now
+
+    @property
+    def total(self) -> float:
+        return self.last - self.started
+
+    def server_timing(self) -> str:
+        # Server-Timing header value, durations in milliseconds
+        spans = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.durations.items()]
+        spans.append(f"total;dur={self.total * 1000:.3f}")
+        return ', '.join(spans)
+
+
+class _NullTimer:
+    # Stands in for a StageTimer when instrumentation is off, so stages stay unconditional
+    def lap(self, stage: str):
+        pass
+
+    def absorb(self, durations: Dict[str, float], stage: str):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Histogram:
+    """
+    Prometheus histogram with a fixed set of labels per series. Counts are
+    kept per bucket and made cumulative when rendered.
+    """
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (last is +Inf), sum, count]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bucket] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in
+                      sorted(self._series.items())]
+        for labels, counts, total, count in series:
+            label_text = ','.join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total!r}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+class PipelineMetrics:
+    """
+    Stage and request latency histograms of the assessment endpoints, in the
+    Prometheus text format. Metrics are per process: with several uvicorn
+    workers each one reports its own.
+    """
+
+    def __init__(self, enabled: bool = True, server_timing: bool = False):
+        self.enabled = enabled
+        self.server_timing = server_timing
+        self.stage_seconds = Histogram('assessment_stage_seconds',
+                                       'Time spent in each scoring stage per request.', ('endpoint', 'stage'))
+        self.request_seconds = Histogram('assessment_request_seconds',
+                                         'Time to handle a request, by endpoint and result cache status.',
+                                         ('endpoint', 'cache'))
+
+    def timer(self):
+        return StageTimer() if self.enabled else NULL_TIMER
+
+    def record(self, endpoint: str, timer, cache: str = '') -> Optional[str]:
+        """
+        Feeds a finished request's stages into the histograms. Returns the
+        Server-Timing header value when that is switched on.
+        """
+        if timer is NULL_TIMER:
+            return None
+        for stage, seconds in timer.durations.items():
+            self.stage_seconds.observe((endpoint, stage), seconds)
+        self.request_seconds.observe((endpoint, cache), timer.total)
+        return timer.server_timing() if self.server_timing else None
+
+    def render(self, executor: Optional[Dict] = None) -> str:
+        lines = self.stage_seconds.render() + self.request_seconds.render()
+        if executor is not None:
+            # ScoringExecutor.stats()
+            lines += [
+                '# HELP assessment_scoring_pending Scoring calls queued or running.',
+                '# TYPE assessment_scoring_pending gauge',
+                f"assessment_scoring_pending {executor['pending']}",
+                '# HELP assessment_scoring_rejected_total Scoring calls rejected because the queue was full.',
+                '# TYPE assessment_scoring_rejected_total counter',
+                f"assessment_scoring_rejected_total {executor['rejected']}",
+                '# HELP assessment_ready Whether the startup warm-up has finished (see /ready).',
+                '# TYPE assessment_ready gauge',
+                f"assessment_ready {int(executor['ready'])}"
+            ]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,264 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.norms import SCORE_RANGE
+from app.services.scoring_plan import BIG_FIVE_DIMENSIONS
+
+# Percentile anchors written per dimension; dense, since empirical norm
+# tables interpolate between them
+DEFAULT_PERCENTILES = tuple(range(1, 100))
+
+SKETCH_FORMAT = 'norm-sketch/1'
+
+
+class ScoreSketch:
+    """
+    Constant-memory, mergeable summary of one dimension's scores.
+
+    Scores live on a bounded 0-100 scale and are reported to 0.1, so a
+    fixed-width histogram at 0.01 resolution answers any quantile exactly
+    for reported scores, in 10,001 counters however many scores are added.
+    Two sketches merge by adding histograms. Mean and variance are kept as
+    (count, mean, M2) and combined with Chan's parallel update, so shards
+    can be summed in any order.
+    """
+
+    def __init__(self, resolution: float = 0.01):
+        self.resolution = resolution
+        low, high = SCORE_RANGE
+        self.histogram = np.zeros(int(round((high - low) / resolution)) + 1, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, scores: np.ndarray):
+        scores = np.asarray(scores, dtype=np.float64)
+        scores = scores[~np.isnan(scores)]
+        if len(scores) == 0:
+            return
+        clipped = np.clip(scores, *SCORE_RANGE)
+        bins = np.rint((clipped - SCORE_RANGE[0]) / self.resolution).astype(np.intp)
+        self.histogram += np.bincount(bins, minlength=len(self.histogram))
+        mean = float(scores.mean())
+        self._combine(len(scores), mean, float(((scores - mean) ** 2).sum()))
+
+    def merge(self, other: 'ScoreSketch') -> 'ScoreSketch':
+        if other.resolution != self.resolution:
+            raise ValueError("Cannot merge sketches with different resolutions")
+        self.histogram += other.histogram
+        self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def _combine(self, count: int, mean: float, m2: float):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def std_dev(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else 0.0
+
+    def quantiles(self, percentiles: Sequence[float]) -> np.ndarray:
+        # Smallest score whose cumulative share reaches each percentile
+        cumulative = np.cumsum(self.histogram)
+        targets = np.asarray(percentiles, dtype=np.float64) / 100 * self.count
+        bins = np.searchsorted(cumulative, np.maximum(targets, 1), side='left')
+        return SCORE_RANGE[0] + np.minimum(bins, len(self.histogram) - 1) * self.resolution
+
+    def to_spec(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict:
+        if self.count == 0:
+            raise ValueError("Cannot build norms from an empty sketch")
+        anchors = self.quantiles(percentiles)
+        return {
+            'model': 'empirical',
+            'mean': round(self.mean, 2),
+            'std_dev': round(self.std_dev, 2),
+            'percentiles': {f"{p:g}": round(float(score), 1) for p, score in zip(percentiles, anchors)},
+            'sample_size': self.count
+        }
+
+    def to_dict(self) -> Dict:
+        bins = np.flatnonzero(self.histogram)
+        return {
+            'resolution': self.resolution,
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'bins': bins.tolist(),
+            'counts': self.histogram[bins].tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ScoreSketch':
+        sketch = cls(data['resolution'])
+        sketch.histogram[np.asarray(data['bins'], dtype=np.intp)] = np.asarray(data['counts'], dtype=np.int64)
+        sketch.count = data['count']
+        sketch.mean = data['mean']
+        sketch.m2 = data['m2']
+        return sketch
+
+
+class JointMoments:
+    """
+    Count, mean vector and co-moment matrix of the complete score rows of one
+    group, mergeable like ScoreSketch (Chan's update, in matrix form). They
+    give the trait correlations written with each dimension's norms.
+    """
+
+    def __init__(self, n_dimensions: int):
+        self.count = 0
+        self.mean = np.zeros(n_dimensions)
+        self.comoment = np.zeros((n_dimensions, n_dimensions))
+
+    def update(self, scores: np.ndarray):
+        scores = scores[~np.isnan(scores).any(axis=1)]
+        if len(scores) == 0:
+            return
+        mean = scores.mean(axis=0)
+        centered = scores - mean
+        self._combine(len(scores), mean, centered.T @ centered)
+
+    def merge(self, other: 'JointMoments') -> 'JointMoments':
+        self._combine(other.count, other.mean, other.comoment)
+        return self
+
+    def _combine(self, count: int, mean: np.ndarray, comoment: np.ndarray):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * self.count * count / total
+        self.count = total
+
+    def correlation(self) -> Optional[np.ndarray]:
+        scale = np.sqrt(np.diag(self.comoment))
+        if self.count < 2 or not (scale > 0).all():
+            return None
+        return self.comoment / np.outer(scale, scale)
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'mean': self.mean.tolist(), 'comoment': self.comoment.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'JointMoments':
+        moments = cls(len(data['mean']))
+        moments.count = data['count']
+        moments.mean = np.asarray(data['mean'], dtype=np.float64)
+        moments.comoment = np.asarray(data['comoment'], dtype=np.float64)
+        return moments
+
+
+class NormBuilder:
+    """
+    Per-group, per-dimension ScoreSketches, plus each group's JointMoments,
+    fed from a stream of scored results. Builders from parallel workers or
+    daily shards merge into one, and save to / load from a JSON sketch file
+    between runs.
+    """
+
+    def __init__(self, dimensions: Sequence[str] = BIG_FIVE_DIMENSIONS):
+        self.dimensions = tuple(dimensions)
+        self.sketches: Dict[str, Dict[str, ScoreSketch]] = {}
+        self.moments: Dict[str, JointMoments] = {}
+
+    def _group(self, group: str) -> Dict[str, ScoreSketch]:
+        if group not in self.sketches:
+            self.sketches[group] = {dimension: ScoreSketch() for dimension in self.dimensions}
+            self.moments[group] = JointMoments(len(self.dimensions))
+        return self.sketches[group]
+
+    def update(self, group: str, scores: np.ndarray):
+        # scores: (N, dimensions) in self.dimensions order, NaN where missing
+        sketches = self._group(group)
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1, len(self.dimensions))
+        for j, dimension in enumerate(self.dimensions):
+            sketches[dimension].update(scores[:, j])
+        self.moments[group].update(scores)
+
+    def add_results(self, results: Iterable[Tuple[str, Dict]], batch_size: int = 10000) -> int:
+        # results: (group, AssessmentResults dict) pairs; only big_five.scores is read
+        pending: Dict[str, List[List[float]]] = {}
+        added = 0
+        for group, result in results:
+            scores = result.get('big_five', {}).get('scores', {})
+            rows = pending.setdefault(group, [])
+            rows.append([scores.get(dimension, np.nan) for dimension in self.dimensions])
+            added += 1
+            if len(rows) >= batch_size:
+                self.update(group, np.array(rows))
+                pending[group] = []
+        for group, rows in pending.items():
+            if rows:
+                self.update(group, np.array(rows))
+        return added
+
+    def merge(self, other: 'NormBuilder') -> 'NormBuilder':
+        if other.dimensions != self.dimensions:
+            raise ValueError("Cannot merge sketches over different dimensions")
+        for group, sketches in other.sketches.items():
+            mine = self._group(group)
+            for dimension, sketch in sketches.items():
+                mine[dimension].merge(sketch)
+            self.moments[group].merge(other.moments[group])
+        return self
+
+    def build(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+              min_sample_size: int = 1) -> Dict:
+        """
+        Norms in the norm_data.json layout: {"norms": {dimension: {group: spec}}}.
+        Groups with fewer than min_sample_size scores are left out. Each spec
+        also holds the dimension's correlations with the others, from the
+        group's complete score rows, for the response quality Mahalanobis
+        distance.
+        """
+        norms: Dict[str, Dict[str, Dict]] = {dimension: {} for dimension in self.dimensions}
+        for group in sorted(self.sketches):
+            correlation = self.moments[group].correlation()
+            for j, dimension in enumerate(self.dimensions):
+                sketch = self.sketches[group][dimension]
+                if sketch.count >= max(min_sample_size, 1):
+                    spec = sketch.to_spec(percentiles)
+                    if correlation is not None:
+                        spec['correlations'] = {other: round(float(r), 4)
+                                                for other, r in zip(self.dimensions, correlation[j])}
+                    norms[dimension][group] = spec
+        return {'norms': norms}
+
+    def to_dict(self) -> Dict:
+        return {
+            'format': SKETCH_FORMAT,
+            'dimensions': list(self.dimensions),
+            'groups': {
+                group: {dimension: sketch.to_dict() for dimension, sketch in sketches.items()}
+                for group, sketches in self.sketches.items()
+            },
+            'moments': {group: moments.to_dict() for group, moments in self.moments.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'NormBuilder':
+        if data.get('format') != SKETCH_FORMAT:
+            raise ValueError(f"Not a norm sketch file (expected format '{SKETCH_FORMAT}')")
+        builder = cls(data['dimensions'])
+        for group, sketches in data['groups'].items():
+            builder.sketches[group] = {
+                dimension: ScoreSketch.from_dict(sketch) for dimension, sketch in sketches.items()
+            }
+            # Sketches saved before joint moments were kept start them empty
+            moments = data.get('moments', {}).get(group)
+            builder.moments[group] = (JointMoments.from_dict(moments) if moments
+                                      else JointMoments(len(builder.dimensions)))
+        return builder
+
+
+def merge_builders(builders: Iterable[NormBuilder], dimensions: Optional[Sequence[str]] = None) -> NormBuilder:
+    merged = NormBuilder(dimensions or BIG_FIVE_DIMENSIONS)
+    for builder in builders:
+        merged.merge(builder)
+    return merged
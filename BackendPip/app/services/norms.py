@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Scores are on a 0-100 scale; tables hold one percentile per 0.01 points
+SCORE_RANGE = (0.0, 100.0)
+RESOLUTION = 0.01
+
+DEFAULT_NORM_GROUP = 'general_population'
+
+
+@lru_cache(maxsize=32)
+def z_critical(confidence_level: float) -> float:
+    # Two-sided critical value, e.g. 1.96 for 0.95
+    return NormalDist().inv_cdf((1 + confidence_level) / 2)
+
+
+@lru_cache(maxsize=1)
+def standard_normal_table(bound: float = 10.0, step: float = 0.0005) -> Tuple[np.ndarray, np.ndarray]:
+    # Standard normal CDF tabulated once; every normal-model group interpolates from it
+    z = np.linspace(-bound, bound, int(round(2 * bound / step)) + 1)
+    cdf = NormalDist().cdf
+    return z, np.array([cdf(value) for value in z])
+
+
+def normal_curve(mean: float, std_dev: float, grid: np.ndarray) -> np.ndarray:
+    z, cdf = standard_normal_table()
+    return np.interp((grid - mean) / std_dev, z, cdf) * 100
+
+
+def anchor_curve(anchors: Dict[str, float], grid: np.ndarray) -> np.ndarray:
+    # Piecewise-linear through the (score, percentile) anchors, pinned to 0 and 100 at the ends
+    points = sorted((float(score), float(percentile)) for percentile, score in anchors.items())
+    scores = [SCORE_RANGE[0]] + [s for s, _ in points] + [SCORE_RANGE[1]]
+    percentiles = [0.0] + [p for _, p in points] + [100.0]
+    return np.interp(grid, scores, percentiles)
+
+
+def group_curve(group: Dict, grid: np.ndarray) -> np.ndarray:
+    # "model": "empirical" (written by app.cli.build_norms) prefers the anchors over mean/std_dev
+    if group.get('model') == 'empirical' and group.get('percentiles'):
+        return anchor_curve(group['percentiles'], grid)
+    if 'mean' in group and 'std_dev' in group:
+        return normal_curve(group['mean'], group['std_dev'], grid)
+    if group.get('percentiles'):
+        return anchor_curve(group['percentiles'], grid)
+    raise ValueError("Norm group needs either mean and std_dev or percentile anchors")
+
+
+class NormTable:
+    """
+    Score-to-percentile lookup for one norm group, compiled at load time.
+
+    Each dimension's percentile curve is tabulated over the 0-100 score
+    range, from the normal model when the group has a mean and standard
+    deviation and from its percentile anchors when it has only anchors or
+    is marked "model": "empirical". A lookup is an array
+    index plus linear interpolation between neighbouring entries, over a
+    whole (N, dimensions) score matrix at once.
+    """
+
+    def __init__(self, group: str, specs: Dict[str, Dict], dimensions: Sequence[str],
+                 resolution: float = RESOLUTION):
+        self.group = group
+        self.dimensions = tuple(dimensions)
+        self.resolution = resolution
+
+        low, high = SCORE_RANGE
+        self.grid = np.linspace(low, high, int(round((high - low) / resolution)) + 1)
+
+        curves = []
+        for dimension in self.dimensions:
+            if dimension not in specs:
+                raise ValueError(f"No '{group}' norms for {dimension}")
+            curves.append(group_curve(specs[dimension], self.grid))
+        self.table = np.array(curves).reshape(len(self.dimensions), len(self.grid))
+        self.column = {dimension: j for j, dimension in enumerate(self.dimensions)}
+        # Median and normal-equivalent standard deviation (half the 15.9th to 84.1st
+        # percentile range) of each dimension, whichever way the curve was specified
+        lower_tail, upper_tail = NormalDist().cdf(-1) * 100, NormalDist().cdf(1) * 100
+        self.center = np.array([np.interp(50.0, curve, self.grid) for curve in self.table])
+        self.spread = np.array([(np.interp(upper_tail, curve, self.grid) - np.interp(lower_tail, curve, self.grid)) / 2
+                                for curve in self.table])
+        # Mean and inverse covariance of the scores, for the response quality
+        # Mahalanobis distance; only groups built from scored data
+        # (app.cli.build_norms) carry the trait correlations they need
+        self.mean, self.precision = _trait_moments(specs, self.dimensions)
+
+    def percentiles(self, scores: np.ndarray, dimensions: Optional[Sequence[str]] = None) -> np.ndarray:
+        rows = self.table if dimensions is None else self.table[[self.column[d] for d in dimensions]]
+        position = (np.clip(scores, *SCORE_RANGE) - SCORE_RANGE[0]) / self.resolution
+        index = np.minimum(position.astype(np.intp), len(self.grid) - 2)
+        fraction = position - index
+
+        columns = np.arange(rows.shape[0])
+        lower = rows[columns, index]
+        upper = rows[columns, index + 1]
+        return lower + (upper - lower) * fraction
+
+
+def _trait_moments(specs: Dict[str, Dict],
+                   dimensions: Sequence[str]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    try:
+        mean = np.array([specs[d]['mean'] for d in dimensions], dtype=np.float64)
+        std_dev = np.array([specs[d]['std_dev'] for d in dimensions], dtype=np.float64)
+        correlation = np.array([[specs[d]['correlations'][other] for other in dimensions] for d in dimensions],
+                               dtype=np.float64)
+    except KeyError:
+        return None, None
+    try:
+        return mean, np.linalg.inv(correlation * np.outer(std_dev, std_dev))
+    except np.linalg.LinAlgError:
+        return None, None
+
+
+def default_groups_dir() -> str:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(current_dir, '../../norms/groups')
+
+
+def load_norm_groups(norm_data: Dict, groups_dir: Optional[str] = None) -> Dict[str, Dict[str, Dict]]:
+    """
+    Collects norm group specs as {group: {dimension: spec}} from
+    norm_data.json ({"norms": {dimension: {group: spec}}}) and from the JSON
+    files in groups_dir. A file either holds one group ({"name": ...,
+    "norms": {dimension: spec}}, named after the file when "name" is
+    missing) or uses the norm_data.json layout, as written by
+    app.cli.build_norms.
+    """
+    groups: Dict[str, Dict[str, Dict]] = {}
+    _add_norm_data(groups, norm_data)
+
+    groups_dir = groups_dir or default_groups_dir()
+    if os.path.isdir(groups_dir):
+        for filename in sorted(os.listdir(groups_dir)):
+            if not filename.endswith('.json'):
+                continue
+            with open(os.path.join(groups_dir, filename), 'r') as f:
+                data = json.load(f)
+            if 'name' in data or _is_group_file(data):
+                group = data.get('name') or filename[:-len('.json')]
+                groups.setdefault(group, {}).update(data.get('norms', {}))
+            else:
+                _add_norm_data(groups, data)
+
+    return groups
+
+
+def _add_norm_data(groups: Dict[str, Dict[str, Dict]], norm_data: Dict):
+    for dimension, dimension_groups in norm_data.get('norms', {}).items():
+        for group, spec in dimension_groups.items():
+            groups.setdefault(group, {})[dimension] = spec
+
+
+def _is_group_file(data: Dict) -> bool:
+    # One group's specs have mean/std_dev/percentiles directly under each dimension
+    specs = list(data.get('norms', {}).values())
+    return bool(specs) and any(key in specs[0] for key in ('mean', 'std_dev', 'percentiles'))
+
+
+class NormRegistry:
+    """
+    All known norm groups, compiled to NormTables on first use.
+
+    Group specs are a few numbers per dimension, so every group stays loaded;
+    only compiled tables (about 80 KB per dimension) are held in an LRU
+    bounded by max_tables. Selecting a group is a dict lookup, however many
+    groups exist.
+    """
+
+    def __init__(self, groups: Dict[str, Dict[str, Dict]], dimensions: Sequence[str], max_tables: int = 32):
+        self.dimensions = tuple(dimensions)
+        self.max_tables = max_tables
+        self._groups = dict(groups)
+        self._tables: 'OrderedDict[str, NormTable]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, group: str) -> bool:
+        return group in self._groups
+
+    @property
+    def groups(self) -> List[str]:
+        return sorted(self._groups)
+
+    @property
+    def fingerprint(self) -> str:
+        # Changes whenever any group's specs change; part of result cache keys
+        with self._lock:
+            if self._fingerprint is None:
+                encoded = json.dumps(self._groups, sort_keys=True, separators=(',', ':')).encode()
+                self._fingerprint = hashlib.sha256(encoded).hexdigest()[:12]
+            return self._fingerprint
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'groups': len(self._groups),
+                'compiled': len(self._tables),
+                'compiled_bytes': sum(table.table.nbytes for table in self._tables.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def add_group(self, group: str, specs: Dict[str, Dict]):
+        with self._lock:
+            self._groups[group] = specs
+            self._tables.pop(group, None)
+            self._fingerprint = None
+
+    def get(self, group: Optional[str] = None) -> NormTable:
+        group = group or DEFAULT_NORM_GROUP
+        with self._lock:
+            table = self._tables.get(group)
+            if table is not None:
+                self._tables.move_to_end(group)
+                self.hits += 1
+                return table
+            if group not in self._groups:
+                raise ValueError(f"Unknown norm group '{group}'")
+            self.misses += 1
+            specs = self._groups[group]
+
+        # Compile outside the lock; a concurrent miss on the same group just compiles twice
+        table = NormTable(group, specs, self.dimensions)
+        with self._lock:
+            self._tables[group] = table
+            self._tables.move_to_end(group)
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
@@ -0,0 +1,189 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from app.models.assessment import QuestionResponse
+from app.services.metrics import NULL_TIMER
+from app.services.norms import DEFAULT_NORM_GROUP
+from app.services.scoring import ScoringService
+from app.services.interpretation import InterpretationService
+
+# Minimum responses for a scoreable submission (80% of 200 questions)
+MIN_RESPONSES = 160
+
+
+class AssessmentPipeline:
+    """
+    Runs the full scoring and interpretation pipeline over an (N, n_items)
+    response matrix. Every Big Five, MBTI, cluster and depth step is
+    vectorized across rows; only the per-row dict assembly and the narrative
+    text are produced row by row.
+    """
+
+    def __init__(self, scoring_service: Optional[ScoringService] = None,
+                 interpretation_service: Optional[InterpretationService] = None):
+        self.scoring_service = scoring_service or ScoringService()
+        self.interpretation_service = interpretation_service or InterpretationService()
+
+    def score_matrix(self, X: np.ndarray, norm_groups: Optional[Sequence[Optional[str]]] = None,
+                     timer=NULL_TIMER) -> List[Dict]:
+        stages = self._score_stages(X, norm_groups, timer)
+        return [self._finish_row(stages, row, timer) for row in range(X.shape[0])]
+
+    def score_responses(self, responses: List[QuestionResponse], norm_group: Optional[str] = None,
+                        timer=NULL_TIMER) -> Dict:
+        X = self.scoring_service.encode_responses(responses)[np.newaxis, :]
+        timer.lap('encode')
+        return self.score_matrix(X, [norm_group], timer)[0]
+
+    def score_batch(self, submissions: Sequence[List[QuestionResponse]],
+                    norm_groups: Optional[Sequence[Optional[str]]] = None, timer=NULL_TIMER) -> List[Dict]:
+        """
+        Scores many submissions in one pass. Returns one entry per submission,
+        in order, each with either a 'result' or an 'error'.
+        """
+        X = self.scoring_service.plan.encode_many(submissions)
+        timer.lap('encode')
+        return self.score_encoded_batch(X, [len(responses) for responses in submissions], norm_groups, timer)
+
+    def score_encoded_batch(self, X: np.ndarray, response_counts: Sequence[int],
+                            norm_groups: Optional[Sequence[Optional[str]]] = None,
+                            timer=NULL_TIMER) -> List[Dict]:
+        outcomes = [{'index': i, 'result': None, 'error': None} for i in range(X.shape[0])]
+        norm_groups = [group or DEFAULT_NORM_GROUP for group in (norm_groups or [None] * X.shape[0])]
+        registry = self.scoring_service.norm_registry
+
+        answer_errors = self.scoring_service.plan.answer_errors(X)
+        valid = []
+        for i, count in enumerate(response_counts):
+            if answer_errors[i]:
+                outcomes[i]['error'] = answer_errors[i]
+            elif count < MIN_RESPONSES:
+                outcomes[i]['error'] = (f"Insufficient responses. Received {count}, "
+                                        f"minimum required is {MIN_RESPONSES}.")
+            elif norm_groups[i] not in registry:
+                outcomes[i]['error'] = f"Unknown norm group '{norm_groups[i]}'"
+            else:
+                valid.append(i)
+
+        if not valid:
+            return outcomes
+
+        stages = self._score_stages(X[valid], [norm_groups[i] for i in valid], timer)
+
+        for row, i in enumerate(valid):
+            try:
+                outcomes[i]['result'] = self._finish_row(stages, row, timer)
+            except Exception as e:
+                outcomes[i]['error'] = f"Error processing assessment: {str(e)}"
+
+        return outcomes
+
+    def score_statistics(self, statistics: Dict, norm_groups: Optional[Sequence[Optional[str]]] = None,
+                         timer=NULL_TIMER) -> List[Dict]:
+        # Results from ScoringService.statistics() sums, e.g. kept up to date by a ScoringSession
+        stages = self._statistics_stages(statistics, norm_groups, timer)
+        return [self._finish_row(stages, row, timer) for row in range(len(statistics['raw_sums']))]
+
+    def _score_stages(self, X: np.ndarray, norm_groups: Optional[Sequence[Optional[str]]] = None,
+                      timer=NULL_TIMER) -> Dict:
+        return self._statistics_stages(self.scoring_service.statistics(X, timer), norm_groups, timer)
+
+    def _statistics_stages(self, statistics: Dict, norm_groups: Optional[Sequence[Optional[str]]] = None,
+                           timer=NULL_TIMER) -> Dict:
+        scoring = self.scoring_service
+        n_rows = len(statistics['raw_sums'])
+        norm_groups = [group or DEFAULT_NORM_GROUP for group in (norm_groups or [None] * n_rows)]
+
+        # Big Five: raw, IRT, standardized scores and confidence intervals
+        raw = scoring.plan.raw_scores(statistics['raw_sums'], statistics['raw_weights'])
+        timer.lap('raw')
+        theta, se = scoring.irt_model.eap(statistics['log_likelihood'])
+        timer.lap('irt')
+        scores, percentiles, standard_errors = scoring.standardize_matrix(raw, theta, se, norm_groups=norm_groups)
+        timer.lap('standardize')
+        lower, upper = scoring.confidence_interval_matrix(scores, standard_errors)
+        timer.lap('ci')
+
+        facets = scoring.facet_scores_from_sums(statistics['facet_sums'], statistics['facet_counts'])
+        timer.lap('facets')
+        mbti = scoring.classify_mbti_preferences(statistics['preferences'], scores, norm_groups)
+        timer.lap('mbti')
+        clusters = scoring.classify_cluster_matrix(scores)
+        timer.lap('cluster')
+        depth = scoring.analyze_depth_sums(statistics['depth'])
+        timer.lap('depth')
+        quality = scoring.assess_response_quality(statistics, theta, scores, norm_groups)
+        timer.lap('quality')
+        profiles = self.interpretation_service.profiles(scores, scoring.plan.dimensions)
+        timer.lap('interpretation')
+
+        return {
+            'scores': scores,
+            'percentiles': percentiles,
+            'norm_groups': norm_groups,
+            'lower': lower,
+            'upper': upper,
+            'facets': facets,
+            'mbti': mbti,
+            'clusters': clusters,
+            'depth': depth,
+            'quality': quality,
+            'profiles': profiles
+        }
+
+    def _finish_row(self, stages: Dict, row: int, timer=NULL_TIMER) -> Dict:
+        scoring = self.scoring_service
+        dimensions = scoring.plan.dimensions
+
+        scores = dict(zip(dimensions, stages['scores'][row]))
+        confidence_intervals = {
+            dimension: {
+                'point_estimate': scores[dimension],
+                'lower_bound': stages['lower'][row, j],
+                'upper_bound': stages['upper'][row, j],
+                'confidence_level': 0.95
+            }
+            for j, dimension in enumerate(dimensions)
+        }
+
+        timer.lap('ci')
+
+        mbti_result = stages['mbti'][row]
+        function_stack = scoring.determine_function_stack(mbti_result['primary_type'], scores, [])
+        timer.lap('functions')
+
+        results = {
+            'big_five': {
+                'scores': scores,
+                'percentiles': dict(zip(dimensions, stages['percentiles'][row])),
+                'norm_group': stages['norm_groups'][row],
+                'confidence_intervals': confidence_intervals,
+                'facet_scores': stages['facets'][row]
+            },
+            'mbti': mbti_result,
+            'cognitive_functions': function_stack,
+            'personality_cluster': stages['clusters'][row],
+            'jungian_depth': stages['depth'][row],
+            'response_quality': stages['quality'][row]
+        }
+
+        profile = stages['profiles'][row]
+        results['interpretation'] = self.interpretation_service.generate_integrated_interpretation(results, profile)
+        timer.lap('interpretation')
+        results['development_suggestions'] = self.interpretation_service.generate_development_suggestions(results,
+                                                                                                          profile)
+        timer.lap('suggestions')
+        return results
+
+
+_default_pipeline: Optional[AssessmentPipeline] = None
+
+
+def score_batch(submissions: Sequence[List[QuestionResponse]],
+                pipeline: Optional[AssessmentPipeline] = None,
+                norm_groups: Optional[Sequence[Optional[str]]] = None) -> List[Dict]:
+    global _default_pipeline
+    if pipeline is None:
+        if _default_pipeline is None:
+            _default_pipeline = AssessmentPipeline()
+        pipeline = _default_pipeline
+    return pipeline.score_batch(submissions, norm_groups)
@@ -0,0 +1,283 @@
+import json
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.scoring_plan import ScoringPlan
+
+INDEX_FORMAT = 'profile-index/1'
+# Scores are 0-100; codes hold round(score * SCALE) in one byte, a 0.39 point step
+SCALE = 2.55
+# Lists probed per query unless asked otherwise: at 10M profiles, a recall@10 of about
+# 0.95 against exact search in under 5 ms (benchmarks/bench_profile_index.py)
+DEFAULT_NPROBE = 32
+# Inserted profiles are merged into the lists once they reach this share of the index
+COMPACT_FRACTION = 0.05
+ARRAYS = ('centroids', 'offsets', 'codes', 'norms', 'ids')
+
+
+def profile_features(plan: ScoringPlan) -> List[str]:
+    # The Big Five scores, then each facet as 'Dimension/Facet', in question bank order
+    return list(plan.dimensions) + [f"{dimension}/{facet}" for dimension, facet in plan.facet_keys]
+
+
+def profile_vector(big_five: Dict, features: Sequence[str]) -> np.ndarray:
+    """
+    Feature vector of a big_five result (scores and facet_scores) in
+    features order. Raises ValueError when any feature is missing, as an
+    imputed score would match the wrong people.
+    """
+    scores = big_five.get('scores') or {}
+    facet_scores = big_five.get('facet_scores') or {}
+    vector = np.empty(len(features))
+    for i, feature in enumerate(features):
+        dimension, _, facet = feature.partition('/')
+        value = (facet_scores.get(dimension) or {}).get(facet) if facet else scores.get(dimension)
+        if value is None:
+            raise ValueError(f"Profile has no score for {feature}")
+        vector[i] = value
+    return vector
+
+
+def encode(vectors: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    # In chunks, so encoding millions of profiles needs no full-size float temporaries
+    vectors = np.asarray(vectors)
+    codes = np.empty(vectors.shape, dtype=np.uint8)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = vectors[start:start + chunk_size].astype(np.float32) * SCALE
+        codes[start:start + chunk_size] = np.clip(np.rint(chunk), 0, 255)
+    return codes
+
+
+def _norms(codes: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    return np.concatenate([(codes[start:start + chunk_size].astype(np.float32) ** 2).sum(axis=1)
+                           for start in range(0, len(codes), chunk_size)] or [np.empty(0, dtype=np.float32)])
+
+
+def _id_array(ids: Sequence[str]) -> np.ndarray:
+    # Ids are stored as fixed-width UTF-8 bytes, which memory-map
+    if isinstance(ids, np.ndarray) and ids.dtype.kind == 'S':
+        return ids
+    return np.array([id_.encode() for id_ in ids], dtype=np.bytes_) if len(ids) else np.empty(0, dtype='S1')
+
+
+def _nearest(codes: np.ndarray, centroids: np.ndarray, centroid_norms: np.ndarray) -> np.ndarray:
+    # In chunks of about 64 MB of distances; ||x||^2 is the same for every centroid, so it is left out
+    chunk_size = max(256, (1 << 24) // len(centroids))
+    return np.concatenate([
+        (centroid_norms - 2 * codes[start:start + chunk_size].astype(np.float32) @ centroids.T).argmin(axis=1)
+        for start in range(0, len(codes), chunk_size)
+    ]) if len(codes) else np.empty(0, dtype=np.int64)
+
+
+def train_centroids(codes: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Lloyd's k-means over a sample of codes, in code units. Empty lists are
+    re-seeded with random profiles so every list keeps a centroid.
+    """
+    rng = np.random.RandomState(seed)
+    sample = codes.astype(np.float32)
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(sample, centroids, (centroids ** 2).sum(axis=1))
+        counts = np.bincount(assignment, minlength=n_lists)
+        sums = np.stack([np.bincount(assignment, sample[:, j], minlength=n_lists)
+                         for j in range(sample.shape[1])], axis=1)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, np.newaxis]
+        centroids[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+    return centroids
+
+
+class ProfileIndex:
+    """
+    Approximate k-nearest-neighbour search over stored profiles (Big Five
+    and facet scores), as an IVF-flat index: k-means centroids split the
+    profiles into lists, and a query scans only the lists of its nprobe
+    nearest centroids. Profiles are held as one byte per score, so ten
+    million 35-score profiles take 350 MB, and their lists are stored
+    contiguously (sorted by list, with offsets), so a list is a slice of
+    the arrays and a saved index can be memory-mapped.
+
+    add() appends to a buffer that queries scan as well; it is merged into
+    the lists when it reaches COMPACT_FRACTION of the index, or on save.
+    Searches only read, so they can run concurrently; add() cannot.
+    """
+
+    def __init__(self, features: Sequence[str], centroids: np.ndarray, nprobe: int = DEFAULT_NPROBE):
+        self.features = tuple(features)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.centroid_norms = (self.centroids ** 2).sum(axis=1)
+        self.nprobe = nprobe
+        n_lists = len(self.centroids)
+        self.offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        self.codes = np.empty((0, len(self.features)), dtype=np.uint8)
+        self.norms = np.empty(0, dtype=np.float32)
+        self.ids = np.empty(0, dtype='S1')
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending_count = 0
+
+    def __len__(self) -> int:
+        return len(self.codes) + self._pending_count
+
+    @classmethod
+    def build(cls, ids: Sequence[str], vectors: np.ndarray, features: Sequence[str], n_lists: Optional[int] = None,
+              sample_size: Optional[int] = None, iterations: int = 10, seed: int = 0,
+              nprobe: int = DEFAULT_NPROBE) -> 'ProfileIndex':
+        """
+        Index (N, features) score vectors under their ids. n_lists defaults
+        to about sqrt(N); the centroids are trained on sample_size profiles
+        (default 64 per list).
+        """
+        codes = encode(vectors)
+        if len(codes) == 0:
+            raise ValueError("Cannot build a profile index without profiles")
+        n_lists = min(n_lists or max(1, int(round(math.sqrt(len(codes))))), len(codes))
+        sample_size = min(sample_size or 64 * n_lists, len(codes))
+        rng = np.random.RandomState(seed)
+        sample = codes[np.sort(rng.choice(len(codes), sample_size, replace=False))]
+        index = cls(features, train_centroids(sample, n_lists, iterations, seed), nprobe)
+        index._insert(codes, _id_array(ids))
+        return index
+
+    def assign(self, codes: np.ndarray) -> np.ndarray:
+        return _nearest(codes, self.centroids, self.centroid_norms)
+
+    def _insert(self, codes: np.ndarray, ids: np.ndarray, lists: Optional[np.ndarray] = None):
+        # Merge new profiles into the sorted lists
+        lists = np.concatenate([np.repeat(np.arange(len(self.centroids)), np.diff(self.offsets)),
+                                self.assign(codes) if lists is None else lists])
+        if len(self.codes):
+            codes = np.concatenate([self.codes, codes])
+            ids = np.concatenate([self.ids, ids])
+        order = np.argsort(lists, kind='stable')
+        self.codes = codes[order]
+        self.ids = ids[order]
+        self.norms = _norms(self.codes)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=len(self.centroids)))])
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        codes = encode(vectors)
+        self._pending.append((codes, _id_array(ids), self.assign(codes)))
+        self._pending_count += len(codes)
+        if self._pending_count >= COMPACT_FRACTION * len(self.codes):
+            self.compact()
+
+    def compact(self):
+        if not self._pending:
+            return
+        codes = np.concatenate([codes for codes, _, _ in self._pending])
+        ids = np.concatenate([ids for _, ids, _ in self._pending])
+        lists = np.concatenate([lists for _, _, lists in self._pending])
+        self._pending = []
+        self._pending_count = 0
+        self._insert(codes, ids, lists)
+
+    def search(self, vector: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+               exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Up to k (id, distance) pairs, nearest first, with each id once (its
+        nearest profile) and exclude left out. Distances are the root mean
+        square score difference, in score points.
+        """
+        query = np.asarray(vector, dtype=np.float32) * SCALE
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        centroid_distances = self.centroid_norms - 2 * self.centroids @ query
+        probed = np.argpartition(centroid_distances, nprobe - 1)[:nprobe]
+
+        # Lists are slices, scored in place; ids are only looked up for the candidates
+        distances, positions = [], []
+        for l in probed.tolist():
+            first, last = self.offsets[l], self.offsets[l + 1]
+            if last > first:
+                distances.append(self.norms[first:last] - 2 * (self.codes[first:last].astype(np.float32) @ query))
+                positions.append(np.arange(first, last))
+        pending_ids = self.ids[:0]
+        if self._pending:
+            pending_ids = np.concatenate([pending for _, pending, _ in self._pending])
+            codes = np.concatenate([codes for codes, _, _ in self._pending])
+            mask = np.isin(np.concatenate([lists for _, _, lists in self._pending]), probed)
+            codes = codes[mask]
+            distances.append(_norms(codes) - 2 * (codes.astype(np.float32) @ query))
+            positions.append(len(self.ids) + np.flatnonzero(mask))
+        if not distances:
+            return []
+        distances = np.concatenate(distances) + query @ query
+        positions = np.concatenate(positions)
+
+        # A few spare candidates cover repeated and excluded ids
+        wanted = min(2 * k + 8, len(distances))
+        candidates = np.argpartition(distances, wanted - 1)[:wanted] if wanted < len(distances) else np.arange(wanted)
+        excluded = exclude.encode() if exclude is not None else None
+        for attempt in (candidates, np.arange(len(distances))):
+            neighbours: Dict[bytes, float] = {}
+            for i in attempt[np.argsort(distances[attempt], kind='stable')].tolist():
+                position = positions[i]
+                id_ = self.ids[position] if position < len(self.ids) else pending_ids[position - len(self.ids)]
+                if id_ != excluded and id_ not in neighbours:
+                    neighbours[id_] = float(distances[i])
+                    if len(neighbours) == k:
+                        break
+            if len(neighbours) == k or len(attempt) == len(distances):
+                break
+        scale = SCALE * math.sqrt(len(self.features))
+        return [(id_.decode(), math.sqrt(max(distance, 0.0)) / scale) for id_, distance in neighbours.items()]
+
+    def save(self, directory: str):
+        """
+        Writes the index as .npy arrays plus index.json, each through a
+        temporary file and a rename. index.json goes last, and load() checks
+        its profile count against the arrays. A server that has the old files
+        memory-mapped keeps reading them until it reloads.
+        """
+        self.compact()
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            temporary = os.path.join(directory, f"{name}.tmp.npy")
+            np.save(temporary, getattr(self, name))
+            os.replace(temporary, os.path.join(directory, f"{name}.npy"))
+        temporary = os.path.join(directory, 'index.json.tmp')
+        with open(temporary, 'w') as f:
+            json.dump({'format': INDEX_FORMAT, 'features': list(self.features), 'profiles': len(self.codes),
+                       'lists': len(self.centroids), 'nprobe': self.nprobe}, f, indent=2)
+        os.replace(temporary, os.path.join(directory, 'index.json'))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'ProfileIndex':
+        path = os.path.join(directory, 'index.json')
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Profile index not found at: {directory}")
+        with open(path, 'r') as f:
+            meta = json.load(f)
+        if meta.get('format') != INDEX_FORMAT:
+            raise ValueError(f"Not a profile index (expected format '{INDEX_FORMAT}')")
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r' if mmap else None)
+                  for name in ARRAYS}
+        index = cls(meta['features'], np.array(arrays['centroids']), meta.get('nprobe', DEFAULT_NPROBE))
+        index.offsets = np.array(arrays['offsets'])
+        index.codes, index.norms, index.ids = arrays['codes'], arrays['norms'], arrays['ids']
+        if len(index.codes) != meta['profiles'] or index.offsets[-1] != meta['profiles']:
+            raise ValueError(f"Profile index at {directory} is incomplete")
+        return index
+
+
+def read_profiles(results: Iterable[Tuple[str, Dict]], features: Sequence[str],
+                  chunk_size: int = 100000) -> Iterable[Tuple[List[str], np.ndarray, int]]:
+    # Chunks of (ids, vectors, skipped) from (id, result) pairs; results without every feature are skipped
+    ids: List[str] = []
+    rows: List[np.ndarray] = []
+    skipped = 0
+    for id_, result in results:
+        try:
+            rows.append(profile_vector(result.get('big_five') or {}, features))
+        except ValueError:
+            skipped += 1
+            continue
+        ids.append(id_)
+        if len(ids) == chunk_size:
+            yield ids, np.array(rows), skipped
+            ids, rows, skipped = [], [], 0
+    if ids or skipped:
+        yield ids, np.array(rows).reshape(-1, len(features)), skipped
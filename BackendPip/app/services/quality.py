@@ -0,0 +1,181 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.irt import GradedResponseModel
+from app.services.scoring_plan import ScoringPlan
+
+# A submission is flagged when any index crosses its cutoff. On synthetic GRM
+# respondents (benchmarks/synthetic.py) each cutoff flags at most ~2.5% of
+# attentive submissions per trait profile
+LONGSTRING_LIMIT = 12  # identical consecutive Likert answers, in question bank order
+IRV_MIN = 1.0  # standard deviation of the Likert answers on the 1-7 scale
+EVEN_ODD_MIN = -0.2  # Spearman-Brown corrected even-odd consistency across facets
+MAHALANOBIS_MAX = 20.52  # squared distance, chi-squared with 5 df at p = .001
+LZ_MIN = -1.96  # standardized log-likelihood person fit
+
+
+class ResponseQualityModel:
+    """
+    Careless-responding indices for an (N, n_items) response matrix, all
+    vectorized across rows:
+
+    - longstring: the longest run of identical Likert answers, skipping
+      unanswered items
+    - irv: intra-individual response variability, the standard deviation
+      of the Likert answers
+    - even_odd: the correlation across facets between the means of each
+      facet's odd and even items, Spearman-Brown corrected
+    - mahalanobis: squared distance of the Big Five scores from the norm
+      group mean under its covariance, computed by the caller; None for
+      groups whose norms were not built from scored data
+    - person_fit_lz: the polytomous lz statistic of the GRM at the EAP
+      theta of each dimension
+
+    statistics() takes what is needed from the responses; assess() turns it
+    into indices and flags once the scores are known.
+    """
+
+    def __init__(self, plan: ScoringPlan, irt_model: GradedResponseModel):
+        self.plan = plan
+        self.irt_model = irt_model
+        self.dimensions = plan.dimensions
+
+        # Even-odd halves: alternate items of each facet, in question bank order
+        facet_column = plan.facet_membership.argmax(axis=1)
+        seen = np.zeros(len(plan.facet_keys), dtype=np.intp)
+        half = np.empty(len(facet_column), dtype=np.intp)
+        for position, column in enumerate(facet_column):
+            half[position] = seen[column] % 2
+            seen[column] += 1
+        self.odd_membership = plan.facet_membership * (half == 0)[:, np.newaxis]
+        self.even_membership = plan.facet_membership * (half == 1)[:, np.newaxis]
+
+        # lz: each item's expected log-probability and its variance on the theta grid
+        probabilities = irt_model.probabilities
+        log_probabilities = irt_model.log_probabilities
+        self.expected = (probabilities * log_probabilities).sum(axis=1)
+        self.variance = (probabilities * log_probabilities ** 2).sum(axis=1) - self.expected ** 2
+
+    def statistics(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        plan = self.plan
+        likert = X[:, plan.likert_idx]
+        answered = ~np.isnan(likert)
+
+        # Longstring: a run grows at an answer equal to the previous answer and
+        # restarts at a different one; unanswered items neither extend nor break it
+        columns = np.arange(likert.shape[1])
+        last = np.maximum.accumulate(np.where(answered, columns, -1), axis=1)
+        previous = np.concatenate([np.full((len(X), 1), -1), last[:, :-1]], axis=1)
+        previous_value = np.take_along_axis(likert, np.maximum(previous, 0), axis=1)
+        repeat = answered & (previous >= 0) & (likert == previous_value)
+        restart = answered & ~repeat
+        repeats = np.cumsum(repeat, axis=1)
+        run = repeats - np.maximum.accumulate(np.where(restart, repeats, 0), axis=1)
+        longstring = np.where(answered.any(axis=1), run.max(axis=1) + 1, 0)
+
+        counts = answered.sum(axis=1)
+        values = np.where(answered, likert, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = values.sum(axis=1) / counts
+            irv = np.sqrt((np.where(answered, likert - mean[:, np.newaxis], 0.0) ** 2).sum(axis=1) / counts)
+
+        keyed, facet_answered = plan._keyed(X[:, plan.facet_idx], plan.facet_reverse)
+        halves = tuple(
+            (keyed @ membership, facet_answered @ membership)
+            for membership in (self.odd_membership, self.even_membership)
+        )
+
+        return {
+            'longstring': longstring,
+            'irv': irv,
+            'halves': halves,
+            # Keyed items with a valid answer, for the lz expectation and variance
+            'answered': self.irt_model.categories(X) >= 0
+        }
+
+    def _grid_position(self, theta: np.ndarray):
+        # Grid index below each theta and the fraction of the step beyond it
+        grid = self.irt_model.grid
+        position = (np.minimum(np.maximum(theta, grid[0]), grid[-1]) - grid[0]) / (grid[1] - grid[0])
+        index = np.minimum(position.astype(np.intp), len(grid) - 2)
+        return index, position - index
+
+    def person_fit(self, answered: np.ndarray, log_likelihood: np.ndarray, theta: np.ndarray) -> np.ndarray:
+        """
+        Polytomous lz: the log-likelihood of the answers at the EAP thetas,
+        standardized by its expectation and variance under the GRM.
+        """
+        irt = self.irt_model
+        index, fraction = self._grid_position(theta)
+        rows = np.arange(len(theta))[:, np.newaxis]
+        observed = log_likelihood[rows, np.arange(theta.shape[1]), index]
+        observed = observed + (log_likelihood[rows, np.arange(theta.shape[1]), index + 1] - observed) * fraction
+
+        # Each answered item's moments at the theta of its dimension
+        item_index = index[:, irt.item_dimension]
+        item_fraction = fraction[:, irt.item_dimension]
+        moments = []
+        for table in (self.expected, self.variance):
+            lower = table[irt.item_range, item_index]
+            at_theta = lower + (table[irt.item_range, item_index + 1] - lower) * item_fraction
+            moments.append(np.where(answered, at_theta, 0.0).sum(axis=1))
+        expected, variance = moments
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(variance > 0, (observed.sum(axis=1) - expected) / np.sqrt(variance), np.nan)
+
+    def even_odd(self, halves) -> np.ndarray:
+        (odd_sums, odd_counts), (even_sums, even_counts) = halves
+        valid = (odd_counts > 0) & (even_counts > 0)
+        weights = valid.astype(np.float64)
+        n = weights.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            odd = np.where(valid, odd_sums / odd_counts, 0.0)
+            even = np.where(valid, even_sums / even_counts, 0.0)
+            odd_centered = np.where(valid, odd - (odd * weights).sum(axis=1, keepdims=True) / n[:, np.newaxis], 0.0)
+            even_centered = np.where(valid, even - (even * weights).sum(axis=1, keepdims=True) / n[:, np.newaxis],
+                                     0.0)
+            r = ((odd_centered * even_centered).sum(axis=1)
+                 / np.sqrt((odd_centered ** 2).sum(axis=1) * (even_centered ** 2).sum(axis=1)))
+            corrected = 2 * r / (1 + r)
+        # Undefined with fewer than three facets or no variation (e.g. straight-lining)
+        return np.where((n >= 3) & np.isfinite(corrected), corrected, np.nan)
+
+    def assess(self, statistics: Dict[str, np.ndarray], log_likelihood: np.ndarray, theta: np.ndarray,
+               mahalanobis: np.ndarray) -> List[Dict]:
+        """
+        Indices and flags per row, from statistics(), the GRM log-likelihood
+        curves, EAP thetas and the squared Mahalanobis distance of each row's
+        Big Five scores (NaN where the norm group has no covariance).
+        """
+        even_odd = self.even_odd(statistics['halves'])
+
+        lz = self.person_fit(statistics['answered'], log_likelihood, theta)
+
+        results = []
+        for row in range(len(mahalanobis)):
+            quality = {
+                'longstring': int(statistics['longstring'][row]),
+                'irv': _rounded(statistics['irv'][row], 3),
+                'even_odd_consistency': _rounded(even_odd[row], 3),
+                'mahalanobis_d2': _rounded(mahalanobis[row], 2),
+                'person_fit_lz': _rounded(lz[row], 2)
+            }
+            flags = []
+            if quality['longstring'] >= LONGSTRING_LIMIT:
+                flags.append('longstring')
+            if quality['irv'] is not None and quality['irv'] < IRV_MIN:
+                flags.append('low_variability')
+            if quality['even_odd_consistency'] is not None and quality['even_odd_consistency'] < EVEN_ODD_MIN:
+                flags.append('inconsistent')
+            if quality['mahalanobis_d2'] is not None and quality['mahalanobis_d2'] > MAHALANOBIS_MAX:
+                flags.append('multivariate_outlier')
+            if quality['person_fit_lz'] is not None and quality['person_fit_lz'] < LZ_MIN:
+                flags.append('person_misfit')
+            quality['flags'] = flags
+            results.append(quality)
+        return results
+
+
+def _rounded(value: float, digits: int) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.models.assessment import AssessmentLayer, Question
+
+logger = logging.getLogger(__name__)
+
+LAYER_ORDER = (AssessmentLayer.PRIMARY.value, AssessmentLayer.SECONDARY.value, AssessmentLayer.TERTIARY.value)
+
+
+class QuestionBankSnapshot:
+    """Immutable, validated view of one version of questions.json."""
+
+    def __init__(self, raw: bytes, mtime: float):
+        data = json.loads(raw)
+        questions = tuple(data['questions'])
+
+        self.version = hashlib.sha256(raw).hexdigest()[:12]
+        self.mtime = mtime
+        self.questions = questions
+        self.by_id: Dict[str, Dict] = {}
+
+        layers: Dict[str, List[int]] = {layer: [] for layer in LAYER_ORDER}
+        fragments: List[bytes] = []
+
+        for position, question in enumerate(questions):
+            # Validate once here instead of on every request
+            model = Question(**question)
+            if model.id in self.by_id:
+                raise ValueError(f"Duplicate question id in question bank: {model.id}")
+            self.by_id[model.id] = question
+            layers[model.assessment_layer.value].append(position)
+            fragments.append(model.model_dump_json().encode('utf-8'))
+
+        self.layers: Dict[str, Tuple[int, ...]] = {layer: tuple(ids) for layer, ids in layers.items()}
+        self.fragments: Tuple[bytes, ...] = tuple(fragments)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def shuffled_order(self, user_seed: Optional[str] = None) -> List[int]:
+        # Shuffling index lists consumes the RNG exactly like shuffling the
+        # question lists did, so seeded orders stay stable for saved progress
+        rng = random.Random(user_seed) if user_seed else random
+        order: List[int] = []
+        for layer in LAYER_ORDER:
+            positions = list(self.layers[layer])
+            rng.shuffle(positions)
+            order.extend(positions)
+        return order
+
+    def render_start_response(self, user_seed: Optional[str] = None) -> bytes:
+        order = self.shuffled_order(user_seed)
+        fragments = self.fragments
+        return b''.join((
+            b'{"questions":[',
+            b','.join([fragments[i] for i in order]),
+            b'],"total_questions":',
+            str(len(order)).encode('ascii'),
+            b'}'
+        ))
+
+
+class QuestionBank:
+    """
+    Loads questions.json once and serves immutable snapshots of it.
+    The file's mtime is checked on access so edits are picked up without a restart.
+    """
+
+    def __init__(self, questions_path: Optional[str] = None):
+        if questions_path is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            questions_path = os.path.join(current_dir, '../../questions/questions.json')
+        self.questions_path = questions_path
+        self._lock = threading.Lock()
+        self._snapshot = self._load()
+        # mtime of a version that failed to load, so it is not re-parsed on every access
+        self._failed_mtime: Optional[float] = None
+
+    def _load(self) -> QuestionBankSnapshot:
+        if not os.path.exists(self.questions_path):
+            raise FileNotFoundError(f"Questions file not found at: {self.questions_path}")
+
+        mtime = os.stat(self.questions_path).st_mtime
+        with open(self.questions_path, 'rb') as f:
+            raw = f.read()
+        return QuestionBankSnapshot(raw, mtime)
+
+    def reload(self) -> QuestionBankSnapshot:
+        with self._lock:
+            self._snapshot = self._load()
+            return self._snapshot
+
+    def refresh_if_changed(self) -> bool:
+        try:
+            mtime = os.stat(self.questions_path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._snapshot.mtime or mtime == self._failed_mtime:
+            return False
+        with self._lock:
+            if mtime in (self._snapshot.mtime, self._failed_mtime):
+                return False
+            try:
+                self._snapshot = self._load()
+            except (OSError, ValueError, KeyError, TypeError):
+                # Keep serving the last good snapshot while the file is being
+                # rewritten or fails validation; the next write retries
+                self._failed_mtime = mtime
+                logger.exception("Could not reload %s, keeping version %s",
+                                 self.questions_path, self._snapshot.version)
+                return False
+            self._failed_mtime = None
+        return True
+
+    @property
+    def snapshot(self) -> QuestionBankSnapshot:
+        self.refresh_if_changed()
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self.snapshot.version
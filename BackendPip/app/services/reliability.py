@@ -0,0 +1,282 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from app.services.irt import item_information, parameter_arrays
+from app.services.scoring_plan import ScoringPlan
+
+STATS_FORMAT = 'reliability-stats/1'
+REPORT_FORMAT = 'reliability-report/1'
+
+# Theta points of the reported test information curves
+INFORMATION_GRID = np.linspace(-4.0, 4.0, 33)
+
+
+class ItemStatistics:
+    """
+    Mergeable sufficient statistics for the pairwise-complete covariances of
+    the keyed items, fed from (rows, items) category chunks (0-based, keyed,
+    -1 where unanswered). For every item pair (i, j) over the respondents
+    who answered both: the count, the sum and sum of squares of item i, and
+    the sum of cross products. All four are (items, items) matrices of
+    integer sums, so chunks and shards add up exactly in any order and the
+    memory held does not grow with the number of respondents.
+    """
+
+    def __init__(self, item_ids: Sequence[str], version: str = ''):
+        self.item_ids = tuple(item_ids)
+        self.version = version
+        k = len(self.item_ids)
+        self.respondents = 0
+        self.counts = np.zeros((k, k))
+        self.sums = np.zeros((k, k))
+        self.squares = np.zeros((k, k))
+        self.products = np.zeros((k, k))
+
+    def update(self, categories: np.ndarray):
+        # Integer-valued float64 products are exact well past any realistic sample size
+        answered = (categories >= 0).astype(np.float64)
+        values = np.where(categories >= 0, categories, 0).astype(np.float64)
+        self.respondents += len(categories)
+        self.counts += answered.T @ answered
+        self.sums += values.T @ answered
+        self.squares += (values ** 2).T @ answered
+        self.products += values.T @ values
+
+    def merge(self, other: 'ItemStatistics') -> 'ItemStatistics':
+        if other.item_ids != self.item_ids:
+            raise ValueError("Cannot merge item statistics over different items")
+        self.respondents += other.respondents
+        self.counts += other.counts
+        self.sums += other.sums
+        self.squares += other.squares
+        self.products += other.products
+        return self
+
+    def covariance(self) -> np.ndarray:
+        """
+        Pairwise-complete covariance matrix: each entry from the respondents
+        who answered both items, with each item's mean and spread over those
+        same respondents. NaN where fewer than two did.
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = (self.products - self.sums * self.sums.T / self.counts) / (self.counts - 1)
+        return np.where(self.counts > 1, covariance, np.nan)
+
+    def correlation(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = (self.products - self.sums * self.sums.T / self.counts) / (self.counts - 1)
+            variance = (self.squares - self.sums ** 2 / self.counts) / (self.counts - 1)
+            correlation = covariance / np.sqrt(variance * variance.T)
+        correlation = np.where((self.counts > 1) & np.isfinite(correlation), correlation, np.nan)
+        np.fill_diagonal(correlation, 1.0)
+        return correlation
+
+    def to_dict(self) -> Dict:
+        return {
+            'format': STATS_FORMAT,
+            'version': self.version,
+            'item_ids': list(self.item_ids),
+            'respondents': self.respondents,
+            **{name: getattr(self, name).astype(np.int64).tolist()
+               for name in ('counts', 'sums', 'squares', 'products')}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ItemStatistics':
+        if data.get('format') != STATS_FORMAT:
+            raise ValueError(f"Not an item statistics file (expected format '{STATS_FORMAT}')")
+        statistics = cls(data['item_ids'], data.get('version', ''))
+        statistics.respondents = data['respondents']
+        for name in ('counts', 'sums', 'squares', 'products'):
+            setattr(statistics, name, np.array(data[name], dtype=np.float64))
+        return statistics
+
+
+def one_factor_loadings(correlation: np.ndarray, max_iter: int = 200, tolerance: float = 1e-6) -> np.ndarray:
+    """
+    Standardized loadings of a single common factor by iterated principal
+    axis factoring, starting from squared multiple correlations.
+    Communalities are kept below 1 so Heywood cases stay finite.
+    """
+    try:
+        communalities = 1 - 1 / np.diag(np.linalg.inv(correlation))
+    except np.linalg.LinAlgError:
+        communalities = np.full(len(correlation), 0.5)
+    communalities = np.clip(communalities, 0.005, 0.995)
+    for _ in range(max_iter):
+        reduced = correlation.copy()
+        np.fill_diagonal(reduced, communalities)
+        values, vectors = np.linalg.eigh(reduced)
+        loadings = vectors[:, -1] * np.sqrt(max(values[-1], 0.0))
+        updated = np.clip(loadings ** 2, 0.005, 0.995)
+        converged = np.abs(updated - communalities).max() < tolerance
+        communalities = updated
+        if converged:
+            break
+    # The eigenvector's sign is arbitrary; keyed items should load positively
+    return loadings if loadings.sum() >= 0 else -loadings
+
+
+def scale_reliability(covariance: np.ndarray, correlation: np.ndarray) -> Dict:
+    """
+    Internal consistency of the unit-weighted sum of a set of items, from
+    their covariance and correlation matrices: Cronbach's alpha (raw and
+    standardized), McDonald's omega total from a one-factor model, the mean
+    inter-item correlation, and per item the corrected item-total
+    correlation, alpha if the item were dropped and its factor loading.
+    """
+    k = len(covariance)
+    if k < 2 or np.isnan(covariance).any() or np.isnan(correlation).any():
+        return {'items': k, 'alpha': None, 'standardized_alpha': None, 'omega': None,
+                'mean_inter_item_r': None, 'item_total_r': [None] * k, 'alpha_if_deleted': [None] * k,
+                'loadings': [None] * k}
+
+    variances = np.diag(covariance)
+    total = covariance.sum()
+    alpha = k / (k - 1) * (1 - variances.sum() / total)
+    mean_r = (correlation.sum() - k) / (k * (k - 1))
+    standardized_alpha = k * mean_r / (1 + (k - 1) * mean_r)
+
+    # Omega on the raw scale: loadings and uniquenesses in item units
+    loadings = one_factor_loadings(correlation)
+    common = (loadings * np.sqrt(variances)).sum() ** 2
+    unique = ((1 - loadings ** 2) * variances).sum()
+    omega = common / (common + unique)
+
+    # Item against the sum of the other items, and alpha without it
+    row_sums = covariance.sum(axis=1)
+    rest_variance = total - 2 * row_sums + variances
+    with np.errstate(invalid='ignore', divide='ignore'):
+        item_total = (row_sums - variances) / np.sqrt(variances * rest_variance)
+        if k > 2:
+            alpha_if_deleted = (k - 1) / (k - 2) * (1 - (variances.sum() - variances) / rest_variance)
+        else:
+            alpha_if_deleted = np.full(k, np.nan)
+
+    return {
+        'items': k,
+        'alpha': _rounded(alpha),
+        'standardized_alpha': _rounded(standardized_alpha),
+        'omega': _rounded(omega),
+        'mean_inter_item_r': _rounded(mean_r),
+        'item_total_r': [_rounded(value) for value in item_total],
+        'alpha_if_deleted': [_rounded(value) for value in alpha_if_deleted],
+        'loadings': [_rounded(value) for value in loadings]
+    }
+
+
+def test_information(discrimination: np.ndarray, thresholds: np.ndarray,
+                     theta: np.ndarray = INFORMATION_GRID) -> Dict:
+    """
+    GRM test information curve of a set of items and the standard error of
+    theta along it, plus the marginal reliability over a standard normal
+    population: 1 minus the average posterior variance 1 / (1 + I(theta)).
+    """
+    information = item_information(discrimination, thresholds, theta).sum(axis=0)
+    # Dense standard normal quadrature for the marginal reliability
+    nodes = np.linspace(-4.0, 4.0, 161)
+    weights = np.exp(-0.5 * nodes ** 2)
+    weights /= weights.sum()
+    posterior_variance = 1 / (1 + item_information(discrimination, thresholds, nodes).sum(axis=0))
+    return {
+        'theta': [round(float(value), 2) for value in theta],
+        'information': [round(float(value), 3) for value in information],
+        'standard_error': [round(float(value), 3) for value in 1 / np.sqrt(information)],
+        'peak_theta': round(float(theta[information.argmax()]), 2),
+        'marginal_reliability': _rounded(1 - (weights * posterior_variance).sum())
+    }
+
+
+def reliability_report(statistics: ItemStatistics, plan: ScoringPlan, item_parameters: Optional[Dict] = None,
+                       include_correlations: bool = True) -> Dict:
+    """
+    Reliability of every Big Five dimension and facet in the question bank,
+    from accumulated ItemStatistics over its keyed items. Test information
+    curves come from the item parameters when given. Values are rounded and
+    ordered as in the question bank, so the same statistics always give the
+    same report.
+    """
+    item_ids = [plan.item_ids[i] for i in plan.keyed_idx]
+    if list(statistics.item_ids) != item_ids:
+        raise ValueError("Item statistics do not match the question bank's keyed items")
+
+    covariance = statistics.covariance()
+    correlation = statistics.correlation()
+    item_dimension = plan.dimension_membership.argmax(axis=1)
+    facet_of = dict(zip(plan.facet_idx.tolist(), plan.facet_membership.argmax(axis=1).tolist()))
+    item_facet = np.array([facet_of.get(i, -1) for i in plan.keyed_idx.tolist()])
+    if item_parameters is not None:
+        discrimination, thresholds = parameter_arrays(item_parameters, item_ids)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.diag(statistics.sums) / np.diag(statistics.counts)
+    standard_deviations = np.sqrt(np.diag(covariance))
+
+    dimensions = {}
+    for d, dimension in enumerate(plan.dimensions):
+        items = np.flatnonzero(item_dimension == d)
+        if len(items) == 0:
+            continue
+        block = np.ix_(items, items)
+        summary = scale_reliability(covariance[block], correlation[block])
+
+        facets = {}
+        for f in dict.fromkeys(item_facet[items].tolist()):
+            if f < 0:
+                continue
+            facet_items = items[item_facet[items] == f]
+            facet_block = np.ix_(facet_items, facet_items)
+            facet_summary = scale_reliability(covariance[facet_block], correlation[facet_block])
+            facets[plan.facet_keys[f][1]] = {
+                key: facet_summary[key]
+                for key in ('items', 'alpha', 'standardized_alpha', 'omega', 'mean_inter_item_r')
+            }
+
+        report = {
+            'respondents': int(np.diag(statistics.counts)[items].max()),
+            **{key: summary[key] for key in ('items', 'alpha', 'standardized_alpha', 'omega', 'mean_inter_item_r')},
+            'facets': facets,
+            'item_statistics': [
+                {
+                    'id': item_ids[i],
+                    'facet': plan.facet_keys[item_facet[i]][1] if item_facet[i] >= 0 else None,
+                    'respondents': int(statistics.counts[i, i]),
+                    # Keyed answers back on the 1-7 scale
+                    'mean': _rounded(means[i] + 1),
+                    'sd': _rounded(standard_deviations[i]),
+                    'item_total_r': item_total,
+                    'alpha_if_deleted': if_deleted,
+                    'loading': loading
+                }
+                for i, item_total, if_deleted, loading in zip(
+                    items, summary['item_total_r'], summary['alpha_if_deleted'], summary['loadings'])
+            ]
+        }
+        if include_correlations:
+            report['correlations'] = {
+                'items': [item_ids[i] for i in items],
+                'matrix': [[_rounded(value) for value in row] for row in correlation[block]]
+            }
+        if item_parameters is not None:
+            report['information'] = test_information(discrimination[items], thresholds[items])
+        dimensions[dimension] = report
+
+    return {
+        'format': REPORT_FORMAT,
+        'question_bank_version': plan.version,
+        'item_parameters_version': item_parameters.get('version', '') if item_parameters is not None else None,
+        'respondents': statistics.respondents,
+        'dimensions': dimensions
+    }
+
+
+def merge_statistics(statistics: Sequence[ItemStatistics]) -> ItemStatistics:
+    merged = ItemStatistics(statistics[0].item_ids, statistics[0].version)
+    for part in statistics:
+        merged.merge(part)
+    return merged
+
+
+def _rounded(value: float, digits: int = 3) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.models.assessment import QuestionResponse
+
+# Bump when the pipeline's output changes for the same inputs and versions,
+# so results cached by older code are not served
+RESULTS_FORMAT = 'results/4'
+
+
+def submission_key(responses: List[QuestionResponse], norm_group: Optional[str], versions: Dict[str, str]) -> str:
+    """
+    Content hash of a submission: its responses sorted by question (a stable
+    sort, so repeated answers keep their order), the norm group and the
+    versions of everything else the result depends on.
+    """
+    canonical = {
+        'format': RESULTS_FORMAT,
+        'versions': versions,
+        'norm_group': norm_group,
+        'responses': [
+            [r.question_id, r.response_value, r.selected_option]
+            for r in sorted(responses, key=lambda r: r.question_id)
+        ]
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def vector_key(vector: np.ndarray, norm_group: Optional[str], versions: Dict[str, str]) -> str:
+    """
+    Content hash of a submission already encoded against the question bank
+    (e.g. a binary request body): the response vector's bytes, the norm
+    group and versions.
+    """
+    canonical = {'format': RESULTS_FORMAT, 'versions': versions, 'norm_group': norm_group}
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded + np.ascontiguousarray(vector, dtype=np.float64).tobytes()).hexdigest()
+
+
+class ResultCache:
+    """
+    Serialized results by submission_key: an in-memory LRU of up to
+    max_entries, backed by an optional directory of one file per key that
+    survives restarts and is shared between workers. A memory miss that hits
+    on disk is promoted back into memory.
+
+    The directory is held to max_disk_bytes: once the files written exceed
+    it, the least recently used files (by mtime, which a disk hit refreshes)
+    are deleted down to nine tenths of the cap. Keys change with every
+    version bump, so this is also what clears out results of older versions.
+    """
+
+    def __init__(self, max_entries: int = 1024, directory: Optional[str] = None,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.disk_entries = 0
+        self.disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.sweep()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self._read(key) if self.directory else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, key: str, value: bytes):
+        with self._lock:
+            self._store(key, value)
+        if self.directory:
+            self._write(key, value)
+
+    def _store(self, key: str, value: bytes):
+        # Caller holds the lock
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = f.read()
+        except OSError:
+            return None
+        try:
+            # Mark the file recently used, so the sweep keeps it
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def _write(self, key: str, value: bytes):
+        # Write to a temporary file and rename, so readers never see a partial file
+        # The disk tier is best effort; the memory tier already holds the result
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(value)
+            os.replace(temporary, path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+        with self._disk_lock:
+            self.disk_entries += 1
+            self.disk_bytes += len(value)
+            over = self.disk_bytes > self.max_disk_bytes
+        if over:
+            self.sweep()
+
+    def _disk_files(self) -> List[os.DirEntry]:
+        files = []
+        try:
+            shards = [entry for entry in os.scandir(self.directory) if entry.is_dir()]
+        except OSError:
+            return files
+        for shard in shards:
+            try:
+                files.extend(entry for entry in os.scandir(shard.path) if entry.name.endswith('.json'))
+            except OSError:
+                continue
+        return files
+
+    def sweep(self):
+        """
+        Recount the directory, which other workers write to as well, and if it
+        is over max_disk_bytes delete the least recently used files down to
+        nine tenths of the cap.
+        """
+        with self._disk_lock:
+            files = []
+            for entry in self._disk_files():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in files)
+            removed = 0
+            if total > self.max_disk_bytes:
+                target = self.max_disk_bytes * 0.9
+                for _, size, path in sorted(files):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    removed += 1
+            self.disk_evictions += removed
+            self.disk_entries = len(files) - removed
+            self.disk_bytes = total
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': sum(len(value) for value in self._entries.values()),
+                'disk': self.directory is not None,
+                'disk_entries': self.disk_entries,
+                'disk_bytes': self.disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes,
+                'disk_evictions': self.disk_evictions,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
@@ -1,17 +1,37 @@
 import numpy as np
-from scipy.stats import norm
-from scipy.optimize import minimize
-from sklearn.mixture import GaussianMixture
-from sklearn.preprocessing import StandardScaler
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Sequence, Union
 from app.models.assessment import QuestionResponse, BigFiveDimension
+from app.services.clusters import GaussianMixtureClassifier, load_cluster_model
+from app.services.irt import GradedResponseModel, load_item_parameters
+from app.services.mbti import TypePosterior
+from app.services.metrics import NULL_TIMER
+from app.services.norms import NormRegistry, load_norm_groups, z_critical
+from app.services.quality import ResponseQualityModel
+from app.services.question_bank import QuestionBank
+from app.services.scoring_plan import ScoringPlan
 import json
 import os
 
+# Either a list of responses or a response vector already encoded by ScoringPlan
+ResponseInput = Union[List[QuestionResponse], np.ndarray]
+
+# One norm group for every row, or one per row
+NormGroups = Union[str, Sequence[Optional[str]], None]
+
 class ScoringService:
-    def __init__(self):
-        self.questions = self._load_questions()
+    def __init__(self, question_bank: Optional[QuestionBank] = None, item_parameters_path: Optional[str] = None,
+                 norm_groups_dir: Optional[str] = None, max_norm_tables: int = 32,
+                 cluster_model_path: Optional[str] = None):
+        self.question_bank = question_bank or QuestionBank()
+        self._plan = None
+        self._irt_model = None
+        self._quality_model = None
         self.norms = self._load_norms()
+        self.norm_registry = NormRegistry(load_norm_groups(self.norms, norm_groups_dir), self.plan.dimensions,
+                                          max_tables=max_norm_tables)
+        self.item_parameters = load_item_parameters(item_parameters_path)
+        self.cluster_model = GaussianMixtureClassifier(load_cluster_model(cluster_model_path), self.plan.dimensions)
+        self.type_posterior = TypePosterior(self.plan.dimensions, forced_choice_weight=0.7)
         self.function_orders = {
             'INTJ': ['Ni', 'Te', 'Fi', 'Se'],
             'INTP': ['Ti', 'Ne', 'Si', 'Fe'],
@@ -31,16 +51,48 @@ class ScoringService:
             'ESFP': ['Se', 'Fi', 'Te', 'Ni']
         }
 
-    def _load_questions(self) -> Dict:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        questions_path = os.path.join(current_dir, '../../questions/questions.json')
-        
-        if not os.path.exists(questions_path):
-            raise FileNotFoundError(f"Questions file not found at: {questions_path}")
-            
-        with open(questions_path, 'r') as f:
-            data = json.load(f)
-        return {q['id']: q for q in data['questions']}
+    @property
+    def questions(self) -> Dict:
+        return self.question_bank.snapshot.by_id
+
+    @property
+    def plan(self) -> ScoringPlan:
+        # Recompile whenever the question bank picks up a new version
+        snapshot = self.question_bank.snapshot
+        if self._plan is None or self._plan.version != snapshot.version:
+            self._plan = ScoringPlan(snapshot.questions, snapshot.version)
+        return self._plan
+
+    @property
+    def irt_model(self) -> GradedResponseModel:
+        plan = self.plan
+        if self._irt_model is None or self._irt_model.plan_version != plan.version:
+            self._irt_model = GradedResponseModel(self.item_parameters, plan)
+        return self._irt_model
+
+    @property
+    def quality_model(self) -> ResponseQualityModel:
+        irt_model = self.irt_model
+        if self._quality_model is None or self._quality_model.irt_model is not irt_model:
+            self._quality_model = ResponseQualityModel(self.plan, irt_model)
+        return self._quality_model
+
+    def versions(self) -> Dict[str, str]:
+        # Everything besides the responses that a result depends on
+        return {
+            'question_bank': self.plan.version,
+            'item_parameters': self.item_parameters.get('version', ''),
+            'norms': self.norm_registry.fingerprint,
+            'clusters': self.cluster_model.version
+        }
+
+    def encode_responses(self, responses: List[QuestionResponse]) -> np.ndarray:
+        return self.plan.encode(responses)
+
+    def _as_matrix(self, responses: ResponseInput) -> np.ndarray:
+        if isinstance(responses, np.ndarray):
+            return responses.reshape(-1, self.plan.n_items)
+        return self.plan.encode(responses)[np.newaxis, :]
 
     def _load_norms(self) -> Dict:
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -52,199 +104,166 @@ class ScoringService:
         with open(norms_path, 'r') as f:
             return json.load(f)
 
-    def calculate_raw_scores(self, responses: List[QuestionResponse]) -> Dict[str, float]:
-        scores = {
-            'Extraversion': 0.0,
-            'Agreeableness': 0.0,
-            'Conscientiousness': 0.0,
-            'Neuroticism': 0.0,
-            'Openness': 0.0
+    def calculate_raw_scores(self, responses: ResponseInput) -> Dict[str, float]:
+        # Loaded sum over answered likert items divided by the sum of |loadings|, on a 0-100 scale
+        scores = self.plan.raw_score_matrix(self._as_matrix(responses))[0]
+        return {dimension: float(score) for dimension, score in zip(self.plan.dimensions, scores)}
+
+    def calculate_irt_scores(self, responses: ResponseInput) -> Dict[str, Tuple[float, float]]:
+        theta, se = self.calculate_irt_matrix(self._as_matrix(responses))
+        return {dimension: (theta[0, j], se[0, j]) for j, dimension in enumerate(self.plan.dimensions)}
+
+    def calculate_irt_matrix(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Graded Response Model EAP estimate; the SE is the posterior standard deviation
+        return self.irt_model.score(X)
+
+    def statistics(self, X: np.ndarray, timer=NULL_TIMER) -> Dict:
+        """
+        Everything the pipeline needs from an (N, n_items) response matrix:
+        additive per-row sums, one term per answered item. ScoringSession
+        keeps the same dict up to date one answer at a time.
+        """
+        plan = self.plan
+        raw_sums, raw_weights = plan.raw_sums(X)
+        timer.lap('raw')
+        log_likelihood = self.irt_model.log_likelihood(self.irt_model.categories(X))
+        timer.lap('irt')
+        facet_sums, facet_counts = plan.facet_sums(X)
+        timer.lap('facets')
+        preferences = plan.forced_choice_totals(X, weight=0.7)
+        timer.lap('mbti')
+        depth = plan.depth_sums(X)
+        timer.lap('depth')
+        quality = self.quality_model.statistics(X)
+        timer.lap('quality')
+        return {
+            'raw_sums': raw_sums,
+            'raw_weights': raw_weights,
+            'log_likelihood': log_likelihood,
+            'facet_sums': facet_sums,
+            'facet_counts': facet_counts,
+            'preferences': preferences,
+            'depth': depth,
+            # Not additive: sessions recompute it from their response vector
+            'quality': quality
         }
-        
-        counts = {dim: 0 for dim in scores}
-        
-        for response in responses:
-            question = self.questions.get(response.question_id)
-            if not question or question['response_type'] != 'likert_7':
-                continue
-                
-            # Convert 1-7 scale to 0-6
-            value = response.response_value - 1
-            
-            # Reverse score if needed
-            if question['reverse_scored']:
-                value = 6 - value
-            
-            # Apply factor loadings
-            if question.get('factor_loadings'):
-                for dimension, loading in question['factor_loadings'].items():
-                    if dimension in scores:
-                        scores[dimension] += value * loading
-                        counts[dimension] += abs(loading)
-        
-        # Normalize by the sum of loadings
-        for dimension in scores:
-            if counts[dimension] > 0:
-                scores[dimension] = scores[dimension] / counts[dimension] * 100 / 6
-        
-        return scores
 
-    def calculate_irt_scores(self, responses: List[QuestionResponse]) -> Dict[str, Tuple[float, float]]:
-        # Simplified IRT implementation - in production would use actual item parameters
-        irt_scores = {}
-        
-        for dimension in ['Extraversion', 'Agreeableness', 'Conscientiousness', 'Neuroticism', 'Openness']:
-            dim_responses = []
-            
-            for response in responses:
-                question = self.questions.get(response.question_id)
-                if not question or question.get('dimension') != dimension:
-                    continue
-                    
-                value = response.response_value - 1
-                if question['reverse_scored']:
-                    value = 6 - value
-                    
-                dim_responses.append(value)
-            
-            if dim_responses:
-                # Simple theta estimation
-                theta = (np.mean(dim_responses) - 3) / 1.5  # Scale to approximately -2 to +2
-                se = 1 / np.sqrt(len(dim_responses))  # Simplified standard error
-                irt_scores[dimension] = (theta, se)
-            else:
-                irt_scores[dimension] = (0.0, 1.0)
-        
-        return irt_scores
+    def norm_locations(self, norm_groups: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        # (N, dimensions) median and standard deviation of each row's norm group
+        tables = {group: self.norm_registry.get(group) for group in dict.fromkeys(norm_groups)}
+        shape = (len(norm_groups), len(self.plan.dimensions))
+        centers = np.array([tables[group].center for group in norm_groups]).reshape(shape)
+        spreads = np.array([tables[group].spread for group in norm_groups]).reshape(shape)
+        return centers, spreads
+
+    def assess_response_quality(self, statistics: Dict, theta: np.ndarray, scores: np.ndarray,
+                                norm_groups: Sequence[Optional[str]]) -> List[Dict]:
+        # Mahalanobis distance under each row's norm group, NaN for groups without trait correlations
+        tables = {group: self.norm_registry.get(group) for group in dict.fromkeys(norm_groups)}
+        mahalanobis = np.full(len(norm_groups), np.nan)
+        for group, table in tables.items():
+            if table.precision is not None:
+                rows = np.array([g == group for g in norm_groups])
+                offset = scores[rows] - table.mean
+                mahalanobis[rows] = ((offset @ table.precision) * offset).sum(axis=1)
+        return self.quality_model.assess(statistics['quality'], statistics['log_likelihood'], theta, mahalanobis)
 
-    def standardize_scores(self, raw_scores: Dict[str, float], irt_scores: Dict[str, Tuple[float, float]]) -> Dict:
+    def standardize_scores(self, raw_scores: Dict[str, float], irt_scores: Dict[str, Tuple[float, float]],
+                           norm_group: Optional[str] = None) -> Dict:
         standardized = {
             'scores': {},
             'percentiles': {},
             'standard_errors': {}
         }
-        
+
+        dimensions = [dimension for dimension in raw_scores if dimension in irt_scores]
+        if dimensions:
+            scores, percentiles, standard_errors = self.standardize_matrix(
+                np.array([[raw_scores[d] for d in dimensions]]),
+                np.array([[irt_scores[d][0] for d in dimensions]]),
+                np.array([[irt_scores[d][1] for d in dimensions]]),
+                dimensions,
+                norm_group
+            )
+            for j, dimension in enumerate(dimensions):
+                standardized['scores'][dimension] = scores[0, j]
+                standardized['percentiles'][dimension] = percentiles[0, j]
+                standardized['standard_errors'][dimension] = standard_errors[0, j]
+
         for dimension in raw_scores:
-            # Combine raw and IRT scores (weighted average)
-            if dimension in irt_scores:
-                irt_theta, irt_se = irt_scores[dimension]
-                # Convert IRT theta to 0-100 scale
-                irt_score = (irt_theta + 2) * 25  # Maps -2,2 to 0,100
-                
-                # Weight IRT more heavily (70/30)
-                combined_score = 0.7 * irt_score + 0.3 * raw_scores[dimension]
-                
-                # Ensure score is within bounds
-                combined_score = max(0, min(100, combined_score))
-                
-                standardized['scores'][dimension] = round(combined_score, 1)
-                standardized['standard_errors'][dimension] = round(irt_se * 15, 1)  # Scale SE
-                
-                # Calculate percentile
-                norm_data = self.norms['norms'][dimension]['general_population']
-                z_score = (combined_score - norm_data['mean']) / norm_data['std_dev']
-                percentile = norm.cdf(z_score) * 100
-                standardized['percentiles'][dimension] = round(percentile, 1)
-            else:
+            if dimension not in irt_scores:
                 standardized['scores'][dimension] = round(raw_scores[dimension], 1)
                 standardized['percentiles'][dimension] = 50.0
                 standardized['standard_errors'][dimension] = 5.0
-        
+
         return standardized
 
-    def classify_mbti_type(self, big_five_scores: Dict[str, float], forced_choice_responses: List[QuestionResponse]) -> Dict:
-        # Initialize preference scores
-        preferences = {'E': 0.0, 'I': 0.0, 'S': 0.0, 'N': 0.0,
-                      'T': 0.0, 'F': 0.0, 'J': 0.0, 'P': 0.0}
-        
+    def standardize_matrix(self, raw: np.ndarray, theta: np.ndarray, se: np.ndarray,
+                           dimensions: Optional[List[str]] = None,
+                           norm_groups: NormGroups = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        dimensions = dimensions or self.plan.dimensions
+
+        # Convert IRT theta to 0-100 scale (maps -2,2 to 0,100), weight IRT more heavily (70/30)
+        irt_score = (theta + 2) * 25
+        combined = np.clip(0.7 * irt_score + 0.3 * raw, 0, 100)
+
+        # Percentiles from the precompiled lookup table of each row's norm group
+        # (general population by default)
+        if norm_groups is None or isinstance(norm_groups, str):
+            percentiles = self.norm_registry.get(norm_groups).percentiles(combined, dimensions)
+        else:
+            groups = np.array([group or '' for group in norm_groups], dtype=object)
+            percentiles = np.empty_like(combined)
+            for group in dict.fromkeys(groups):
+                rows = groups == group
+                percentiles[rows] = self.norm_registry.get(group).percentiles(combined[rows], dimensions)
+
+        return np.round(combined, 1), np.round(percentiles, 1), np.round(se * 15, 1)
+
+    def classify_mbti_type(self, big_five_scores: Dict[str, float], forced_choice_responses: ResponseInput,
+                           norm_group: Optional[str] = None) -> Dict:
+        scores = np.array([[big_five_scores.get(dimension, 50) for dimension in self.plan.dimensions]])
+        return self.classify_mbti_matrix(self._as_matrix(forced_choice_responses), scores, [norm_group])[0]
+
+    def classify_mbti_matrix(self, X: np.ndarray, big_five_scores: np.ndarray,
+                             norm_groups: Optional[Sequence[Optional[str]]] = None) -> List[Dict]:
         # Weight forced choice responses (70% weight)
-        for response in forced_choice_responses:
-            question = self.questions.get(response.question_id)
-            if not question or question['response_type'] != 'forced_choice':
-                continue
-                
-            if response.selected_option == 'a':
-                for pref, score in question['option_a']['scores'].items():
-                    preferences[pref] += score * 0.7
-            else:
-                for pref, score in question['option_b']['scores'].items():
-                    preferences[pref] += score * 0.7
-        
-        # Add Big Five correlations (30% weight)
-        # Based on empirical correlations from framework
-        e_score = big_five_scores.get('Extraversion', 50) / 100
-        preferences['E'] += e_score * 0.3
-        preferences['I'] += (1 - e_score) * 0.3
-        
-        n_score = big_five_scores.get('Openness', 50) / 100
-        preferences['N'] += n_score * 0.3
-        preferences['S'] += (1 - n_score) * 0.3
-        
-        f_score = big_five_scores.get('Agreeableness', 50) / 100
-        preferences['F'] += f_score * 0.3
-        preferences['T'] += (1 - f_score) * 0.3
-        
-        j_score = big_five_scores.get('Conscientiousness', 50) / 100
-        preferences['J'] += j_score * 0.3
-        preferences['P'] += (1 - j_score) * 0.3
-        
-        # Determine type with probabilities
-        type_code = ''
-        dimension_probabilities = {}
-        
-        for pair in [('E', 'I'), ('S', 'N'), ('T', 'F'), ('J', 'P')]:
-            total = preferences[pair[0]] + preferences[pair[1]]
-            if total > 0:
-                prob_first = preferences[pair[0]] / total
-            else:
-                prob_first = 0.5
-                
-            if prob_first > 0.5:
-                type_code += pair[0]
-                dimension_probabilities[pair[0]] = round(prob_first, 3)
-            else:
-                type_code += pair[1]
-                dimension_probabilities[pair[1]] = round(1 - prob_first, 3)
-        
-        # Calculate overall type probability
-        overall_probability = np.prod(list(dimension_probabilities.values()))
-        
-        # Find secondary type if probability < 0.8
-        secondary_type = None
-        if overall_probability < 0.8:
-            secondary_type = self._find_secondary_type(preferences, type_code)
-        
-        return {
-            'primary_type': type_code,
-            'probability': round(overall_probability, 3),
-            'secondary_type': secondary_type,
-            'dimension_probabilities': dimension_probabilities
-        }
+        return self.classify_mbti_preferences(self.plan.forced_choice_totals(X, weight=0.7), big_five_scores,
+                                              norm_groups)
 
-    def _find_secondary_type(self, preferences: Dict[str, float], primary_type: str) -> Optional[str]:
-        # Find the dimension with the lowest confidence
-        min_diff = float('inf')
-        flip_dim = None
-        
-        for i, pair in enumerate([('E', 'I'), ('S', 'N'), ('T', 'F'), ('J', 'P')]):
-            diff = abs(preferences[pair[0]] - preferences[pair[1]])
-            if diff < min_diff:
-                min_diff = diff
-                flip_dim = i
-        
-        if flip_dim is not None:
-            secondary = list(primary_type)
-            current = secondary[flip_dim]
-            
-            # Flip to opposite preference
-            for pair in [('E', 'I'), ('S', 'N'), ('T', 'F'), ('J', 'P')]:
-                if current in pair:
-                    secondary[flip_dim] = pair[1] if current == pair[0] else pair[0]
-                    break
-            
-            return ''.join(secondary)
-        
-        return None
+    def classify_mbti_preferences(self, forced_choice_totals: np.ndarray, big_five_scores: np.ndarray,
+                                  norm_groups: Optional[Sequence[Optional[str]]] = None) -> List[Dict]:
+        """
+        The posterior over all 16 types (type_distribution) from the
+        forced-choice preference totals and the Big Five scores relative to
+        each row's norm group. primary_type and secondary_type are its two
+        most probable types, probability the primary type's posterior, and
+        dimension_probabilities the posterior probability of each of the
+        primary type's letters.
+        """
+        centers, spreads = self.norm_locations(norm_groups or [None] * len(forced_choice_totals))
+        probabilities = self.type_posterior.probabilities(forced_choice_totals, (big_five_scores - centers) / spreads)
+        distributions = self.type_posterior.summarize(probabilities)
+        letter_probabilities = np.round(self.type_posterior.letter_probabilities(probabilities), 3)
+        letter_index = {letter: i for i, letter in enumerate(self.plan.preference_letters)}
+
+        results = []
+        for row, distribution in enumerate(distributions):
+            # top_types is most probable first, ties in TYPE_CODES order
+            primary, secondary = distribution['top_types'][:2]
+            type_code = primary['type']
+            results.append({
+                'primary_type': type_code,
+                'probability': primary['probability'],
+                # As before, only a primary type below 0.8 gets a runner-up
+                'secondary_type': secondary['type'] if primary['probability'] < 0.8 else None,
+                'dimension_probabilities': {
+                    letter: float(letter_probabilities[row, letter_index[letter]]) for letter in type_code
+                },
+                'type_distribution': distribution
+            })
+
+        return results
 
     def determine_function_stack(self, mbti_type: str, big_five_scores: Dict[str, float], 
                                 depth_responses: List[QuestionResponse]) -> Dict:
@@ -308,99 +327,77 @@ class ScoringService:
     def calculate_confidence_intervals(self, scores: Dict[str, float], 
                                      standard_errors: Dict[str, float], 
                                      confidence_level: float = 0.95) -> Dict:
-        z_score = norm.ppf((1 + confidence_level) / 2)
-        intervals = {}
-        
-        for dimension, score in scores.items():
-            se = standard_errors.get(dimension, 5.0)
-            margin = z_score * se
-            
-            intervals[dimension] = {
-                'point_estimate': score,
-                'lower_bound': round(max(0, score - margin), 1),
-                'upper_bound': round(min(100, score + margin), 1),
+        dimensions = list(scores)
+        lower, upper = self.confidence_interval_matrix(
+            np.array([[scores[d] for d in dimensions]]),
+            np.array([[standard_errors.get(d, 5.0) for d in dimensions]]),
+            confidence_level
+        )
+        return {
+            dimension: {
+                'point_estimate': scores[dimension],
+                'lower_bound': lower[0, j],
+                'upper_bound': upper[0, j],
                 'confidence_level': confidence_level
             }
-        
-        return intervals
+            for j, dimension in enumerate(dimensions)
+        }
+
+    def confidence_interval_matrix(self, scores: np.ndarray, standard_errors: np.ndarray,
+                                   confidence_level: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+        z_score = z_critical(confidence_level)
+        margin = z_score * standard_errors
+        lower = np.round(np.maximum(0, scores - margin), 1)
+        upper = np.round(np.minimum(100, scores + margin), 1)
+        return lower, upper
 
     def classify_to_cluster(self, big_five_scores: List[float]) -> Dict:
-        # Simplified cluster classification
-        # In production, would use pre-trained GMM model
-        
-        # Define cluster prototypes
-        clusters = {
-            0: {'name': 'Resilient', 'profile': [65, 60, 65, 35, 60]},
-            1: {'name': 'Overcontrolled', 'profile': [35, 50, 55, 70, 45]},
-            2: {'name': 'Undercontrolled', 'profile': [55, 35, 35, 60, 55]},
-            3: {'name': 'Average', 'profile': [50, 50, 50, 50, 50]}
-        }
-        
-        # Calculate distances to each cluster
-        distances = {}
-        for cluster_id, cluster_info in clusters.items():
-            dist = np.sqrt(sum((a - b) ** 2 for a, b in zip(big_five_scores, cluster_info['profile'])))
-            distances[cluster_id] = dist
-        
-        # Find closest cluster
-        primary_cluster = min(distances, key=distances.get)
-        
-        # Calculate probabilities (inverse distance weighting)
-        total_inv_dist = sum(1 / (d + 1) for d in distances.values())
-        probabilities = [1 / (distances[i] + 1) / total_inv_dist for i in range(4)]
-        
-        return {
-            'primary_cluster': primary_cluster,
-            'cluster_probabilities': probabilities,
-            'cluster_description': clusters[primary_cluster]['name']
-        }
+        return self.classify_cluster_matrix(np.array([big_five_scores], dtype=np.float64))[0]
 
-    def analyze_depth_responses(self, responses: List[QuestionResponse]) -> Dict:
-        shadow_scores = []
-        archetype_scores = {}
-        individuation_scores = []
-        
-        for response in responses:
-            question = self.questions.get(response.question_id)
-            if not question:
-                continue
-                
-            if question.get('dimension') == 'Shadow_Integration':
-                if response.response_value:
-                    # Convert 1-5 to 0-1 scale
-                    shadow_scores.append((response.response_value - 1) / 4)
-                    
-            elif question.get('dimension') == 'Archetype':
-                archetype = question.get('archetype')
-                if archetype and response.response_value:
-                    if archetype not in archetype_scores:
-                        archetype_scores[archetype] = []
-                    archetype_scores[archetype].append(response.response_value)
-                    
-            elif question.get('dimension') == 'Individuation':
-                if response.response_value:
-                    individuation_scores.append((response.response_value - 1) / 4)
-        
-        # Calculate averages
-        shadow_integration = np.mean(shadow_scores) if shadow_scores else 0.5
-        
-        archetype_profile = {}
-        for archetype, scores in archetype_scores.items():
-            archetype_profile[archetype] = round(np.mean(scores) / 5, 2)
-        
-        # Determine primary archetype
-        primary_archetype = max(archetype_profile, key=archetype_profile.get) if archetype_profile else None
-        
-        individuation_stage = self._determine_individuation_stage(
-            np.mean(individuation_scores) if individuation_scores else 0.5
-        )
-        
-        return {
-            'shadow_integration': round(shadow_integration, 2),
-            'archetype_profile': archetype_profile,
-            'primary_archetype': primary_archetype,
-            'individuation_stage': individuation_stage
-        }
+    def classify_cluster_matrix(self, big_five_scores: np.ndarray) -> List[Dict]:
+        # Posterior membership under the Gaussian mixture in norms/cluster_model.json
+        return self.cluster_model.classify(big_five_scores)
+
+    def analyze_depth_responses(self, responses: ResponseInput) -> Dict:
+        return self.analyze_depth_matrix(self._as_matrix(responses))[0]
+
+    def analyze_depth_matrix(self, X: np.ndarray) -> List[Dict]:
+        return self.analyze_depth_sums(self.plan.depth_sums(X))
+
+    def analyze_depth_sums(self, sums: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> List[Dict]:
+        plan = self.plan
+
+        # Calculate averages (0.5 when a scale has no answers)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shadow_total, shadow_count = sums['shadow']
+            shadow_integration = np.round(np.where(shadow_count > 0, shadow_total / shadow_count, 0.5), 2)
+
+            archetype_total, archetype_count = sums['archetype']
+            archetype_scores = np.round(archetype_total / archetype_count / 5, 2)
+
+            individuation_total, individuation_count = sums['individuation']
+            individuation = np.where(individuation_count > 0, individuation_total / individuation_count, 0.5)
+
+        results = []
+        for row in range(len(shadow_integration)):
+            archetype_profile = {
+                archetype: score
+                for archetype, score, count in zip(plan.archetype_names, archetype_scores[row].tolist(),
+                                                   archetype_count[row])
+                if count > 0
+            }
+
+            # Determine primary archetype (ties go to the first archetype in question bank order)
+            primary_archetype = max(archetype_profile, key=archetype_profile.get) if archetype_profile else None
+
+            results.append({
+                'shadow_integration': float(shadow_integration[row]),
+                'archetype_profile': archetype_profile,
+                'primary_archetype': primary_archetype,
+                'individuation_stage': self._determine_individuation_stage(individuation[row])
+            })
+
+        return results
 
     def _determine_individuation_stage(self, score: float) -> str:
         if score < 0.25:
@@ -412,42 +409,23 @@ class ScoringService:
         else:
             return "Advanced Integration"
 
-    def calculate_facet_scores(self, responses: List[QuestionResponse]) -> Dict[str, Dict[str, float]]:
-        facet_scores = {}
-        facet_counts = {}
-        
-        for response in responses:
-            question = self.questions.get(response.question_id)
-            if not question or not question.get('facet'):
-                continue
-                
-            dimension = question['dimension']
-            facet = question['facet']
-            
-            if dimension not in facet_scores:
-                facet_scores[dimension] = {}
-                facet_counts[dimension] = {}
-            
-            if facet not in facet_scores[dimension]:
-                facet_scores[dimension][facet] = 0
-                facet_counts[dimension][facet] = 0
-            
-            value = response.response_value - 1
-            if question['reverse_scored']:
-                value = 6 - value
-            
-            facet_scores[dimension][facet] += value
-            facet_counts[dimension][facet] += 1
-        
+    def calculate_facet_scores(self, responses: ResponseInput) -> Dict[str, Dict[str, float]]:
+        return self.facet_score_matrix(self._as_matrix(responses))[0]
+
+    def facet_score_matrix(self, X: np.ndarray) -> List[Dict[str, Dict[str, float]]]:
+        return self.facet_scores_from_sums(*self.plan.facet_sums(X))
+
+    def facet_scores_from_sums(self, sums: np.ndarray, counts: np.ndarray) -> List[Dict[str, Dict[str, float]]]:
         # Calculate averages and convert to percentages
-        result = {}
-        for dimension, facets in facet_scores.items():
-            result[dimension] = {}
-            for facet, total in facets.items():
-                count = facet_counts[dimension][facet]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            percentages = np.round(sums / counts / 6 * 100, 1)
+
+        results = []
+        for row_percentages, row_counts in zip(percentages.tolist(), counts.tolist()):
+            result = {}
+            for (dimension, facet), percentage, count in zip(self.plan.facet_keys, row_percentages, row_counts):
                 if count > 0:
-                    avg = total / count
-                    percentage = (avg / 6) * 100
-                    result[dimension][facet] = round(percentage, 1)
-        
-        return result
\ No newline at end of file
+                    result.setdefault(dimension, {})[facet] = percentage
+            results.append(result)
+
+        return results
@@ -0,0 +1,190 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from app.models.assessment import QuestionResponse, ResponseType
+
+BIG_FIVE_DIMENSIONS = ('Extraversion', 'Agreeableness', 'Conscientiousness', 'Neuroticism', 'Openness')
+PREFERENCE_LETTERS = ('E', 'I', 'S', 'N', 'T', 'F', 'J', 'P')
+SCALE_MAX = {ResponseType.LIKERT_7.value: 7, ResponseType.LIKERT_5.value: 5, ResponseType.FORCED_CHOICE.value: 2}
+
+
+class ScoringPlan:
+    """
+    Dense, array-based view of the question bank used by ScoringService.
+
+    Responses are encoded into a float vector indexed by item position
+    (NaN = unanswered). Likert items hold the raw response value and
+    forced-choice items hold 1.0 for option 'a' and 2.0 for option 'b'.
+    Every scoring step is then a handful of matrix operations over an
+    (N, n_items) response matrix, so one submission and a batch share the
+    same code path.
+    """
+
+    def __init__(self, questions: Sequence[Dict], version: str = ''):
+        self.version = version
+        self.item_ids: Tuple[str, ...] = tuple(q['id'] for q in questions)
+        self.index: Dict[str, int] = {item_id: i for i, item_id in enumerate(self.item_ids)}
+        self.n_items = len(self.item_ids)
+        self.dimensions = BIG_FIVE_DIMENSIONS
+
+        response_types = [q['response_type'] for q in questions]
+        self.is_forced_choice = np.array([t == 'forced_choice' for t in response_types], dtype=bool)
+        # Highest valid encoded answer per item: the scale's top point, or 2 (option 'b') for forced choice
+        self.max_values = np.array([SCALE_MAX[t] for t in response_types], dtype=np.float64)
+
+        # Raw scores: likert_7 items with factor loadings (the 120 primary items)
+        likert = [i for i, q in enumerate(questions)
+                  if q['response_type'] == 'likert_7' and q.get('factor_loadings')]
+        self.likert_idx = np.array(likert, dtype=np.intp)
+        self.likert_reverse = np.array([bool(questions[i]['reverse_scored']) for i in likert], dtype=bool)
+        self.loadings = np.array([
+            [questions[i]['factor_loadings'].get(dim, 0.0) for dim in self.dimensions]
+            for i in likert
+        ], dtype=np.float64).reshape(len(likert), len(self.dimensions))
+        self.abs_loadings = np.abs(self.loadings)
+
+        # IRT: items keyed to a Big Five dimension
+        keyed = [i for i, q in enumerate(questions) if q.get('dimension') in self.dimensions]
+        self.keyed_idx = np.array(keyed, dtype=np.intp)
+        self.keyed_reverse = np.array([bool(questions[i].get('reverse_scored')) for i in keyed], dtype=bool)
+        self.dimension_membership = np.array([
+            [questions[i]['dimension'] == dim for dim in self.dimensions] for i in keyed
+        ], dtype=np.float64).reshape(len(keyed), len(self.dimensions))
+
+        # Facets, in question bank order of first appearance
+        faceted = [i for i, q in enumerate(questions) if q.get('facet')]
+        self.facet_keys: List[Tuple[str, str]] = []
+        for i in faceted:
+            key = (questions[i]['dimension'], questions[i]['facet'])
+            if key not in self.facet_keys:
+                self.facet_keys.append(key)
+        self.facet_idx = np.array(faceted, dtype=np.intp)
+        self.facet_reverse = np.array([bool(questions[i].get('reverse_scored')) for i in faceted], dtype=bool)
+        self.facet_membership = np.array([
+            [(questions[i]['dimension'], questions[i]['facet']) == key for key in self.facet_keys]
+            for i in faceted
+        ], dtype=np.float64).reshape(len(faceted), len(self.facet_keys))
+
+        # Forced-choice items: per-option MBTI preference weights
+        forced_choice = [i for i, q in enumerate(questions) if q['response_type'] == 'forced_choice']
+        self.preference_letters = PREFERENCE_LETTERS
+        self.forced_choice_idx = np.array(forced_choice, dtype=np.intp)
+        self.option_a_scores, self.option_b_scores = (
+            np.array([
+                [questions[i][option]['scores'].get(letter, 0.0) for letter in PREFERENCE_LETTERS]
+                for i in forced_choice
+            ], dtype=np.float64).reshape(len(forced_choice), len(PREFERENCE_LETTERS))
+            for option in ('option_a', 'option_b')
+        )
+
+        # Jungian depth items
+        self.shadow_idx = np.array([i for i, q in enumerate(questions)
+                                    if q.get('dimension') == 'Shadow_Integration'], dtype=np.intp)
+        self.individuation_idx = np.array([i for i, q in enumerate(questions)
+                                           if q.get('dimension') == 'Individuation'], dtype=np.intp)
+        archetype_items = [i for i, q in enumerate(questions)
+                           if q.get('dimension') == 'Archetype' and q.get('archetype')]
+        self.archetype_names: List[str] = []
+        for i in archetype_items:
+            if questions[i]['archetype'] not in self.archetype_names:
+                self.archetype_names.append(questions[i]['archetype'])
+        self.archetype_idx = np.array(archetype_items, dtype=np.intp)
+        self.archetype_membership = np.array([
+            [questions[i]['archetype'] == name for name in self.archetype_names] for i in archetype_items
+        ], dtype=np.float64).reshape(len(archetype_items), len(self.archetype_names))
+
+    def encode(self, responses: List[QuestionResponse]) -> np.ndarray:
+        return self.encode_records((r.question_id, r.response_value, r.selected_option) for r in responses)
+
+    def encode_records(self, records: Iterable[Tuple[str, Optional[int], Optional[str]]]) -> np.ndarray:
+        # Unknown question ids are ignored; a repeated id keeps its last answer
+        vector = np.full(self.n_items, np.nan)
+        index = self.index
+        is_forced_choice = self.is_forced_choice
+        for question_id, response_value, selected_option in records:
+            i = index.get(question_id)
+            if i is None:
+                continue
+            if is_forced_choice[i]:
+                if selected_option is not None:
+                    vector[i] = 1.0 if selected_option == 'a' else 2.0
+            elif response_value is not None:
+                vector[i] = response_value
+        return vector
+
+    def answer_errors(self, X: np.ndarray) -> List[Optional[str]]:
+        """Per row of X, the first answer outside its item's scale, or None if every answer is valid."""
+        X = np.atleast_2d(X)
+        invalid = (X < 1) | (X > self.max_values) | ((X != np.floor(X)) & ~np.isnan(X))
+        errors: List[Optional[str]] = [None] * X.shape[0]
+        for row in np.flatnonzero(invalid.any(axis=1)).tolist():
+            i = int(np.argmax(invalid[row]))
+            value = X[row, i]
+            errors[row] = (f"Invalid response_value {value:g} for question {self.item_ids[i]}, "
+                           f"expected 1-{self.max_values[i]:g}")
+        return errors
+
+    def encode_many(self, submissions: Sequence[List[QuestionResponse]]) -> np.ndarray:
+        matrix = np.full((len(submissions), self.n_items), np.nan)
+        for row, responses in enumerate(submissions):
+            matrix[row] = self.encode(responses)
+        return matrix
+
+    @staticmethod
+    def _keyed(values: np.ndarray, reverse: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # 1-7 Likert to 0-6, reverse keyed where needed; unanswered cells become 0
+        answered = ~np.isnan(values)
+        keyed = np.where(reverse, 7.0 - values, values - 1.0)
+        return np.where(answered, keyed, 0.0), answered.astype(np.float64)
+
+    @staticmethod
+    def _sequential_dot(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        # Row-by-item weighted sum accumulated item by item. Unlike a BLAS product
+        # the rounding does not depend on how many rows are scored together, so a
+        # batch row is bit-identical to the same submission scored alone.
+        if values.shape[1] == 0:
+            return np.zeros((values.shape[0], weights.shape[1]))
+        return np.cumsum(values[:, :, np.newaxis] * weights, axis=1)[:, -1, :]
+
+    def raw_score_matrix(self, X: np.ndarray) -> np.ndarray:
+        return self.raw_scores(*self.raw_sums(X))
+
+    def raw_sums(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Loaded sums of keyed answers and the sums of |loadings| over answered items
+        keyed, answered = self._keyed(X[:, self.likert_idx], self.likert_reverse)
+        return self._sequential_dot(keyed, self.loadings), self._sequential_dot(answered, self.abs_loadings)
+
+    @staticmethod
+    def raw_scores(sums: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = sums / weights * 100 / 6
+        return np.where(weights > 0, scores, 0.0)
+
+    def dimension_sums(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        keyed, answered = self._keyed(X[:, self.keyed_idx], self.keyed_reverse)
+        return keyed @ self.dimension_membership, answered @ self.dimension_membership
+
+    def facet_sums(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        keyed, answered = self._keyed(X[:, self.facet_idx], self.facet_reverse)
+        return keyed @ self.facet_membership, answered @ self.facet_membership
+
+    def depth_sums(self, X: np.ndarray) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        # Depth items are 1-5; a missing or zero answer is skipped
+        sums = {}
+        for name, idx in (('shadow', self.shadow_idx), ('individuation', self.individuation_idx)):
+            values = X[:, idx]
+            answered = ~np.isnan(values) & (values != 0)
+            sums[name] = (np.where(answered, (values - 1) / 4, 0.0).sum(axis=1), answered.sum(axis=1))
+        values = X[:, self.archetype_idx]
+        answered = ~np.isnan(values) & (values != 0)
+        sums['archetype'] = (np.where(answered, values, 0.0) @ self.archetype_membership,
+                             answered.astype(np.float64) @ self.archetype_membership)
+        return sums
+
+    def forced_choice_totals(self, X: np.ndarray, weight: float = 1.0) -> np.ndarray:
+        choices = X[:, self.forced_choice_idx]
+        if choices.shape[1] == 0:
+            return np.zeros((X.shape[0], len(self.preference_letters)))
+        contributions = (np.where((choices == 1.0)[:, :, np.newaxis], self.option_a_scores * weight, 0.0)
+                         + np.where((choices == 2.0)[:, :, np.newaxis], self.option_b_scores * weight, 0.0))
+        # Accumulated item by item, like _sequential_dot
+        return np.cumsum(contributions, axis=1)[:, -1, :]
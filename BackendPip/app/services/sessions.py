@@ -0,0 +1,261 @@
+import copy
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.assessment import QuestionResponse
+from app.services.pipeline import AssessmentPipeline, MIN_RESPONSES
+from app.services.scoring import ScoringService
+
+# (response_value, selected_option) as sent by the frontend
+Answer = Tuple[Optional[int], Optional[str]]
+
+
+class SessionPlan:
+    """
+    Each item's contribution to the ScoringService.statistics() sums,
+    compiled once per question bank and item parameter version, so applying
+    or withdrawing one answer touches only the sums that item feeds.
+    """
+
+    def __init__(self, scoring: ScoringService):
+        plan = scoring.plan
+        irt = scoring.irt_model
+        self.plan = plan
+        self.plan_version = plan.version
+        self.irt_model = irt
+
+        def positions(idx: np.ndarray) -> np.ndarray:
+            position = np.full(plan.n_items, -1, dtype=np.intp)
+            position[idx] = np.arange(len(idx))
+            return position
+
+        self.likert_position = positions(plan.likert_idx)
+        self.keyed_position = positions(irt.item_idx)
+        self.facet_position = positions(plan.facet_idx)
+        self.facet_column = plan.facet_membership.argmax(axis=1)
+        self.forced_choice_position = positions(plan.forced_choice_idx)
+        self.option_scores = (plan.option_a_scores * 0.7, plan.option_b_scores * 0.7)
+        self.archetype_position = positions(plan.archetype_idx)
+        self.archetype_column = plan.archetype_membership.argmax(axis=1)
+        self.depth_scale = {i: 'shadow' for i in plan.shadow_idx.tolist()}
+        self.depth_scale.update({i: 'individuation' for i in plan.individuation_idx.tolist()})
+
+    def empty_statistics(self) -> Dict:
+        plan = self.plan
+        n_dimensions = len(plan.dimensions)
+        return {
+            'raw_sums': np.zeros((1, n_dimensions)),
+            'raw_weights': np.zeros((1, n_dimensions)),
+            'log_likelihood': np.zeros((1, n_dimensions, len(self.irt_model.grid))),
+            'facet_sums': np.zeros((1, len(plan.facet_keys))),
+            'facet_counts': np.zeros((1, len(plan.facet_keys))),
+            'preferences': np.zeros((1, len(plan.preference_letters))),
+            'depth': {
+                'shadow': (np.zeros(1), np.zeros(1)),
+                'individuation': (np.zeros(1), np.zeros(1)),
+                'archetype': (np.zeros((1, len(plan.archetype_names))), np.zeros((1, len(plan.archetype_names))))
+            }
+        }
+
+    def apply(self, statistics: Dict, item: int, value: float, sign: float = 1.0):
+        # Adds (sign=1) or withdraws (sign=-1) one encoded answer, as ScoringPlan would count it
+        position = self.likert_position[item]
+        if position >= 0:
+            keyed = 7.0 - value if self.plan.likert_reverse[position] else value - 1.0
+            statistics['raw_sums'][0] += sign * (keyed * self.plan.loadings[position])
+            statistics['raw_weights'][0] += sign * self.plan.abs_loadings[position]
+
+        position = self.keyed_position[item]
+        if position >= 0:
+            irt = self.irt_model
+            category = irt.n_categories - value if irt.reverse[position] else value - 1
+            if 0 <= category <= irt.n_categories - 1:
+                dimension = irt.item_dimension[position]
+                statistics['log_likelihood'][0, dimension] += sign * irt.log_probabilities[position, int(category)]
+
+        position = self.facet_position[item]
+        if position >= 0:
+            keyed = 7.0 - value if self.plan.facet_reverse[position] else value - 1.0
+            column = self.facet_column[position]
+            statistics['facet_sums'][0, column] += sign * keyed
+            statistics['facet_counts'][0, column] += sign
+
+        position = self.forced_choice_position[item]
+        if position >= 0 and value in (1.0, 2.0):
+            statistics['preferences'][0] += sign * self.option_scores[int(value) - 1][position]
+
+        if value != 0:
+            scale = self.depth_scale.get(item)
+            if scale:
+                total, count = statistics['depth'][scale]
+                total[0] += sign * (value - 1) / 4
+                count[0] += sign
+            position = self.archetype_position[item]
+            if position >= 0:
+                total, count = statistics['depth']['archetype']
+                column = self.archetype_column[position]
+                total[0, column] += sign * value
+                count[0, column] += sign
+
+
+class ScoringSession:
+    """
+    One assessment in progress. Answers update the running sums as they
+    arrive; changing or withdrawing an answer subtracts its old contribution
+    first. Results, provisional or final, are computed from the sums alone.
+    """
+
+    def __init__(self, session_id: str, compiled: SessionPlan, norm_group: Optional[str] = None):
+        self.session_id = session_id
+        self.norm_group = norm_group
+        self.compiled = compiled
+        self.answers: Dict[str, Answer] = {}
+        self.values = np.full(compiled.plan.n_items, np.nan)
+        self.statistics = compiled.empty_statistics()
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        # Set by AdaptiveTester for computerized adaptive testing sessions
+        self.adaptive = None
+
+    @property
+    def answered(self) -> int:
+        return len(self.answers)
+
+    @property
+    def required(self) -> int:
+        return self.adaptive.required(self) if self.adaptive is not None else MIN_RESPONSES
+
+    @property
+    def complete(self) -> bool:
+        if self.adaptive is not None and not self.adaptive.finished:
+            return False
+        return self.answered >= self.required
+
+    def _encode(self, item: int, response_value: Optional[int], selected_option: Optional[str]) -> float:
+        # Same encoding as ScoringPlan.encode_records; NaN clears the answer
+        if self.compiled.plan.is_forced_choice[item]:
+            if selected_option is None:
+                return np.nan
+            return 1.0 if selected_option == 'a' else 2.0
+        return np.nan if response_value is None else float(response_value)
+
+    def answer(self, question_id: str, response_value: Optional[int] = None,
+               selected_option: Optional[str] = None) -> bool:
+        # Unknown question ids are ignored, like at submit time
+        item = self.compiled.plan.index.get(question_id)
+        if item is None:
+            return False
+
+        value = self._encode(item, response_value, selected_option)
+        previous = self.values[item]
+        if not np.isnan(previous):
+            if previous == value:
+                return True
+            self.compiled.apply(self.statistics, item, previous, -1.0)
+        self.values[item] = value
+        if np.isnan(value):
+            self.answers.pop(question_id, None)
+        else:
+            self.compiled.apply(self.statistics, item, value)
+            self.answers[question_id] = (response_value, selected_option)
+        return True
+
+    def recompile(self, compiled: SessionPlan, scoring: ScoringService):
+        # The question bank or item parameters changed mid-session: re-encode
+        # the answers under the new plan and rebuild the sums once
+        plan = compiled.plan
+        self.compiled = compiled
+        self.values = plan.encode_records(
+            (question_id, value, option) for question_id, (value, option) in self.answers.items()
+        )
+        self.answers = {
+            question_id: answer for question_id, answer in self.answers.items() if question_id in plan.index
+        }
+        self.statistics = scoring.statistics(self.values[np.newaxis, :])
+
+
+class SessionStore:
+    """
+    In-process ScoringSessions by id, least recently used first. Sessions
+    idle for longer than ttl_seconds, or beyond max_sessions, are dropped.
+    """
+
+    def __init__(self, pipeline: AssessmentPipeline, max_sessions: int = 10000, ttl_seconds: float = 6 * 3600):
+        self.pipeline = pipeline
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: 'OrderedDict[str, ScoringSession]' = OrderedDict()
+        self._compiled: Optional[SessionPlan] = None
+        self._lock = threading.Lock()
+
+    def compiled(self) -> SessionPlan:
+        scoring = self.pipeline.scoring_service
+        plan = scoring.plan
+        irt = scoring.irt_model
+        compiled = self._compiled
+        if compiled is None or compiled.plan is not plan or compiled.irt_model is not irt:
+            compiled = SessionPlan(scoring)
+            self._compiled = compiled
+        return compiled
+
+    def create(self, norm_group: Optional[str] = None) -> ScoringSession:
+        session = ScoringSession(secrets.token_urlsafe(16), self.compiled(), norm_group)
+        with self._lock:
+            self._expire()
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> ScoringSession:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+        # Caller holds the lock; the oldest sessions come first
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+
+    def answer(self, session: ScoringSession, responses: List[QuestionResponse]):
+        compiled = self.compiled()
+        with session.lock:
+            if session.compiled is not compiled:
+                session.recompile(compiled, self.pipeline.scoring_service)
+            for response in responses:
+                session.answer(response.question_id, response.response_value, response.selected_option)
+
+    def statistics(self, session: ScoringSession) -> Dict:
+        # A copy of the session's sums, to be scored without holding its lock
+        compiled = self.compiled()
+        with session.lock:
+            if session.compiled is not compiled:
+                session.recompile(compiled, self.pipeline.scoring_service)
+            statistics = copy.deepcopy(session.statistics)
+            statistics['quality'] = self.pipeline.scoring_service.quality_model.statistics(
+                session.values[np.newaxis, :])
+            return statistics
+
+    def results(self, session: ScoringSession) -> Dict:
+        return self.pipeline.score_statistics(self.statistics(session), [session.norm_group])[0]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
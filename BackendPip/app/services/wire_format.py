@@ -0,0 +1,105 @@
+import struct
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.scoring_plan import ScoringPlan
+
+CONTENT_TYPE = 'application/x-assessment-responses'
+MAGIC = b'ASMR'
+FORMAT_VERSION = 1
+
+# Little-endian throughout. Header:
+#   magic (4 bytes), format version (u8),
+#   question bank version (u8 length + ASCII), norm group (u8 length + UTF-8, empty for the default),
+#   n_items (u16), n_rows (u32)
+# then n_rows rows of n_items answer bytes in question bank order, each followed by
+# ceil(n_items / 8) bytes of missing-answer bits (bit i % 8 of byte i // 8 set = item i unanswered).
+# Answers are encoded as by ScoringPlan: the Likert value, or 1 for option 'a' and 2 for 'b'.
+_COUNTS = struct.Struct('<HI')
+
+
+class WireFormatError(ValueError):
+    pass
+
+
+class QuestionBankMismatch(WireFormatError):
+    # The body was encoded against a different question bank version than the server's
+    pass
+
+
+def row_size(n_items: int) -> int:
+    return n_items + (n_items + 7) // 8
+
+
+def encode_matrix(plan: ScoringPlan, X: np.ndarray, norm_group: Optional[str] = None) -> bytes:
+    """Encodes an (N, n_items) response matrix, NaN = unanswered."""
+    X = np.atleast_2d(X)
+    if X.shape[1] != plan.n_items:
+        raise ValueError(f"Expected {plan.n_items} items per row, got {X.shape[1]}")
+    missing = np.isnan(X)
+    values = np.where(missing, 0, X).astype(np.uint8)
+    mask = np.packbits(missing, axis=1, bitorder='little')
+    version = plan.version.encode('ascii')
+    group = (norm_group or '').encode('utf-8')
+    header = (MAGIC + bytes([FORMAT_VERSION, len(version)]) + version + bytes([len(group)]) + group
+              + _COUNTS.pack(plan.n_items, X.shape[0]))
+    return header + np.hstack([values, mask]).tobytes()
+
+
+def encode_records(plan: ScoringPlan, submissions: Sequence[Sequence[Tuple[str, Optional[int], Optional[str]]]],
+                   norm_group: Optional[str] = None) -> bytes:
+    X = np.full((len(submissions), plan.n_items), np.nan)
+    for row, records in enumerate(submissions):
+        X[row] = plan.encode_records(records)
+    return encode_matrix(plan, X, norm_group)
+
+
+def _read_string(body: bytes, offset: int, encoding: str) -> Tuple[str, int]:
+    if offset >= len(body):
+        raise WireFormatError("Truncated header")
+    end = offset + 1 + body[offset]
+    if end > len(body):
+        raise WireFormatError("Truncated header")
+    try:
+        return body[offset + 1:end].decode(encoding), end
+    except UnicodeDecodeError:
+        raise WireFormatError("Malformed header string")
+
+
+def decode(body: bytes, plan: ScoringPlan) -> Tuple[np.ndarray, np.ndarray, Optional[str]]:
+    """
+    The response matrix of an encoded body, straight from its bytes: returns
+    (X, answered counts per row, norm group). Raises QuestionBankMismatch if
+    the body was encoded for another question bank version and
+    WireFormatError if it is malformed or holds an answer outside its scale.
+    """
+    if body[:len(MAGIC)] != MAGIC:
+        raise WireFormatError("Not an assessment responses body")
+    if len(body) <= len(MAGIC) or body[len(MAGIC)] != FORMAT_VERSION:
+        raise WireFormatError(f"Unsupported format version, expected {FORMAT_VERSION}")
+    version, offset = _read_string(body, len(MAGIC) + 1, 'ascii')
+    if version != plan.version:
+        raise QuestionBankMismatch(f"Encoded for question bank version '{version}', "
+                                   f"the current version is '{plan.version}'")
+    norm_group, offset = _read_string(body, offset, 'utf-8')
+    if len(body) < offset + _COUNTS.size:
+        raise WireFormatError("Truncated header")
+    n_items, n_rows = _COUNTS.unpack_from(body, offset)
+    offset += _COUNTS.size
+    if n_items != plan.n_items:
+        raise WireFormatError(f"Expected {plan.n_items} items per row, got {n_items}")
+    if len(body) - offset != n_rows * row_size(n_items):
+        raise WireFormatError(f"Expected {n_rows} rows of {row_size(n_items)} bytes after the header")
+
+    rows = np.frombuffer(body, dtype=np.uint8, offset=offset).reshape(n_rows, row_size(n_items))
+    missing = np.unpackbits(rows[:, n_items:], axis=1, count=n_items, bitorder='little').view(bool)
+    X = rows[:, :n_items].astype(np.float64)
+    X[missing] = np.nan
+    choices = X[:, plan.forced_choice_idx]
+    if ((choices != 1.0) & (choices != 2.0) & ~np.isnan(choices)).any():
+        raise WireFormatError("Forced-choice answers must be 1 (option 'a') or 2 (option 'b')")
+    error = next((error for error in plan.answer_errors(X) if error), None)
+    if error:
+        raise WireFormatError(error)
+    return X, n_items - missing.sum(axis=1), norm_group or None
@@ -0,0 +1,74 @@
+import typing
+from typing import Callable, Dict, Optional, Type
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional; without it every encoder uses the pydantic path
+    orjson = None
+
+Projector = Optional[Callable[[object], object]]
+
+
+def _projector(annotation) -> Projector:
+    """
+    A function reshaping a plain value to what the pydantic type would
+    serialize: model fields in declaration order, defaults for missing
+    optional fields and no extra keys. None means the value is written as is
+    (scalars and containers of scalars; orjson handles the NumPy numbers).
+    """
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        fields = tuple((name, _projector(field.annotation), field.is_required(), field.default)
+                       for name, field in annotation.model_fields.items())
+        names = tuple(field[0] for field in fields)
+
+        def project_model(value):
+            if isinstance(value, BaseModel):
+                value = value.__dict__
+            document = {}
+            unchanged = len(value) == len(names) and all(key == name for key, name in zip(value, names))
+            for name, project, required, default in fields:
+                item = value[name] if required else value.get(name, default)
+                if project is not None and item is not None:
+                    projected = project(item)
+                    unchanged = unchanged and projected is item
+                    item = projected
+                document[name] = item
+            # A dict already in the model's shape is written as is rather than copied
+            return value if unchanged else document
+        return project_model
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Union:
+        members = [_projector(arg) for arg in args if arg is not type(None)]
+        # Optional[X] projects as X; other unions are written as is
+        return members[0] if len(members) == 1 else None
+    if origin is dict:
+        project = _projector(args[1])
+        return None if project is None else (lambda value: {key: project(item) for key, item in value.items()})
+    if origin is list:
+        project = _projector(args[0])
+        return None if project is None else (lambda value: [project(item) for item in value])
+    return None
+
+
+class ResponseEncoder:
+    """
+    JSON for a response model from the plain dicts the pipeline produces.
+    encode(document, fast=True) skips building and validating the nested
+    models: the dicts are projected onto the model's fields and written with
+    orjson, giving the same JSON as model(**document).model_dump_json()
+    for the values the pipeline produces, in a fraction of the time.
+    fast=False, or orjson not being installed, uses pydantic.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self._project = _projector(model)
+
+    def encode(self, document: Dict, fast: bool = False) -> bytes:
+        if fast and orjson is not None:
+            return orjson.dumps(self._project(document), option=orjson.OPT_SERIALIZE_NUMPY)
+        return self.model(**document).model_dump_json().encode()
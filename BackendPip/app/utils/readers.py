@@ -0,0 +1,238 @@
+import csv
+import io
+import json
+import os
+import sys
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+
+class MalformedRow:
+    """Stands in for the response_value of an input row that could not be read at all."""
+    __slots__ = ('message',)
+
+    def __init__(self, message: str):
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f"MalformedRow({self.message!r})"
+
+
+# (question_id, response_value, selected_option) - one row of user_responses. A response_value
+# that is not a whole number is kept as its text, and an unreadable row is a MalformedRow;
+# see invalid_response
+Record = Tuple[str, Union[int, str, MalformedRow, None], Optional[str]]
+
+FORMATS = ('jsonl', 'csv', 'parquet')
+
+
+def detect_format(path: str) -> str:
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.parquet') or name.endswith('.pq'):
+        return 'parquet'
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith('.jsonl') or name.endswith('.ndjson') or path == '-':
+        return 'jsonl'
+    raise ValueError(f"Cannot infer input format from '{path}', expected one of: {', '.join(FORMATS)}")
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    if path == '-':
+        return sys.stdin
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Input file not found at: {path}")
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rt', newline='')
+    return open(path, 'r', newline='')
+
+
+def _to_value(value) -> Union[int, str, None]:
+    # Exports write whole numbers as '5', ' 5 ' or '5.0' (or 5.0 in a float column)
+    if value is None or isinstance(value, int):
+        return value
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return int(number) if number.is_integer() else text
+
+
+def _to_record(question_id: str, value, option) -> Record:
+    return (
+        question_id,
+        _to_value(value),
+        option if option not in (None, '') else None
+    )
+
+
+def invalid_response(records: Iterable[Record]) -> Optional[str]:
+    """
+    The error for a submission with an unreadable row or a response_value
+    that is not a whole number, or None. Readers keep such rows in the
+    submission so that one bad row fails its own submission instead of the
+    whole file.
+    """
+    for question_id, value, _ in records:
+        if isinstance(value, MalformedRow):
+            return value.message
+        if isinstance(value, str):
+            return f"Invalid response_value '{value}' for question {question_id}"
+    return None
+
+
+def _group_rows(rows: Iterable[Tuple[Tuple, Record]]) -> Iterator[Tuple[str, List[Record]]]:
+    # Rows for one submission must be contiguous (export with ORDER BY user_id),
+    # so only one submission is held in memory at a time
+    for key, group in groupby(rows, key=itemgetter(0)):
+        yield key[0], [record for _, record in group]
+
+
+def _jsonl_rows(path: str, id_column: str) -> Iterator[Tuple[Tuple, Record]]:
+    f = _open_text(path)
+    try:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            key = None
+            try:
+                row = json.loads(line)
+                submission_id = str(row.get(id_column, ''))
+                if 'responses' in row:
+                    # A whole submission on one line
+                    key = (submission_id, line_number)
+                    records = [_to_record(r['question_id'], r.get('response_value'), r.get('selected_option'))
+                               for r in row['responses']]
+                else:
+                    key = (submission_id, row.get('assessment_type'))
+                    records = [_to_record(row['question_id'], row.get('response_value'), row.get('selected_option'))]
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # Fails the submission the line belongs to, or its own when even the id is unreadable
+                if isinstance(e, ValueError):
+                    message = f"Line {line_number}: invalid JSON ({e})"
+                elif isinstance(e, KeyError):
+                    message = f"Line {line_number}: missing '{e.args[0]}'"
+                else:
+                    message = f"Line {line_number}: malformed row ({e})"
+                yield key or ('', line_number), ('', MalformedRow(message), None)
+                continue
+            for record in records:
+                yield key, record
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _csv_rows(path: str, id_column: str) -> Iterator[Tuple[Tuple, Record]]:
+    f = _open_text(path)
+    try:
+        reader = csv.reader(f)
+        columns = {name: i for i, name in enumerate(next(reader, []))}
+        for required in (id_column, 'question_id'):
+            if required not in columns:
+                raise ValueError(f"CSV export is missing the '{required}' column")
+
+        id_i = columns[id_column]
+        question_i = columns['question_id']
+        value_i = columns.get('response_value')
+        option_i = columns.get('selected_option')
+        type_i = columns.get('assessment_type')
+
+        width = max(i for i in (id_i, question_i, value_i, option_i, type_i) if i is not None) + 1
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                # A short row fails the submission it belongs to, if its id can be read
+                message = f"Line {reader.line_num}: expected {len(columns)} columns, got {len(row)}"
+                key = ((row[id_i], row[type_i] if type_i is not None and type_i < len(row) else None)
+                       if id_i < len(row) else ('', reader.line_num))
+                yield key, ('', MalformedRow(message), None)
+                continue
+            value = row[value_i] if value_i is not None else ''
+            option = row[option_i] if option_i is not None else ''
+            yield ((row[id_i], row[type_i] if type_i is not None else None),
+                   (row[question_i], _to_value(value), option or None))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _parquet_rows(path: str, id_column: str, batch_size: int) -> Iterator[Tuple[Tuple, Record]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet exports requires pyarrow (pip install pyarrow)")
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Input file not found at: {path}")
+
+    parquet_file = pq.ParquetFile(path)
+    names = set(parquet_file.schema_arrow.names)
+    wanted = [c for c in (id_column, 'question_id', 'response_value', 'selected_option', 'assessment_type')
+              if c in names]
+
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=wanted):
+        data = {name: batch.column(name).to_pylist() for name in wanted}
+        n = batch.num_rows
+        ids = [str(v) for v in data[id_column]]
+        types = data.get('assessment_type', [None] * n)
+        values = data.get('response_value', [None] * n)
+        options = data.get('selected_option', [None] * n)
+        for submission_id, assessment_type, question_id, value, option in zip(
+                ids, types, data['question_id'], values, options):
+            yield (submission_id, assessment_type), _to_record(question_id, value, option)
+
+
+def read_submissions(path: str, fmt: Optional[str] = None, id_column: str = 'user_id',
+                     batch_size: int = 65536) -> Iterator[Tuple[str, List[Record]]]:
+    """
+    Streams (submission_id, records) pairs from a JSONL, CSV or Parquet export.
+
+    Long-format exports of the user_responses table (one row per answer) are
+    grouped by id_column (plus assessment_type when present). JSONL lines may
+    also hold whole submissions: {"user_id": ..., "responses": [...]}.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == 'jsonl':
+        rows = _jsonl_rows(path, id_column)
+    elif fmt == 'csv':
+        rows = _csv_rows(path, id_column)
+    elif fmt == 'parquet':
+        rows = _parquet_rows(path, id_column, batch_size)
+    else:
+        raise ValueError(f"Unsupported input format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    return _group_rows(rows)
+
+
+def read_results(path: str, group_by: Optional[str] = None,
+                 default_group: str = 'general_population') -> Iterator[Tuple[str, dict]]:
+    """
+    Streams (group, result) pairs from JSONL scored results: the output of
+    app.cli.rescore ({"user_id": ..., "result": {...}}) or bare result
+    objects. Error lines are skipped. With group_by, the group is that
+    top-level field of each line (lines without it go to default_group).
+    """
+    f = _open_text(path)
+    try:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            result = row if 'big_five' in row else row.get('result')
+            if not result or 'big_five' not in result:
+                continue
+            group = row.get(group_by) if group_by else None
+            yield (str(group) if group not in (None, '') else default_group), result
+    finally:
+        if f is not sys.stdin:
+            f.close()
@@ -0,0 +1,190 @@
+"""
+Latency and throughput of /api/start-assessment and /api/submit-assessment.
+
+In process, requests go through a FastAPI TestClient one at a time, so the
+numbers are the application's own cost without network or server overhead.
+With --workers, the app is also started under uvicorn with that many worker
+processes and driven over HTTP by --concurrency client threads.
+
+Every submission is distinct, so submit-assessment measures scoring rather
+than the result cache; the cached case replays the same submissions (with
+several uvicorn workers a replay only hits on the worker that scored it).
+The binary case sends the same submissions again in the binary wire format,
+whose results are cached under different keys, so it is scored too.
+
+    cd BackendPip
+    python benchmarks/bench_api.py --requests 500 --workers 1 2 --concurrency 8
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services import wire_format  # noqa: E402
+from synthetic import SyntheticRespondents  # noqa: E402
+
+ENDPOINTS = ('start-assessment', 'submit-assessment', 'submit-assessment (cached)', 'submit-assessment (binary)')
+Body = Union[Dict, bytes]
+
+
+def latency_summary(latencies: List[float], elapsed: float, errors: int = 0) -> Dict:
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'mean_ms': float(latencies.mean()),
+        'rps': len(latencies) / elapsed
+    }
+
+
+def request_bodies(requests: int, profile: str, missing_rate: float, seed: int) -> Dict[str, List[Body]]:
+    respondents = SyntheticRespondents(profile, missing_rate, seed)
+    submissions = respondents.submissions(requests)
+    return {
+        'start-assessment': [{'user_seed': f"bench-{seed}-{i}"} for i in range(requests)],
+        'submit-assessment': [{'responses': responses} for responses in submissions],
+        'submit-assessment (cached)': [{'responses': responses} for responses in submissions],
+        'submit-assessment (binary)': [
+            wire_format.encode_records(respondents.plan, [[(r['question_id'], r.get('response_value'),
+                                                            r.get('selected_option')) for r in responses]])
+            for responses in submissions
+        ]
+    }
+
+
+def post_body(client, path: str, body: Body) -> int:
+    # TestClient and httpx.Client alike
+    if isinstance(body, bytes):
+        return client.post(path, content=body, headers={'Content-Type': wire_format.CONTENT_TYPE}).status_code
+    return client.post(path, json=body).status_code
+
+
+def drive(post: Callable[[str, Body], int], bodies: Dict[str, List[Body]], concurrency: int) -> Dict:
+    results = {}
+    for endpoint in ENDPOINTS:
+        path = '/api/' + endpoint.split()[0]
+
+        def send(body: Body):
+            started = time.perf_counter()
+            status = post(path, body)
+            return time.perf_counter() - started, status
+
+        started = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(concurrency) as executor:
+                outcomes = list(executor.map(send, bodies[endpoint]))
+        else:
+            outcomes = [send(body) for body in bodies[endpoint]]
+        elapsed = time.perf_counter() - started
+        results[endpoint] = latency_summary([latency for latency, _ in outcomes], elapsed,
+                                            sum(1 for _, status in outcomes if status != 200))
+    return results
+
+
+def run_in_process(requests: int = 500, profile: str = 'population', missing_rate: float = 0.05,
+                   seed: int = 0) -> Dict:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    bodies = request_bodies(requests, profile, missing_rate, seed)
+    with TestClient(app) as client:
+        # Warm up the question bank, plans and norm tables outside the timed loop
+        client.post('/api/start-assessment', json={})
+        client.post('/api/submit-assessment', json=request_bodies(1, profile, missing_rate, seed + 1)
+                    ['submit-assessment'][0])
+        return drive(lambda path, body: post_body(client, path, body), bodies, concurrency=1)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run_server(workers: int, concurrency: int, requests: int = 500, profile: str = 'population',
+               missing_rate: float = 0.05, seed: int = 0, startup_timeout: float = 60.0) -> Dict:
+    import httpx
+
+    port = free_port()
+    env = dict(os.environ)
+    # Memory-only result cache, so every worker scores its own misses
+    env.pop('RESULT_CACHE_DIR', None)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+        cwd=BACKEND_DIR, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                if httpx.get(base_url + '/health').status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"uvicorn did not start on port {port}")
+            time.sleep(0.2)
+
+        bodies = request_bodies(requests, profile, missing_rate, seed)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        with httpx.Client(base_url=base_url, limits=limits, timeout=60.0) as client:
+            # One warm-up request per worker, give or take the kernel's connection balancing
+            warm_up = request_bodies(workers * 2, profile, missing_rate, seed + 1)['submit-assessment']
+            for body in warm_up:
+                client.post('/api/start-assessment', json={})
+                client.post('/api/submit-assessment', json=body)
+            return drive(lambda path, body: post_body(client, path, body), bodies, concurrency)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def run(requests: int = 500, workers: List[int] = (), concurrency: int = 8, profile: str = 'population',
+        missing_rate: float = 0.05, seed: int = 0) -> Dict:
+    results = {'in_process': run_in_process(requests, profile, missing_rate, seed)}
+    for n in workers:
+        results[f"uvicorn_{n}_workers"] = run_server(n, concurrency, requests, profile, missing_rate, seed)
+    return results
+
+
+def print_results(results: Dict):
+    print(f"{'mode':<20} {'endpoint':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rps':>8} {'errors':>7}")
+    for mode, endpoints in results.items():
+        for endpoint, r in endpoints.items():
+            print(f"{mode:<20} {endpoint:<28} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                  f"{r['rps']:>8.1f} {r['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint')
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help='Also benchmark uvicorn with each of these worker counts')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads against uvicorn')
+    parser.add_argument('--profile', default='population')
+    parser.add_argument('--missing-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print_results(run(args.requests, args.workers, args.concurrency, args.profile, args.missing_rate, args.seed))
+
+
+if __name__ == '__main__':
+    main()
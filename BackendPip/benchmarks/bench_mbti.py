@@ -0,0 +1,162 @@
+"""
+Calibration and cost of the 16-type MBTI posterior (app/services/mbti.py).
+
+Synthetic respondents' forced choices lean towards the letters of their
+Big Five thetas, so each respondent's true type is the sign of the four
+related thetas. For every trait profile this reports how often the most
+probable type is the true one against the probability it was given
+(expected calibration error over 10 bins), how often the true type is in
+the top 3, and the preference-total classification's accuracy for
+comparison. Scores are compared with a norm group built from the
+population profile's own scores, as the posterior assumes norms that match
+the people scored. With --fit, it also scans the temperature.
+
+    cd BackendPip
+    python benchmarks/bench_mbti.py --respondents 4000
+"""
+import argparse
+import os
+import sys
+from typing import Dict, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import mbti  # noqa: E402
+from app.services.scoring import ScoringService  # noqa: E402
+from bench_services import time_call  # noqa: E402
+from synthetic import BIG_FIVE_DIMENSIONS, TRAIT_PROFILES, SyntheticRespondents  # noqa: E402
+
+NORM_GROUP = 'synthetic-population'
+# Letter of a positive theta, per dichotomy in type code order
+TRUE_LETTERS = (('E', 'Extraversion'), ('N', 'Openness'), ('F', 'Agreeableness'), ('J', 'Conscientiousness'))
+
+
+def sample(scoring: ScoringService, profile: str, n: int, missing_rate: float,
+           seed: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Preference totals, Big Five scores and the respondents' true type indices
+    X = SyntheticRespondents(profile, missing_rate, seed).matrix(n)
+    # The same seed draws the same thetas first
+    thetas = SyntheticRespondents(profile, missing_rate, seed).thetas(n)
+    statistics = scoring.statistics(X)
+    raw = scoring.plan.raw_scores(statistics['raw_sums'], statistics['raw_weights'])
+    scores = scoring.standardize_matrix(raw, *scoring.irt_model.eap(statistics['log_likelihood']))[0]
+
+    codes = []
+    for row in thetas:
+        letters = []
+        for (first, second), (letter, dimension) in zip(mbti.DICHOTOMIES, TRUE_LETTERS):
+            positive = row[BIG_FIVE_DIMENSIONS.index(dimension)] > 0
+            letters.append(letter if positive else (second if letter == first else first))
+        codes.append(''.join(letters))
+    truth = np.array([mbti.TYPE_CODES.index(code) for code in codes])
+    return statistics['preferences'], scores, truth
+
+
+def preference_total_types(plan, preferences: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    # The classification results used before the posterior: each dichotomy's larger
+    # preference total, after adding 30% of the related Big Five score
+    preferences = preferences.copy()
+    for letter, dimension in TRUE_LETTERS:
+        pair = next(pair for pair in mbti.DICHOTOMIES if letter in pair)
+        other = pair[1] if letter == pair[0] else pair[0]
+        trait = scores[:, plan.dimensions.index(dimension)] / 100
+        preferences[:, plan.preference_letters.index(letter)] += trait * 0.3
+        preferences[:, plan.preference_letters.index(other)] += (1 - trait) * 0.3
+    codes = np.zeros(len(preferences), dtype=np.int64)
+    for first, second in mbti.DICHOTOMIES:
+        prefers_first = (preferences[:, plan.preference_letters.index(first)]
+                         > preferences[:, plan.preference_letters.index(second)])
+        codes = codes * 2 + ~prefers_first
+    return codes
+
+
+def calibration(probabilities: np.ndarray, truth: np.ndarray, bins: int = 10) -> Dict:
+    top = probabilities.argmax(axis=1)
+    confidence = probabilities.max(axis=1)
+    correct = top == truth
+    edges = np.minimum((confidence * bins).astype(int), bins - 1)
+    ece = sum(abs(confidence[edges == b].mean() - correct[edges == b].mean()) * (edges == b).mean()
+              for b in range(bins) if (edges == b).any())
+    top3 = (np.argsort(-probabilities, axis=1)[:, :3] == truth[:, np.newaxis]).any(axis=1)
+    return {
+        'top1_accuracy': float(correct.mean()),
+        'mean_top1_probability': float(confidence.mean()),
+        'calibration_error': float(ece),
+        'top3_coverage': float(top3.mean()),
+        'log_loss': float(-np.log(np.maximum(probabilities[np.arange(len(truth)), truth], 1e-12)).mean())
+    }
+
+
+def run(respondents: int = 4000, repeat: int = 5, missing_rate: float = 0.05, seed: int = 0,
+        temperatures=()) -> Dict:
+    scoring = ScoringService()
+    posterior = scoring.type_posterior
+
+    preferences, scores, truth = sample(scoring, 'population', respondents, missing_rate, seed)
+    lower, median, upper = np.percentile(scores, [15.87, 50, 84.13], axis=0)
+    scoring.norm_registry.add_group(NORM_GROUP, {
+        dimension: {'mean': float(median[j]), 'std_dev': float((upper[j] - lower[j]) / 2)}
+        for j, dimension in enumerate(scoring.plan.dimensions)
+    })
+    centers, spreads = scoring.norm_locations([NORM_GROUP] * respondents)
+
+    report = {'calibration': {}, 'temperature': {}, 'timing': {}}
+    for profile in TRAIT_PROFILES:
+        profile_preferences, profile_scores, profile_truth = (
+            (preferences, scores, truth) if profile == 'population'
+            else sample(scoring, profile, respondents, missing_rate, seed + 1))
+        z = (profile_scores - centers) / spreads
+        report['calibration'][profile] = calibration(posterior.probabilities(profile_preferences, z), profile_truth)
+        legacy = preference_total_types(scoring.plan, profile_preferences, profile_scores)
+        report['calibration'][profile]['preference_total_accuracy'] = float(np.mean(legacy == profile_truth))
+
+    z = (scores - centers) / spreads
+    for temperature in temperatures:
+        scaled = mbti.TypePosterior(scoring.plan.dimensions, 0.7)
+        scaled.letter_weights *= temperature / mbti.TEMPERATURE
+        scaled.dimension_weights *= temperature / mbti.TEMPERATURE
+        report['temperature'][str(temperature)] = calibration(scaled.probabilities(preferences, z), truth)
+
+    cases = {
+        'TypePosterior.probabilities': lambda: posterior.probabilities(preferences, z),
+        'TypePosterior.probabilities+summarize': lambda: posterior.summarize(posterior.probabilities(preferences, z)),
+        'ScoringService.classify_mbti_preferences': lambda: scoring.classify_mbti_preferences(preferences, scores)
+    }
+    for name, function in cases.items():
+        seconds = time_call(function, repeat)
+        report['timing'][name] = {'rows': respondents, 'ms_per_batch': seconds * 1e3,
+                                  'rows_per_s': respondents / seconds}
+    return report
+
+
+def print_results(report: Dict):
+    print(f"{'profile':<16} {'top-1':>7} {'mean p':>7} {'ECE':>7} {'top-3':>7} {'log loss':>9} {'totals':>7}")
+    for profile, r in report['calibration'].items():
+        print(f"{profile:<16} {r['top1_accuracy']:>7.3f} {r['mean_top1_probability']:>7.3f} "
+              f"{r['calibration_error']:>7.3f} {r['top3_coverage']:>7.3f} {r['log_loss']:>9.3f} "
+              f"{r['preference_total_accuracy']:>7.3f}")
+    if report['temperature']:
+        print(f"\n{'temperature':<16} {'ECE':>7} {'log loss':>9}")
+        for temperature, r in report['temperature'].items():
+            print(f"{temperature:<16} {r['calibration_error']:>7.3f} {r['log_loss']:>9.3f}")
+    print(f"\n{'batch':<44} {'ms/batch':>10} {'rows/s':>12}")
+    for name, r in report['timing'].items():
+        print(f"{name:<44} {r['ms_per_batch']:>10.2f} {r['rows_per_s']:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--respondents', type=int, default=4000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--missing-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fit', action='store_true', help='Also scan the temperature on the population profile')
+    args = parser.parse_args()
+
+    temperatures = np.round(np.arange(0.3, 1.01, 0.05), 2).tolist() if args.fit else ()
+    print_results(run(args.respondents, args.repeat, args.missing_rate, args.seed, temperatures))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Scoring latency and norm table memory against many norm groups.
+
+Registers synthetic norm groups, then scores single submissions and batches
+with a random group per submission. Per-request latency should stay flat as
+the number of groups grows, and compiled table memory should stop growing
+at the registry's max_tables.
+
+    cd BackendPip
+    python benchmarks/bench_norm_groups.py --groups 1 10 100 1000 --max-tables 32
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.pipeline import AssessmentPipeline  # noqa: E402
+from app.services.scoring import ScoringService  # noqa: E402
+
+
+def synthetic_matrix(plan, n: int, rng: np.random.RandomState) -> np.ndarray:
+    X = rng.randint(1, 8, size=(n, plan.n_items)).astype(np.float64)
+    X[:, plan.forced_choice_idx] = rng.randint(1, 3, size=(n, len(plan.forced_choice_idx)))
+    depth = np.concatenate([plan.shadow_idx, plan.individuation_idx, plan.archetype_idx])
+    X[:, depth] = rng.randint(1, 6, size=(n, len(depth)))
+    return X
+
+
+def register_groups(scoring: ScoringService, n_groups: int, rng: np.random.RandomState):
+    names = []
+    for g in range(n_groups):
+        name = f"synthetic_{g:05d}"
+        scoring.norm_registry.add_group(name, {
+            dimension: {'mean': float(rng.uniform(40, 60)), 'std_dev': float(rng.uniform(10, 20))}
+            for dimension in scoring.plan.dimensions
+        })
+        names.append(name)
+    return names
+
+
+def run(n_groups: int, max_tables: int, requests: int, batch_size: int, seed: int) -> dict:
+    rng = np.random.RandomState(seed)
+    scoring = ScoringService(max_norm_tables=max_tables)
+    pipeline = AssessmentPipeline(scoring)
+    groups = register_groups(scoring, n_groups, rng)
+    X = synthetic_matrix(scoring.plan, max(requests, batch_size), rng)
+
+    # Warm up the plan, IRT tables and the default group
+    pipeline.score_matrix(X[:1])
+
+    latencies = []
+    for i in range(requests):
+        group = groups[rng.randint(len(groups))]
+        started = time.perf_counter()
+        pipeline.score_matrix(X[i:i + 1], [group])
+        latencies.append(time.perf_counter() - started)
+
+    batch_groups = [groups[g] for g in rng.randint(len(groups), size=batch_size)]
+    started = time.perf_counter()
+    pipeline.score_matrix(X[:batch_size], batch_groups)
+    batch_seconds = time.perf_counter() - started
+
+    latencies = np.array(latencies) * 1000
+    stats = scoring.norm_registry.stats()
+    return {
+        'groups': n_groups,
+        'p50_ms': np.percentile(latencies, 50),
+        'p99_ms': np.percentile(latencies, 99),
+        'batch_rows_per_s': batch_size / batch_seconds,
+        'tables': stats['compiled'],
+        'table_mb': stats['compiled_bytes'] / 2 ** 20,
+        # Linux reports ru_maxrss in KB
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10,
+        'hit_rate': stats['hits'] / max(stats['hits'] + stats['misses'], 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--groups', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--max-tables', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'groups':>7} {'p50 ms':>8} {'p99 ms':>8} {'batch rows/s':>13} {'tables':>7} "
+          f"{'table MB':>9} {'max RSS MB':>11} {'hit rate':>9}")
+    for n_groups in args.groups:
+        r = run(n_groups, args.max_tables, args.requests, args.batch_size, args.seed)
+        print(f"{r['groups']:>7} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['batch_rows_per_s']:>13,.0f} "
+              f"{r['tables']:>7} {r['table_mb']:>9.1f} {r['max_rss_mb']:>11.1f} {r['hit_rate']:>9.1%}")
+
+
+if __name__ == '__main__':
+    main()
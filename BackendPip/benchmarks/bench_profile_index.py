@@ -0,0 +1,122 @@
+"""
+Recall and latency of the similar-profiles index (app/services/profile_index.py).
+
+Profiles are drawn from a multivariate normal fitted to the Big Five and
+facet scores of scored synthetic respondents, so they keep the scores'
+correlations. For each nprobe this reports recall@k of held-out queries
+against exact brute-force search on the unquantized scores, and the query
+latency percentiles; plus the build time and the index's memory.
+
+    cd BackendPip
+    python benchmarks/bench_profile_index.py --profiles 1000000
+    python benchmarks/bench_profile_index.py --profiles 10000000 --nprobe 16 32 64
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.pipeline import AssessmentPipeline  # noqa: E402
+from app.services.profile_index import ProfileIndex, profile_features, profile_vector  # noqa: E402
+from synthetic import SyntheticRespondents  # noqa: E402
+
+
+class ProfileDistribution:
+    def __init__(self, respondents: int = 4000, seed: int = 0):
+        pipeline = AssessmentPipeline()
+        self.features = profile_features(pipeline.scoring_service.plan)
+        X = SyntheticRespondents('population', 0.05, seed).matrix(respondents)
+        vectors = np.array([profile_vector(result['big_five'], self.features)
+                            for result in pipeline.score_matrix(X)])
+        self.mean = vectors.mean(axis=0)
+        self.factor = np.linalg.cholesky(np.cov(vectors, rowvar=False) + 1e-6 * np.eye(len(self.features)))
+
+    def sample(self, n: int, rng: np.random.RandomState) -> np.ndarray:
+        # Scores as results carry them: 0-100, one decimal
+        draws = rng.standard_normal((n, len(self.mean))).astype(np.float32) @ self.factor.T.astype(np.float32)
+        return np.clip(np.round(draws + self.mean, 1), 0, 100).astype(np.float32)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int, chunk_size: int = 200000) -> np.ndarray:
+    best = np.full((len(queries), 0), 0, dtype=np.int64)
+    best_distances = np.empty((len(queries), 0), dtype=np.float32)
+    query_norms = (queries ** 2).sum(axis=1)[:, np.newaxis]
+    for start in range(0, len(vectors), chunk_size):
+        chunk = vectors[start:start + chunk_size]
+        distances = query_norms - 2 * queries @ chunk.T + (chunk ** 2).sum(axis=1)
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        best = np.concatenate([best, top + start], axis=1)
+        best_distances = np.concatenate([best_distances, np.take_along_axis(distances, top, axis=1)], axis=1)
+        keep = np.argpartition(best_distances, k - 1, axis=1)[:, :k]
+        best = np.take_along_axis(best, keep, axis=1)
+        best_distances = np.take_along_axis(best_distances, keep, axis=1)
+    return best
+
+
+def run(profiles: int = 1000000, queries: int = 200, k: int = 10, nprobes: Sequence[int] = (8, 16, 32, 64),
+        n_lists: int = None, seed: int = 0) -> Dict:
+    rng = np.random.RandomState(seed)
+    distribution = ProfileDistribution(seed=seed)
+    vectors = np.empty((profiles, len(distribution.features)), dtype=np.float32)
+    for start in range(0, profiles, 100000):
+        vectors[start:start + 100000] = distribution.sample(min(100000, profiles - start), rng)
+    held_out = distribution.sample(queries, rng)
+    ids = np.char.add(b'p', np.arange(profiles).astype(np.bytes_))
+
+    started = time.perf_counter()
+    index = ProfileIndex.build(ids, vectors, distribution.features, n_lists=n_lists, seed=seed)
+    report = {
+        'profiles': profiles,
+        'lists': len(index.centroids),
+        'build_s': time.perf_counter() - started,
+        'index_mb': sum(array.nbytes for array in (index.codes, index.norms, index.ids, index.offsets)) / 1e6,
+        'nprobe': {}
+    }
+
+    truth = exact_neighbours(vectors, held_out, k)
+    for nprobe in nprobes:
+        found, latencies = 0, []
+        for query, expected in zip(held_out, truth):
+            started = time.perf_counter()
+            neighbours = index.search(query, k, nprobe)
+            latencies.append(time.perf_counter() - started)
+            found += len({int(id_[1:]) for id_, _ in neighbours} & set(expected.tolist()))
+        latencies = np.array(latencies) * 1e3
+        report['nprobe'][str(nprobe)] = {
+            f'recall_at_{k}': found / (k * queries),
+            'scanned_profiles': int(np.sort(np.diff(index.offsets))[-nprobe:].sum()),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95))
+        }
+    return report
+
+
+def print_results(report: Dict):
+    print(f"{report['profiles']:,} profiles in {report['lists']:,} lists: built in {report['build_s']:.1f}s, "
+          f"{report['index_mb']:.0f} MB")
+    print(f"{'nprobe':>8} {'recall':>8} {'max scanned':>12} {'p50 ms':>8} {'p95 ms':>8}")
+    for nprobe, r in report['nprobe'].items():
+        recall = next(value for key, value in r.items() if key.startswith('recall'))
+        print(f"{nprobe:>8} {recall:>8.3f} {r['scanned_profiles']:>12,} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profiles', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[8, 16, 32, 64])
+    parser.add_argument('--lists', type=int, help='Inverted lists (default: about sqrt(profiles))')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print_results(run(args.profiles, args.queries, args.k, args.nprobe, args.lists, args.seed))
+
+
+if __name__ == '__main__':
+    main()
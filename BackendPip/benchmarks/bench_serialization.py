@@ -0,0 +1,122 @@
+"""
+Response serialization: pydantic models against ResponseEncoder's fast path.
+
+Scores synthetic submissions over every trait profile and a range of missing
+rates and reports time and peak allocated bytes per response for both paths
+(tests/test_fast_json.py checks they write the same JSON). Request bodies are
+timed the same way: JSON parsed into the request models and encoded, against
+the binary wire format decoded straight into the response matrix.
+
+    cd BackendPip
+    python benchmarks/bench_serialization.py --submissions 500
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.assessment import (AssessmentResults, AssessmentSubmission, BatchScoreRequest,  # noqa: E402
+                                   BatchScoreResponse)
+from app.services import wire_format  # noqa: E402
+from app.services.pipeline import AssessmentPipeline  # noqa: E402
+from app.utils.fast_json import ResponseEncoder, orjson  # noqa: E402
+from bench_services import time_call  # noqa: E402
+from synthetic import TRAIT_PROFILES, SyntheticRespondents  # noqa: E402
+
+MISSING_RATES = (0.0, 0.05, 0.2, 0.5)
+
+
+def allocated_bytes(function: Callable) -> int:
+    # Peak bytes allocated by one call
+    function()
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def measure(function: Callable, repeat: int, rows: int, **extra) -> Dict:
+    return {'rows': rows, 'us_per_call': time_call(function, repeat) * 1e6,
+            'allocated_kb': allocated_bytes(function) / 1024, **extra}
+
+
+def run(submissions: int = 500, repeat: int = 5, seed: int = 0) -> Dict:
+    pipeline = AssessmentPipeline()
+    results = []
+    outcomes = []
+    per_case = max(submissions // (len(TRAIT_PROFILES) * len(MISSING_RATES)), 1)
+    for profile in TRAIT_PROFILES:
+        for missing_rate in MISSING_RATES:
+            respondents = SyntheticRespondents(profile, missing_rate, seed)
+            X = respondents.matrix(per_case)
+            counts = (~(X != X)).sum(axis=1)
+            results.extend(pipeline.score_matrix(X))
+            # Rows below the minimum come back as errors, so batches mix both kinds of item
+            outcomes.extend(pipeline.score_encoded_batch(X, counts))
+
+    results_encoder = ResponseEncoder(AssessmentResults)
+    batch_encoder = ResponseEncoder(BatchScoreResponse)
+    failed = sum(1 for outcome in outcomes if outcome['error'])
+    batch = {'results': outcomes, 'scored': len(outcomes) - failed, 'failed': failed}
+
+    report = {'timing': {}, 'parsing': {}}
+    cases = {
+        'AssessmentResults': (results_encoder, results[0], 1),
+        'BatchScoreResponse': (batch_encoder, batch, len(outcomes))
+    }
+    for name, (encoder, document, rows) in cases.items():
+        for path, fast in (('pydantic', False), ('fast', True)):
+            report['timing'][f"{name}/{path}"] = measure(lambda: encoder.encode(document, fast), repeat, rows)
+
+    plan = pipeline.scoring_service.plan
+    submissions = SyntheticRespondents('population', 0.05, seed).submissions(per_case)
+    records = [[(r['question_id'], r.get('response_value'), r.get('selected_option')) for r in responses]
+               for responses in submissions]
+    bodies = {
+        'AssessmentSubmission': (
+            json.dumps({'responses': submissions[0]}).encode(),
+            lambda body: plan.encode(AssessmentSubmission.model_validate_json(body).responses),
+            wire_format.encode_records(plan, records[:1]), 1
+        ),
+        'BatchScoreRequest': (
+            json.dumps({'submissions': [{'responses': responses} for responses in submissions]}).encode(),
+            lambda body: plan.encode_many([submission.responses for submission in
+                                           BatchScoreRequest.model_validate_json(body).submissions]),
+            wire_format.encode_records(plan, records), len(records)
+        )
+    }
+    for name, (json_body, parse_json, binary_body, rows) in bodies.items():
+        report['parsing'][f"{name}/json"] = measure(lambda: parse_json(json_body), repeat, rows,
+                                                    body_bytes=len(json_body))
+        report['parsing'][f"{name}/binary"] = measure(lambda: wire_format.decode(binary_body, plan), repeat, rows,
+                                                      body_bytes=len(binary_body))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--submissions', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if orjson is None:
+        sys.exit("orjson is not installed; the fast path falls back to pydantic")
+
+    report = run(args.submissions, args.repeat, args.seed)
+    print(f"{'encoder':<30} {'rows':>6} {'us/call':>10} {'alloc KB':>10}")
+    for name, r in report['timing'].items():
+        print(f"{name:<30} {r['rows']:>6} {r['us_per_call']:>10.1f} {r['allocated_kb']:>10.1f}")
+    print(f"\n{'request body':<30} {'rows':>6} {'us/call':>10} {'alloc KB':>10} {'bytes':>10}")
+    for name, r in report['parsing'].items():
+        print(f"{name:<30} {r['rows']:>6} {r['us_per_call']:>10.1f} {r['allocated_kb']:>10.1f} "
+              f"{r['body_bytes']:>10}")
+
+
+if __name__ == '__main__':
+    main()
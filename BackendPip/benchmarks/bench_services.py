@@ -0,0 +1,139 @@
+"""
+Microbenchmarks of the ScoringService, InterpretationService and
+AssessmentPipeline methods.
+
+Single-submission methods report the median time per call; matrix methods
+also run over a batch of synthetic submissions and report rows per second.
+
+    cd BackendPip
+    python benchmarks/bench_services.py --batch-size 1000 --repeat 7
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.assessment import QuestionResponse  # noqa: E402
+from app.services.interpretation import InterpretationService  # noqa: E402
+from app.services.pipeline import AssessmentPipeline  # noqa: E402
+from app.services.scoring import ScoringService  # noqa: E402
+from synthetic import SyntheticRespondents  # noqa: E402
+
+
+def time_call(function: Callable, repeat: int, min_seconds: float = 0.05) -> float:
+    # Median seconds per call over `repeat` timed loops, each at least min_seconds long
+    function()
+    loops, elapsed = 1, 0.0
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            break
+        loops *= 2
+    timings = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        timings.append((time.perf_counter() - started) / loops)
+    return float(np.median(timings))
+
+
+def single_cases(pipeline: AssessmentPipeline, responses: List[QuestionResponse]) -> List[Tuple[str, Callable]]:
+    scoring = pipeline.scoring_service
+    interpretation = pipeline.interpretation_service
+    X = scoring.encode_responses(responses)
+    raw = scoring.calculate_raw_scores(X)
+    irt = scoring.calculate_irt_scores(X)
+    standardized = scoring.standardize_scores(raw, irt)
+    scores = standardized['scores']
+    mbti = scoring.classify_mbti_type(scores, X)
+    result = pipeline.score_responses(responses)
+    return [
+        ('ScoringService.encode_responses', lambda: scoring.encode_responses(responses)),
+        ('ScoringService.calculate_raw_scores', lambda: scoring.calculate_raw_scores(X)),
+        ('ScoringService.calculate_irt_scores', lambda: scoring.calculate_irt_scores(X)),
+        ('ScoringService.statistics', lambda: scoring.statistics(X[np.newaxis, :])),
+        ('ScoringService.standardize_scores', lambda: scoring.standardize_scores(raw, irt)),
+        ('ScoringService.calculate_confidence_intervals',
+         lambda: scoring.calculate_confidence_intervals(scores, standardized['standard_errors'])),
+        ('ScoringService.calculate_facet_scores', lambda: scoring.calculate_facet_scores(X)),
+        ('ScoringService.classify_mbti_type', lambda: scoring.classify_mbti_type(scores, X)),
+        ('ScoringService.determine_function_stack',
+         lambda: scoring.determine_function_stack(mbti['primary_type'], scores, [])),
+        ('ScoringService.classify_to_cluster', lambda: scoring.classify_to_cluster(list(scores.values()))),
+        ('ScoringService.analyze_depth_responses', lambda: scoring.analyze_depth_responses(X)),
+        ('InterpretationService.generate_integrated_interpretation',
+         lambda: interpretation.generate_integrated_interpretation(result)),
+        ('InterpretationService.generate_development_suggestions',
+         lambda: interpretation.generate_development_suggestions(result)),
+        ('AssessmentPipeline.score_responses', lambda: pipeline.score_responses(responses))
+    ]
+
+
+def batch_cases(pipeline: AssessmentPipeline, X: np.ndarray,
+                submissions: List[List[QuestionResponse]]) -> List[Tuple[str, Callable]]:
+    scoring = pipeline.scoring_service
+    raw = scoring.plan.raw_score_matrix(X)
+    theta, se = scoring.calculate_irt_matrix(X)
+    scores, _, _ = scoring.standardize_matrix(raw, theta, se)
+    return [
+        ('ScoringPlan.encode_many', lambda: scoring.plan.encode_many(submissions)),
+        ('ScoringPlan.raw_score_matrix', lambda: scoring.plan.raw_score_matrix(X)),
+        ('ScoringService.calculate_irt_matrix', lambda: scoring.calculate_irt_matrix(X)),
+        ('ScoringService.statistics', lambda: scoring.statistics(X)),
+        ('ScoringService.standardize_matrix', lambda: scoring.standardize_matrix(raw, theta, se)),
+        ('ScoringService.facet_score_matrix', lambda: scoring.facet_score_matrix(X)),
+        ('ScoringService.classify_mbti_matrix', lambda: scoring.classify_mbti_matrix(X, scores)),
+        ('ScoringService.classify_cluster_matrix', lambda: scoring.classify_cluster_matrix(scores)),
+        ('ScoringService.analyze_depth_matrix', lambda: scoring.analyze_depth_matrix(X)),
+        ('AssessmentPipeline.score_matrix', lambda: pipeline.score_matrix(X)),
+        ('AssessmentPipeline.score_batch', lambda: pipeline.score_batch(submissions))
+    ]
+
+
+def run(batch_size: int = 1000, repeat: int = 5, profile: str = 'population',
+        missing_rate: float = 0.05, seed: int = 0) -> Dict:
+    pipeline = AssessmentPipeline(ScoringService(), InterpretationService())
+    respondents = SyntheticRespondents(profile, missing_rate, seed)
+    submissions = [[QuestionResponse(**response) for response in responses]
+                   for responses in respondents.submissions(batch_size)]
+    X = pipeline.scoring_service.plan.encode_many(submissions)
+
+    results = {'single': {}, 'batch': {}}
+    for name, function in single_cases(pipeline, submissions[0]):
+        results['single'][name] = {'us_per_call': time_call(function, repeat) * 1e6}
+    for name, function in batch_cases(pipeline, X, submissions):
+        seconds = time_call(function, repeat)
+        results['batch'][name] = {'rows': batch_size, 'ms_per_batch': seconds * 1e3,
+                                  'rows_per_s': batch_size / seconds}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--profile', default='population')
+    parser.add_argument('--missing-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = run(args.batch_size, args.repeat, args.profile, args.missing_rate, args.seed)
+    print(f"{'single submission':<58} {'us/call':>10}")
+    for name, r in results['single'].items():
+        print(f"{name:<58} {r['us_per_call']:>10.1f}")
+    print(f"\n{f'batch of {args.batch_size}':<58} {'ms/batch':>10} {'rows/s':>12}")
+    for name, r in results['batch'].items():
+        print(f"{name:<58} {r['ms_per_batch']:>10.1f} {r['rows_per_s']:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
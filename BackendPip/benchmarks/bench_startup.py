@@ -0,0 +1,115 @@
+"""
+Cold start: how long a fresh worker process takes to import the app, to
+finish the lifespan warm-up (/ready answering 200) and to serve its first
+submission, and how much memory it holds.
+
+Each run is a new interpreter. 'warm' runs the app's lifespan, so the first
+submission comes after the warm-up; 'cold' skips it, so the first submission
+compiles the scoring artifacts itself. Also lists any heavy library (scipy,
+scikit-learn, pandas) that importing the app pulled in: none should be.
+
+    cd BackendPip
+    python benchmarks/bench_startup.py --repeat 5 --backends thread process
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+MODES = ('warm', 'cold')
+HEAVY_MODULES = ('scipy', 'sklearn', 'pandas')
+READY_TIMEOUT = 120.0
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_child(mode: str) -> Dict:
+    started = time.perf_counter()
+    from app.main import app
+    result = {
+        'import_ms': (time.perf_counter() - started) * 1000,
+        'import_rss_mb': peak_rss_mb(),
+        'heavy_modules': [module for module in HEAVY_MODULES if module in sys.modules]
+    }
+
+    from fastapi.testclient import TestClient
+    from synthetic import SyntheticRespondents
+    body = {'responses': SyntheticRespondents('population', 0.0, 0).submissions(1)[0]}
+
+    def first_request(client) -> float:
+        started = time.perf_counter()
+        response = client.post('/api/submit-assessment', json=body)
+        response.raise_for_status()
+        return (time.perf_counter() - started) * 1000
+
+    if mode == 'warm':
+        with TestClient(app) as client:
+            started = time.perf_counter()
+            while client.get('/ready').status_code != 200:
+                if time.perf_counter() - started > READY_TIMEOUT:
+                    raise RuntimeError(f"Not ready after {READY_TIMEOUT:.0f}s: {client.get('/ready').json()}")
+                time.sleep(0.001)
+            result['ready_ms'] = (time.perf_counter() - started) * 1000
+            result['first_request_ms'] = first_request(client)
+    else:
+        # Without entering the client, the lifespan (and so the warm-up) never runs
+        result['first_request_ms'] = first_request(TestClient(app))
+    result['rss_mb'] = peak_rss_mb()
+    return result
+
+
+def run_child(mode: str, backend: str) -> Dict:
+    env = dict(os.environ, SCORING_BACKEND=backend)
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode],
+                               cwd=os.path.dirname(BENCHMARKS_DIR), env=env, capture_output=True, text=True,
+                               check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(repeat: int = 3, backends: List[str] = ('thread',)) -> Dict:
+    results = {}
+    for backend in backends:
+        for mode in MODES:
+            runs = [run_child(mode, backend) for _ in range(repeat)]
+            summary = {key: float(np.median([r[key] for r in runs])) for key in runs[0] if key != 'heavy_modules'}
+            summary['heavy_modules'] = sorted({module for r in runs for module in r['heavy_modules']})
+            results[f"{backend}/{mode}"] = summary
+    return results
+
+
+def print_results(results: Dict):
+    print(f"{'backend/mode':<16} {'import ms':>10} {'ready ms':>10} {'first req ms':>13} {'import MB':>10} "
+          f"{'peak MB':>8}  heavy modules")
+    for name, r in results.items():
+        ready = f"{r['ready_ms']:>10.1f}" if 'ready_ms' in r else f"{'-':>10}"
+        print(f"{name:<16} {r['import_ms']:>10.1f} {ready} {r['first_request_ms']:>13.1f} "
+              f"{r['import_rss_mb']:>10.1f} {r['rss_mb']:>8.1f}  {', '.join(r['heavy_modules']) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh processes per backend and mode')
+    parser.add_argument('--backends', nargs='*', default=['thread'], choices=['inline', 'thread', 'process'])
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_child(args.child)))
+        return
+    print_results(run(args.repeat, args.backends))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Runs the service, serialization, API, startup, MBTI and profile index
+benchmarks and saves the results as JSON, tagged with the git commit and
+machine, so runs on different commits can be compared.
+
+    cd BackendPip
+    python benchmarks/run_benchmarks.py --workers 1 2
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<earlier run>.json
+
+With --compare, every latency (lower is better) and throughput (higher is
+better) that moved by more than --threshold against the earlier run is
+listed, and the exit status is 1 if any of them got worse.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+import bench_api  # noqa: E402
+import bench_mbti  # noqa: E402
+import bench_profile_index  # noqa: E402
+import bench_serialization  # noqa: E402
+import bench_services  # noqa: E402
+import bench_startup  # noqa: E402
+
+RESULTS_FORMAT = 'benchmarks/1'
+LOWER_IS_BETTER = ('_ms', 'us_per_call', '_kb', '_mb')
+HIGHER_IS_BETTER = ('rps', 'rows_per_s')
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARKS_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def machine() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+
+def metrics(results: Dict, prefix: str = '') -> Iterator[Tuple[str, float]]:
+    for key, value in results.items():
+        name = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from metrics(value, name)
+        elif isinstance(value, (int, float)) and (key.endswith(LOWER_IS_BETTER) or key.endswith(HIGHER_IS_BETTER)):
+            yield name, float(value)
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> int:
+    # Prints metrics that moved by more than threshold; returns the number of regressions
+    before = dict(metrics(baseline['results']))
+    regressions = 0
+    print(f"\nAgainst {baseline['commit']} ({baseline['timestamp']}), threshold {threshold:.0%}:")
+    for name, value in metrics(current['results']):
+        if name not in before or before[name] == 0:
+            continue
+        change = value / before[name] - 1
+        worse = change > threshold if not name.endswith(HIGHER_IS_BETTER) else change < -threshold
+        better = change < -threshold if not name.endswith(HIGHER_IS_BETTER) else change > threshold
+        if worse or better:
+            regressions += worse
+            print(f"  {'REGRESSION' if worse else 'improved':<10} {name:<80} "
+                  f"{before[name]:>12.2f} -> {value:>12.2f} ({change:+.1%})")
+    if not regressions:
+        print("  no regressions")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-o', '--output', help='Results file (default: benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative change to report (default: 0.1)')
+    parser.add_argument('--skip', nargs='*', default=[],
+                        choices=['services', 'serialization', 'api', 'startup', 'mbti', 'profiles'])
+    parser.add_argument('--requests', type=int, default=500, help='API requests per endpoint')
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help='Also benchmark the API under uvicorn with each of these worker counts')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--profiles', type=int, default=200000, help='Profiles in the benchmarked profile index')
+    parser.add_argument('--profile', default='population')
+    parser.add_argument('--missing-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    commit = git_commit()
+    report = {
+        'format': RESULTS_FORMAT,
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'machine': machine(),
+        'parameters': {key: value for key, value in vars(args).items()
+                       if key not in ('output', 'compare', 'threshold')},
+        'results': {}
+    }
+
+    if 'services' not in args.skip:
+        report['results']['services'] = bench_services.run(args.batch_size, args.repeat, args.profile,
+                                                           args.missing_rate, args.seed)
+    if 'serialization' not in args.skip:
+        report['results']['serialization'] = bench_serialization.run(args.batch_size, args.repeat, args.seed)
+    if 'api' not in args.skip:
+        report['results']['api'] = bench_api.run(args.requests, args.workers, args.concurrency, args.profile,
+                                                 args.missing_rate, args.seed)
+        bench_api.print_results(report['results']['api'])
+    if 'startup' not in args.skip:
+        report['results']['startup'] = bench_startup.run(args.repeat)
+        bench_startup.print_results(report['results']['startup'])
+    if 'mbti' not in args.skip:
+        report['results']['mbti'] = bench_mbti.run(args.batch_size, args.repeat, args.missing_rate, args.seed)
+        bench_mbti.print_results(report['results']['mbti'])
+    if 'profiles' not in args.skip:
+        report['results']['profiles'] = bench_profile_index.run(args.profiles, seed=args.seed)
+        bench_profile_index.print_results(report['results']['profiles'])
+
+    output = args.output or os.path.join(BENCHMARKS_DIR, 'results',
+                                         f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
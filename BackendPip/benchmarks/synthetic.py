@@ -0,0 +1,114 @@
+"""
+Synthetic submissions generated from questions.json.
+
+Primary items are sampled from the Graded Response Model in
+questions/item_parameters.json at a respondent's Big Five thetas, forced-choice
+items lean towards the option whose MBTI letters match those traits, and depth
+items are drawn around the scale midpoint. A trait profile sets the theta
+distribution and missing_rate drops answers at random.
+"""
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.irt import load_item_parameters, parameter_arrays  # noqa: E402
+from app.services.question_bank import QuestionBank  # noqa: E402
+from app.services.scoring_plan import BIG_FIVE_DIMENSIONS, ScoringPlan  # noqa: E402
+
+# Theta mean and standard deviation per Big Five dimension
+# (Extraversion, Agreeableness, Conscientiousness, Neuroticism, Openness)
+TRAIT_PROFILES: Dict[str, Dict[str, List[float]]] = {
+    'population': {'mean': [0.0, 0.0, 0.0, 0.0, 0.0], 'std': [1.0, 1.0, 1.0, 1.0, 1.0]},
+    'resilient': {'mean': [0.6, 0.4, 0.6, -0.6, 0.4], 'std': [0.5, 0.5, 0.5, 0.5, 0.5]},
+    'overcontrolled': {'mean': [-0.6, 0.0, 0.2, 0.8, -0.2], 'std': [0.5, 0.5, 0.5, 0.5, 0.5]},
+    'extreme': {'mean': [0.0, 0.0, 0.0, 0.0, 0.0], 'std': [2.0, 2.0, 2.0, 2.0, 2.0]}
+}
+
+# MBTI letter -> (Big Five dimension, direction) used to bias forced choices
+LETTER_TRAITS = {
+    'E': ('Extraversion', 1.0), 'I': ('Extraversion', -1.0),
+    'N': ('Openness', 1.0), 'S': ('Openness', -1.0),
+    'F': ('Agreeableness', 1.0), 'T': ('Agreeableness', -1.0),
+    'J': ('Conscientiousness', 1.0), 'P': ('Conscientiousness', -1.0)
+}
+
+DEPTH_PROBABILITIES = [0.1, 0.2, 0.4, 0.2, 0.1]
+
+
+class SyntheticRespondents:
+    def __init__(self, profile: str = 'population', missing_rate: float = 0.05, seed: int = 0,
+                 question_bank: Optional[QuestionBank] = None):
+        if profile not in TRAIT_PROFILES:
+            raise ValueError(f"Unknown trait profile '{profile}', expected one of: {', '.join(TRAIT_PROFILES)}")
+        snapshot = (question_bank or QuestionBank()).snapshot
+        self.questions = snapshot.questions
+        self.plan = ScoringPlan(snapshot.questions, snapshot.version)
+        self.profile = TRAIT_PROFILES[profile]
+        self.missing_rate = missing_rate
+        self.rng = np.random.RandomState(seed)
+
+        self.primary = [i for i, q in enumerate(self.questions) if q.get('dimension') in BIG_FIVE_DIMENSIONS]
+        self.primary_dimension = np.array([BIG_FIVE_DIMENSIONS.index(self.questions[i]['dimension'])
+                                           for i in self.primary])
+        self.primary_reverse = np.array([bool(self.questions[i].get('reverse_scored')) for i in self.primary])
+        self.discrimination, self.thresholds = parameter_arrays(
+            load_item_parameters(), [self.questions[i]['id'] for i in self.primary]
+        )
+        self.forced_choice = [i for i, q in enumerate(self.questions) if q['response_type'] == 'forced_choice']
+        self.depth = [i for i, q in enumerate(self.questions) if q['response_type'] == 'likert_5']
+
+    def thetas(self, n: int) -> np.ndarray:
+        return self.rng.normal(self.profile['mean'], self.profile['std'], size=(n, len(BIG_FIVE_DIMENSIONS)))
+
+    def _forced_choice_lean(self, question: Dict, theta: np.ndarray) -> float:
+        lean = 0.0
+        for option, sign in (('option_a', 1.0), ('option_b', -1.0)):
+            for letter, weight in question[option]['scores'].items():
+                dimension, direction = LETTER_TRAITS.get(letter, (None, 0.0))
+                if dimension:
+                    lean += sign * weight * direction * theta[BIG_FIVE_DIMENSIONS.index(dimension)]
+        return lean
+
+    def submissions(self, n: int) -> List[List[Dict]]:
+        """
+        n submissions as lists of response dicts in the submit-assessment format,
+        in random answer order.
+        """
+        thetas = self.thetas(n)
+        # GRM: P(category >= k) is the logistic of each boundary, so a uniform draw
+        # lands in the category given by the number of boundaries it falls below
+        z = self.discrimination[:, np.newaxis] * (thetas[:, self.primary_dimension][:, :, np.newaxis]
+                                                   - self.thresholds)
+        exceed = 1 / (1 + np.exp(-z))
+        draws = self.rng.random_sample((n, len(self.primary), 1))
+        categories = (draws < exceed).sum(axis=2)
+        values = np.where(self.primary_reverse, 7 - categories, categories + 1)
+
+        submissions = []
+        for row in range(n):
+            responses = [{'question_id': self.questions[i]['id'], 'response_value': int(values[row, k])}
+                         for k, i in enumerate(self.primary)]
+            for i in self.forced_choice:
+                p_a = 1 / (1 + np.exp(-self._forced_choice_lean(self.questions[i], thetas[row])))
+                responses.append({'question_id': self.questions[i]['id'],
+                                  'selected_option': 'a' if self.rng.random_sample() < p_a else 'b'})
+            for i, value in zip(self.depth, self.rng.choice(5, size=len(self.depth), p=DEPTH_PROBABILITIES) + 1):
+                responses.append({'question_id': self.questions[i]['id'], 'response_value': int(value)})
+
+            keep = self.rng.random_sample(len(responses)) >= self.missing_rate
+            order = self.rng.permutation(len(responses))
+            submissions.append([responses[j] for j in order if keep[j]])
+        return submissions
+
+    def matrix(self, n: int) -> np.ndarray:
+        # The same submissions encoded as a ScoringPlan response matrix
+        X = np.empty((n, self.plan.n_items))
+        for row, responses in enumerate(self.submissions(n)):
+            X[row] = self.plan.encode_records(
+                (r['question_id'], r.get('response_value'), r.get('selected_option')) for r in responses
+            )
+        return X
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the app package the way the server does, from BackendPip
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,95 @@
+import pytest
+
+from app.models.assessment import AssessmentLayer, QuestionResponse
+from app.services.adaptive import AdaptiveTester
+from app.services.pipeline import AssessmentPipeline
+from app.services.question_bank import QuestionBank
+from app.services.sessions import SessionStore
+
+
+@pytest.fixture(scope='module')
+def question_bank() -> QuestionBank:
+    return QuestionBank()
+
+
+@pytest.fixture
+def tester(question_bank) -> AdaptiveTester:
+    return AdaptiveTester(SessionStore(AssessmentPipeline()), question_bank)
+
+
+@pytest.fixture(scope='module')
+def questions(question_bank):
+    return {question['id']: question for question in question_bank.snapshot.questions}
+
+
+@pytest.fixture(scope='module')
+def primary_ids(question_bank):
+    snapshot = question_bank.snapshot
+    return {snapshot.questions[i]['id'] for i in snapshot.layers[AssessmentLayer.PRIMARY.value]}
+
+
+def _response(question) -> QuestionResponse:
+    # A consistent respondent: high on Extraversion, middling elsewhere
+    if question['response_type'] == 'forced_choice':
+        return QuestionResponse(question_id=question['id'], selected_option='a')
+    if question['response_type'] == 'likert_5':
+        return QuestionResponse(question_id=question['id'], response_value=3)
+    value = 6 if question['dimension'] == 'Extraversion' else 3
+    if question['reverse_scored']:
+        value = 8 - value
+    return QuestionResponse(question_id=question['id'], response_value=value)
+
+
+def _run_adaptive_phase(tester, session, questions):
+    # Answer every served question; the SEs before each answer, and the ids served
+    served, standard_errors = [], []
+    question_id = session.adaptive.pending
+    while question_id is not None:
+        standard_errors.append(tester.standard_errors(session))
+        served.append(question_id)
+        question_id = tester.answer(session, [_response(questions[question_id])])
+    return served, standard_errors
+
+
+def test_stops_once_every_standard_error_is_below_threshold(tester, questions, primary_ids):
+    session = tester.start(user_seed='u1', se_threshold=0.4)
+    served, standard_errors = _run_adaptive_phase(tester, session, questions)
+
+    assert session.adaptive.finished
+    assert set(served) <= primary_ids
+    assert len(set(served)) == len(served)
+    # Every SE is below the threshold at the end, and some dimension was still open before the last answer
+    assert all(se < 0.4 for se in tester.standard_errors(session).values())
+    assert all(max(step.values()) >= 0.4 for step in standard_errors)
+    assert tester.advance(session) is None
+
+
+def test_stops_at_max_items(tester, questions):
+    session = tester.start(user_seed='u1', se_threshold=0.01, max_items=12)
+    served, _ = _run_adaptive_phase(tester, session, questions)
+    assert len(served) == 12
+    assert session.adaptive.finished
+    assert any(se >= 0.01 for se in tester.standard_errors(session).values())
+
+
+def test_remaining_layers_follow(tester, question_bank, questions, primary_ids):
+    session = tester.start(user_seed='u1', se_threshold=0.4)
+    served, _ = _run_adaptive_phase(tester, session, questions)
+
+    # The secondary and tertiary layers, in the order start-assessment shuffles them for this seed
+    snapshot = question_bank.snapshot
+    expected = [snapshot.questions[i]['id'] for i in snapshot.shuffled_order('u1')
+                if snapshot.questions[i]['id'] not in primary_ids]
+    remaining = session.adaptive.remaining
+    assert remaining == expected
+    assert not set(served) & set(remaining)
+
+    # Complete only once the required share of them has been answered as well
+    required = session.required
+    assert required == len(served) + session.adaptive.remaining_required
+    tester.store.answer(session, [_response(questions[question_id])
+                                  for question_id in remaining[:session.adaptive.remaining_required - 1]])
+    assert not session.complete
+    tester.store.answer(session, [_response(questions[remaining[session.adaptive.remaining_required - 1]])])
+    assert session.complete
+    assert tester.store.results(session)
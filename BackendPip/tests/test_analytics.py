@@ -0,0 +1,129 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from app.cli.analytics import aggregate
+from app.services.analytics import PopulationAnalytics, observation, snapshot_paths, worker_snapshot_path
+from app.services.pipeline import AssessmentPipeline
+
+START = 1717200000  # 2024-06-01T00:00:00Z
+
+
+@pytest.fixture(scope='module')
+def results():
+    pipeline = AssessmentPipeline()
+    plan = pipeline.scoring_service.plan
+    rng = np.random.RandomState(0)
+    X = np.where(plan.is_forced_choice, rng.randint(1, 3, size=(30, plan.n_items)),
+                 rng.randint(1, 6, size=(30, plan.n_items))).astype(np.float64)
+    return pipeline.score_matrix(X)
+
+
+def _worker(results, pid_offset: int) -> PopulationAnalytics:
+    analytics = PopulationAnalytics(3600)
+    analytics.add_results((START + 600 * (row + pid_offset), result) for row, result in enumerate(results))
+    return analytics
+
+
+def _respondents(analytics: PopulationAnalytics) -> int:
+    return analytics.query()['total']['respondents']
+
+
+def test_workers_neither_overwrite_nor_double_count(tmp_path, results):
+    path = str(tmp_path / 'analytics.json')
+    # An offline snapshot and another worker's, next to this process's own earlier one
+    _worker(results[:10], 0).save(path)
+    _worker(results[10:15], 1).save(f"{path}.1")
+    _worker(results[15:18], 2).save(worker_snapshot_path(path))
+
+    analytics = PopulationAnalytics.load_worker(path, 3600)
+    assert _respondents(analytics) == 18
+    analytics.add_results((START, result) for result in results[18:])
+    assert _respondents(analytics) == 30
+
+    # Saving writes only this worker's counts, so loading again counts everything once
+    analytics.save(worker_snapshot_path(path))
+    assert _respondents(PopulationAnalytics.load(worker_snapshot_path(path))) == 3 + 12
+    assert _respondents(PopulationAnalytics.load_worker(path, 3600)) == 30
+
+
+def _exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_history_follows_sibling_ticks(tmp_path, results):
+    path = str(tmp_path / 'analytics.json')
+    # pid 1 never exits, so its snapshot stands for a live sibling
+    _worker(results[:10], 1).save(f"{path}.1")
+    analytics = PopulationAnalytics.load_worker(path, 3600)
+    analytics.add_results((START, result) for result in results[25:])
+    assert _respondents(analytics) == 15
+
+    _worker(results[:20], 1).save(f"{path}.1")
+    analytics.sync_worker(path, stale_seconds=60)
+    assert _respondents(analytics) == 25
+    assert snapshot_paths(path) == [f"{path}.1", worker_snapshot_path(path)]
+
+
+def test_exited_workers_fold_into_the_shared_snapshot(tmp_path, results):
+    path = str(tmp_path / 'analytics.json')
+    _worker(results[:10], 0).save(path)
+    exited, recent, live = f"{path}.{_exited_pid()}", f"{path}.{_exited_pid()}", f"{path}.1"
+    _worker(results[10:15], 1).save(exited)
+    _worker(results[15:18], 2).save(recent)
+    _worker(results[18:20], 3).save(live)
+    for old in (exited, live):
+        os.utime(old, (START, START))
+
+    analytics = PopulationAnalytics.load_worker(path, 3600)
+    analytics.add_results((START, result) for result in results[20:])
+    analytics.sync_worker(path, stale_seconds=60)
+
+    # Only the exited worker's stale snapshot is folded; nothing is lost or counted twice
+    assert not os.path.exists(exited)
+    assert all(os.path.exists(other) for other in (recent, live, worker_snapshot_path(path)))
+    assert _respondents(PopulationAnalytics.load(path)) == 15
+    assert _respondents(analytics) == 30
+    assert _respondents(PopulationAnalytics.load_worker(path, 3600)) == 30
+    assert _respondents(aggregate([], [path], with_workers=True)) == 30
+
+
+def test_snapshot_paths(tmp_path):
+    path = str(tmp_path / 'analytics.json')
+    for name in ('analytics.json', 'analytics.json.12', 'analytics.json.3', 'analytics.json.bak', 'other.json.4'):
+        (tmp_path / name).write_text('{}')
+    assert snapshot_paths(path) == [path, f"{path}.3", f"{path}.12"]
+    assert snapshot_paths(str(tmp_path / 'missing' / 'analytics.json')) == []
+
+
+def test_cli_merges_worker_snapshots(tmp_path, results):
+    path = str(tmp_path / 'analytics.json')
+    _worker(results[:10], 0).save(f"{path}.101")
+    _worker(results[10:], 1).save(f"{path}.102")
+
+    merged = aggregate([], [path], with_workers=True)
+    assert _respondents(merged) == 30
+    with pytest.raises(FileNotFoundError):
+        aggregate([], [path])
+    expected = _worker(results, 0).query(interval=86400)
+    assert merged.query(interval=86400)['total'] == expected['total']
+
+
+def test_primary_cluster_counts(results):
+    analytics = PopulationAnalytics(3600)
+    analytics.add_results((START, result) for result in results)
+    unnamed = dict(results[0], personality_cluster={'primary_cluster': 2, 'cluster_probabilities': [0.1, 0.2, 0.7]})
+    analytics.add_results([(START, unnamed)])
+
+    expected = {}
+    for result in results:
+        name = result['personality_cluster']['cluster_description']
+        expected[name] = expected.get(name, 0) + 1
+    expected['Cluster 3'] = 1
+    assert analytics.query()['total']['clusters'] == dict(sorted(expected.items()))
+    assert observation(unnamed)[1] == 'Cluster 3'
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from app.services.clusters import CLUSTER_PROTOTYPES, GaussianMixtureClassifier, train_cluster_model
+
+# The order PersonalityClusterCard labels primary_cluster by
+FRONTEND_CLUSTERS = ['Resilient', 'Overcontrolled', 'Undercontrolled', 'Average']
+
+
+def _scores(seed: int = 0) -> np.ndarray:
+    # Average is the heaviest and Resilient the lightest, the reverse of the prototype order
+    rng = np.random.RandomState(seed)
+    sizes = {'Resilient': 300, 'Overcontrolled': 500, 'Undercontrolled': 700, 'Average': 1500}
+    return np.vstack([rng.normal(CLUSTER_PROTOTYPES[name], 5, size=(n, 5)) for name, n in sizes.items()])
+
+
+@pytest.mark.parametrize('n_components', [4, 5])
+def test_primary_cluster_indexes_the_archetype(n_components):
+    model = train_cluster_model(_scores(), n_components=(n_components,), n_init=1)
+    names = [cluster['name'] for cluster in model['clusters']]
+    assert names[:4] == FRONTEND_CLUSTERS
+
+    classifier = GaussianMixtureClassifier(model)
+    prototypes = np.array([CLUSTER_PROTOTYPES[name] for name in FRONTEND_CLUSTERS], dtype=np.float64)
+    for name, result in zip(FRONTEND_CLUSTERS, classifier.classify(prototypes)):
+        assert FRONTEND_CLUSTERS[result['primary_cluster']] == name
+        assert result['cluster_description'] == name
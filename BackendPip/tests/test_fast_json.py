@@ -0,0 +1,80 @@
+"""
+ResponseEncoder's fast path must write exactly the JSON of the response
+models it stands in for, for every encoder the API serves with FAST_JSON=1.
+"""
+import numpy as np
+import pytest
+
+from app.models.assessment import (AssessmentResults, BatchScoreResponse, PopulationAnalyticsResponse,
+                                   QuestionResponse, SessionResults)
+from app.services.analytics import PopulationAnalytics
+from app.services.pipeline import AssessmentPipeline
+from app.utils.fast_json import ResponseEncoder
+
+# Without orjson both paths are pydantic
+pytest.importorskip('orjson')
+
+MISSING_RATES = (0.0, 0.05, 0.3, 0.9)
+
+
+@pytest.fixture(scope='module')
+def pipeline() -> AssessmentPipeline:
+    return AssessmentPipeline()
+
+
+@pytest.fixture(scope='module')
+def matrix(pipeline) -> np.ndarray:
+    # Random answers per item type, skipped at each missing rate; the 0.9 rows fall below the minimum
+    rng = np.random.RandomState(0)
+    scoring = pipeline.scoring_service
+    rows = []
+    for missing_rate in MISSING_RATES:
+        for _ in range(10):
+            responses = []
+            for question_id, question in scoring.questions.items():
+                if rng.random_sample() < missing_rate:
+                    continue
+                if question['response_type'] == 'forced_choice':
+                    responses.append(QuestionResponse(question_id=question_id, selected_option='ab'[rng.randint(2)]))
+                else:
+                    high = 7 if question['response_type'] == 'likert_7' else 5
+                    value = rng.randint(1, high + 1)
+                    responses.append(QuestionResponse(question_id=question_id, response_value=value))
+            rows.append(scoring.encode_responses(responses))
+    return np.vstack(rows)
+
+
+def _assert_same_json(encoder: ResponseEncoder, document):
+    assert encoder.encode(document, fast=True) == encoder.encode(document)
+
+
+def test_assessment_results(pipeline, matrix):
+    encoder = ResponseEncoder(AssessmentResults)
+    for result in pipeline.score_matrix(matrix):
+        _assert_same_json(encoder, result)
+
+
+def test_batch_response(pipeline, matrix):
+    outcomes = pipeline.score_encoded_batch(matrix, (~np.isnan(matrix)).sum(axis=1))
+    failed = sum(1 for outcome in outcomes if outcome['error'])
+    assert 0 < failed < len(outcomes)
+    _assert_same_json(ResponseEncoder(BatchScoreResponse),
+                      {'results': outcomes, 'scored': len(outcomes) - failed, 'failed': failed})
+
+
+def test_session_results(pipeline, matrix):
+    encoder = ResponseEncoder(SessionResults)
+    statistics = pipeline.scoring_service.statistics(matrix)
+    for row, results in enumerate(pipeline.score_statistics(statistics)):
+        answered = int((~np.isnan(matrix[row])).sum())
+        _assert_same_json(encoder, {'session_id': f"s{row}", 'answered': answered,
+                                    'provisional': row % 2 == 0, 'results': results})
+
+
+@pytest.mark.parametrize('interval', [None, 3600])
+def test_population_analytics(pipeline, matrix, interval):
+    analytics = PopulationAnalytics(window_seconds=3600)
+    results = pipeline.score_matrix(matrix)
+    analytics.add_results((1700000000 + 900 * row, result) for row, result in enumerate(results))
+    _assert_same_json(ResponseEncoder(PopulationAnalyticsResponse), analytics.query(interval=interval))
+    _assert_same_json(ResponseEncoder(PopulationAnalyticsResponse), PopulationAnalytics().query())
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from app.services.mbti import DICHOTOMIES, TYPE_CODES
+from app.services.pipeline import AssessmentPipeline
+
+
+@pytest.fixture(scope='module')
+def pipeline() -> AssessmentPipeline:
+    return AssessmentPipeline()
+
+
+@pytest.fixture(scope='module')
+def results(pipeline):
+    # Random answers, including rows with no forced-choice answers at all
+    rng = np.random.RandomState(0)
+    plan = pipeline.scoring_service.plan
+    X = np.where(plan.is_forced_choice, rng.randint(1, 3, size=(200, plan.n_items)),
+                 rng.randint(1, 6, size=(200, plan.n_items))).astype(np.float64)
+    X[:20, plan.is_forced_choice] = np.nan
+    return pipeline.score_matrix(X)
+
+
+def test_type_fields_agree_with_the_posterior(results):
+    for result in results:
+        mbti = result['mbti']
+        top_types = mbti['type_distribution']['top_types']
+        assert mbti['primary_type'] == top_types[0]['type']
+        assert mbti['probability'] == top_types[0]['probability']
+        assert mbti['secondary_type'] == (top_types[1]['type'] if mbti['probability'] < 0.8 else None)
+        assert list(mbti['dimension_probabilities']) == list(mbti['primary_type'])
+        assert all(probability >= 0.5 for probability in mbti['dimension_probabilities'].values())
+
+
+def test_cognitive_functions_follow_the_posterior_type(pipeline, results):
+    function_orders = pipeline.scoring_service.function_orders
+    for result in results:
+        assert result['cognitive_functions']['primary_stack'] == function_orders[result['mbti']['primary_type']][:4]
+
+
+def test_letter_probabilities_are_posterior_marginals(pipeline):
+    posterior = pipeline.scoring_service.type_posterior
+    plan = pipeline.scoring_service.plan
+    rng = np.random.RandomState(1)
+    probabilities = posterior.probabilities(rng.uniform(0, 5, size=(50, 8)), rng.normal(size=(50, 5)))
+    letters = posterior.letter_probabilities(probabilities)
+    for position, pair in enumerate(DICHOTOMIES):
+        for letter in pair:
+            has_letter = [t for t, code in enumerate(TYPE_CODES) if code[position] == letter]
+            assert np.allclose(letters[:, plan.preference_letters.index(letter)],
+                               probabilities[:, has_letter].sum(axis=1))
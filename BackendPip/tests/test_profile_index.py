@@ -0,0 +1,125 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.services.profile_index import SCALE, ProfileIndex, encode, profile_vector
+
+N_FEATURES = 35
+K = 10
+
+
+def _profiles(n: int, seed: int = 0) -> np.ndarray:
+    # Scores around a few dozen profile types, like real respondents, on the 0-100 scale
+    rng = np.random.RandomState(seed)
+    types = rng.uniform(20, 80, size=(40, N_FEATURES))
+    return np.clip(types[rng.randint(len(types), size=n)] + rng.normal(0, 8, size=(n, N_FEATURES)), 0, 100)
+
+
+def _exact(index_vectors: np.ndarray, ids, query: np.ndarray, k: int = K):
+    # Brute force over the same one-byte codes the index stores
+    codes = encode(index_vectors).astype(np.float64)
+    distances = np.sqrt(((codes - np.asarray(query, dtype=np.float32) * SCALE) ** 2).sum(axis=1))
+    order = np.argsort(distances, kind='stable')[:k]
+    return [(ids[i], distances[i] / (SCALE * np.sqrt(N_FEATURES))) for i in order]
+
+
+@pytest.fixture(scope='module')
+def vectors() -> np.ndarray:
+    return _profiles(5000)
+
+
+@pytest.fixture(scope='module')
+def ids(vectors):
+    return [f"p{i}" for i in range(len(vectors))]
+
+
+@pytest.fixture(scope='module')
+def features():
+    return [f"f{j}" for j in range(N_FEATURES)]
+
+
+@pytest.fixture
+def index(vectors, ids, features) -> ProfileIndex:
+    return ProfileIndex.build(ids, vectors, features, nprobe=8)
+
+
+@pytest.fixture(scope='module')
+def queries() -> np.ndarray:
+    return _profiles(50, seed=1)
+
+
+def test_recall_against_exact_search(index, vectors, ids, queries):
+    recalls = []
+    for query in queries:
+        expected = {id_ for id_, _ in _exact(vectors, ids, query)}
+        recalls.append(len(expected & {id_ for id_, _ in index.search(query, K)}) / K)
+    assert np.mean(recalls) >= 0.9
+
+
+def test_probing_every_list_is_exact(index, vectors, ids, queries):
+    for query in queries[:10]:
+        found = index.search(query, K, nprobe=len(index.centroids))
+        expected = _exact(vectors, ids, query)
+        # Same neighbours; the index sums in float32
+        assert [distance for _, distance in found] == pytest.approx([distance for _, distance in expected], abs=1e-3)
+        assert {id_ for id_, _ in found} == {id_ for id_, _ in expected}
+
+
+def test_added_profiles_are_found(index, vectors):
+    added = _profiles(20, seed=2)
+    index.add([f"new{i}" for i in range(len(added))], added)
+    # Still in the insert buffer, which queries scan too
+    assert index._pending_count == 20 and len(index) == len(vectors) + 20
+    for i in (0, 7, 19):
+        assert index.search(added[i], 1)[0][0] == f"new{i}"
+
+    index.compact()
+    assert index._pending_count == 0 and len(index) == len(vectors) + 20
+    for i in (0, 7, 19):
+        id_, distance = index.search(added[i], 1)[0]
+        assert id_ == f"new{i}" and distance < 0.5
+
+
+def test_each_id_once_and_exclude(index, vectors):
+    # A second, nearby profile under an existing id counts once, at its nearest
+    index.add(['p0'], vectors[:1] + 1.0)
+    found = index.search(vectors[0], K)
+    assert [id_ for id_, _ in found].count('p0') == 1
+    assert found[0] == ('p0', pytest.approx(0.0, abs=0.2))
+    assert len({id_ for id_, _ in found}) == K
+    assert 'p0' not in [id_ for id_, _ in index.search(vectors[0], K, exclude='p0')]
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_save_load_round_trip(tmp_path, index, queries, mmap):
+    index.add(['late'], _profiles(1, seed=3))
+    expected = [index.search(query, K) for query in queries]
+
+    index.save(str(tmp_path))
+    loaded = ProfileIndex.load(str(tmp_path), mmap=mmap)
+    assert len(loaded) == len(index)
+    assert loaded.features == index.features and loaded.nprobe == index.nprobe
+    assert [loaded.search(query, K) for query in queries] == expected
+
+
+def test_incomplete_index_is_refused(tmp_path, index):
+    index.save(str(tmp_path))
+    meta_path = os.path.join(str(tmp_path), 'index.json')
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta['profiles'] += 1
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    with pytest.raises(ValueError):
+        ProfileIndex.load(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        ProfileIndex.load(str(tmp_path / 'missing'))
+
+
+def test_profile_vector_needs_every_feature():
+    big_five = {'scores': {'Extraversion': 60.0}, 'facet_scores': {'Extraversion': {'Warmth': 55.0}}}
+    assert profile_vector(big_five, ['Extraversion', 'Extraversion/Warmth']).tolist() == [60.0, 55.0]
+    with pytest.raises(ValueError):
+        profile_vector(big_five, ['Extraversion', 'Openness'])
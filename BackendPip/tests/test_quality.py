@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from app.services.norm_builder import NormBuilder
+from app.services.pipeline import AssessmentPipeline
+from benchmarks.synthetic import SyntheticRespondents
+
+N = 1000
+
+
+@pytest.fixture(scope='module')
+def pipeline() -> AssessmentPipeline:
+    return AssessmentPipeline()
+
+
+@pytest.fixture(scope='module')
+def calibrated(pipeline) -> str:
+    # Norms built from scored population respondents, as app.cli.build_norms writes them
+    results = pipeline.score_matrix(SyntheticRespondents('population', seed=1).matrix(N))
+    builder = NormBuilder()
+    builder.add_results(('calibrated', result) for result in results)
+    norms = builder.build()['norms']
+    pipeline.scoring_service.norm_registry.add_group(
+        'calibrated', {dimension: groups['calibrated'] for dimension, groups in norms.items()})
+    return 'calibrated'
+
+
+def _outlier_rate(results) -> float:
+    return float(np.mean(['multivariate_outlier' in result['response_quality']['flags'] for result in results]))
+
+
+def test_no_distance_without_calibrated_norms(pipeline):
+    # The hand-set default norms carry no trait correlations
+    results = pipeline.score_matrix(SyntheticRespondents('population', seed=2).matrix(200))
+    assert all(result['response_quality']['mahalanobis_d2'] is None for result in results)
+    assert _outlier_rate(results) == 0.0
+
+
+def test_calibrated_norms_rarely_flag_attentive_respondents(pipeline, calibrated):
+    X = SyntheticRespondents('population', seed=2).matrix(N)
+    results = pipeline.score_matrix(X, [calibrated] * N)
+    assert all(result['response_quality']['mahalanobis_d2'] is not None for result in results)
+    assert _outlier_rate(results) < 0.01
+
+    extreme = pipeline.score_matrix(SyntheticRespondents('extreme', seed=3).matrix(200), [calibrated] * 200)
+    assert _outlier_rate(extreme) > 0.05
+
+
+def test_joint_moments_merge_and_round_trip():
+    rng = np.random.RandomState(0)
+    scores = rng.multivariate_normal([40, 50, 45, 35, 55], np.diag([100, 80, 90, 120, 70]) + 30, size=3000)
+    scores[::50, 2] = np.nan
+
+    whole = NormBuilder()
+    whole.update('g', scores)
+    merged = NormBuilder()
+    for part in np.array_split(scores, 3):
+        shard = NormBuilder()
+        shard.update('g', part)
+        merged.merge(NormBuilder.from_dict(shard.to_dict()))
+
+    expected = np.corrcoef(scores[~np.isnan(scores).any(axis=1)], rowvar=False)
+    assert np.allclose(merged.moments['g'].correlation(), expected)
+    assert whole.build() == merged.build()
+    assert whole.build()['norms']['Openness']['g']['correlations']['Openness'] == 1.0
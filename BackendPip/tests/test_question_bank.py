@@ -0,0 +1,50 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from app.services.question_bank import QuestionBank
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'questions', 'questions.json')
+
+
+@pytest.fixture
+def bank(tmp_path):
+    path = tmp_path / 'questions.json'
+    shutil.copy(QUESTIONS_PATH, path)
+    return QuestionBank(str(path))
+
+
+def _rewrite(bank: QuestionBank, content: str, mtime: float):
+    with open(bank.questions_path, 'w') as f:
+        f.write(content)
+    os.utime(bank.questions_path, (mtime, mtime))
+
+
+@pytest.mark.parametrize('content', ['{"questions": [', '{"items": []}', '{"questions": 5}', '[]'])
+def test_failed_reload_keeps_snapshot_and_is_not_retried(bank, content, monkeypatch, caplog):
+    version = bank.version
+    _rewrite(bank, content, bank.snapshot.mtime + 10)
+
+    loads = []
+    load = bank._load
+    monkeypatch.setattr(bank, '_load', lambda: loads.append(1) or load())
+    for _ in range(5):
+        assert bank.refresh_if_changed() is False
+        assert bank.version == version
+    assert len(loads) == 1
+    assert len([r for r in caplog.records if 'Could not reload' in r.getMessage()]) == 1
+
+
+def test_fixed_file_is_picked_up_after_a_failure(bank):
+    with open(QUESTIONS_PATH) as f:
+        data = json.load(f)
+    mtime = bank.snapshot.mtime
+    _rewrite(bank, '{"questions": [', mtime + 10)
+    assert bank.refresh_if_changed() is False
+
+    data['questions'] = data['questions'][:-1]
+    _rewrite(bank, json.dumps(data), mtime + 20)
+    assert bank.refresh_if_changed() is True
+    assert len(bank.snapshot) == len(data['questions'])
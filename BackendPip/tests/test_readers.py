@@ -0,0 +1,95 @@
+import io
+import json
+
+import pytest
+
+from app.cli.rescore import rescore
+from app.services.scoring import ScoringService
+from app.utils.readers import invalid_response, read_submissions
+
+
+@pytest.fixture(scope='module')
+def questions():
+    return ScoringService().questions
+
+
+@pytest.fixture(scope='module')
+def likert_ids(questions):
+    return [question_id for question_id, question in questions.items() if question['response_type'] == 'likert_7']
+
+
+def _write_csv(path, users, questions, cells):
+    # Every question answered: '3' or the given cell, and option 'a' for forced choice
+    lines = ['user_id,question_id,response_value,selected_option']
+    for user in users:
+        for question_id, question in questions.items():
+            if question['response_type'] == 'forced_choice':
+                lines.append(f"{user},{question_id},,a")
+            else:
+                lines.append(f"{user},{question_id},{cells.get((user, question_id), '3')},")
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def test_whole_numbers_in_any_spelling(tmp_path, questions, likert_ids):
+    path = tmp_path / 'responses.csv'
+    first, second, third = likert_ids[:3]
+    _write_csv(path, ['u1'], questions, {('u1', first): '4.0', ('u1', second): '" 5 "', ('u1', third): ''})
+
+    [(submission_id, records)] = list(read_submissions(str(path)))
+    assert submission_id == 'u1'
+    assert records[:3] == [(first, 4, None), (second, 5, None), (third, None, None)]
+    assert invalid_response(records) is None
+
+
+def test_malformed_row_fails_only_its_submission(tmp_path, questions, likert_ids):
+    path = tmp_path / 'responses.csv'
+    _write_csv(path, ['u1', 'u2', 'u3'], questions, {('u2', likert_ids[10]): 'abc', ('u2', likert_ids[11]): '4.5'})
+
+    output = io.StringIO()
+    rows, errors = rescore(str(path), output, chunk_size=2, progress=False)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert (rows, errors) == (3, 1)
+    assert [line['user_id'] for line in lines] == ['u1', 'u2', 'u3']
+    assert lines[1]['error'] == f"Invalid response_value 'abc' for question {likert_ids[10]}"
+    assert 'result' in lines[0] and 'result' in lines[2]
+
+
+def test_unreadable_lines_fail_only_their_submission(tmp_path, questions):
+    submission = [
+        {'question_id': question_id, 'selected_option': 'a'} if question['response_type'] == 'forced_choice'
+        else {'question_id': question_id, 'response_value': 3}
+        for question_id, question in questions.items()
+    ]
+    path = tmp_path / 'responses.jsonl'
+    path.write_text('\n'.join([
+        json.dumps({'user_id': 'u1', 'responses': submission}),
+        '{"user_id": "u2", "responses": [',
+        json.dumps({'user_id': 'u3', 'responses': [{'response_value': 3}]}),
+        json.dumps({'user_id': 'u4', 'responses': submission})
+    ]) + '\n')
+
+    output = io.StringIO()
+    rows, errors = rescore(str(path), output, progress=False)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert (rows, errors) == (4, 2)
+    assert [line.get('user_id') for line in lines] == ['u1', '', 'u3', 'u4']
+    assert lines[1]['error'].startswith('Line 2: invalid JSON')
+    assert lines[2]['error'] == "Line 3: missing 'question_id'"
+    assert 'result' in lines[0] and 'result' in lines[3]
+
+
+def test_short_csv_row_fails_its_submission(tmp_path, questions):
+    path = tmp_path / 'responses.csv'
+    _write_csv(path, ['u1', 'u2'], questions, {})
+    lines = path.read_text().splitlines()
+    # Truncate one of u1's rows
+    lines[5] = lines[5].split(',')[0]
+    path.write_text('\n'.join(lines) + '\n')
+
+    output = io.StringIO()
+    assert rescore(str(path), output, progress=False) == (2, 1)
+    first, second = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert first == {'user_id': 'u1', 'error': 'Line 6: expected 4 columns, got 1'}
+    assert 'result' in second
@@ -0,0 +1,48 @@
+import os
+
+from app.services.result_cache import ResultCache
+
+
+def _file_count(directory) -> int:
+    return sum(len(files) for _, _, files in os.walk(directory))
+
+
+def test_disk_tier_is_held_to_its_cap(tmp_path):
+    cache = ResultCache(max_entries=4, directory=str(tmp_path), max_disk_bytes=10_000)
+    keys = [f"{index:02x}" * 32 for index in range(30)]
+    for index, key in enumerate(keys):
+        cache.put(key, b'x' * 1000)
+        # Older files first, whatever the filesystem's mtime resolution
+        os.utime(cache._path(key), (index, index))
+
+    stats = cache.stats()
+    assert stats['disk_bytes'] <= 10_000
+    assert stats['disk_entries'] == _file_count(tmp_path)
+    assert stats['disk_evictions'] == 30 - stats['disk_entries']
+    # The newest results survive, the oldest are gone
+    assert os.path.exists(cache._path(keys[-1]))
+    assert not os.path.exists(cache._path(keys[0]))
+
+
+def test_disk_hit_keeps_a_file(tmp_path):
+    cache = ResultCache(max_entries=1, directory=str(tmp_path), max_disk_bytes=5_000)
+    keys = [f"{index:02x}" * 32 for index in range(5)]
+    for index, key in enumerate(keys):
+        cache.put(key, b'x' * 1000)
+        os.utime(cache._path(key), (index, index))
+
+    # The oldest file is read back from disk, which marks it recently used
+    cache.clear()
+    assert cache.get(keys[0]) == b'x' * 1000
+    assert cache.disk_hits == 1
+    cache.put('ff' * 32, b'x' * 1000)
+    assert os.path.exists(cache._path(keys[0]))
+    assert not os.path.exists(cache._path(keys[1]))
+
+
+def test_sweep_on_startup(tmp_path):
+    # Files left by an earlier run, e.g. under older versions, count against the cap from the start
+    ResultCache(directory=str(tmp_path), max_disk_bytes=10**9).put('aa' * 32, b'x' * 4000)
+    cache = ResultCache(directory=str(tmp_path), max_disk_bytes=2_000)
+    assert cache.stats()['disk_entries'] == 0
+    assert _file_count(tmp_path) == 0
@@ -0,0 +1,160 @@
+"""
+Parity of the compiled scoring plan with the original per-response scoring.
+
+The reference functions below are the per-response loops ScoringService
+used before the scoring plan, kept verbatim apart from taking the question
+dict as an argument. Generated submissions are scored both ways, one at a
+time and as a batch matrix. The one documented difference: ties for
+primary_archetype go to question bank order rather than submission order.
+"""
+import random
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from app.models.assessment import QuestionResponse
+from app.services.scoring import ScoringService
+
+DIMENSIONS = ['Extraversion', 'Agreeableness', 'Conscientiousness', 'Neuroticism', 'Openness']
+
+
+def reference_raw_scores(questions: Dict, responses: List[QuestionResponse]) -> Dict[str, float]:
+    scores = {dimension: 0.0 for dimension in DIMENSIONS}
+    counts = {dimension: 0 for dimension in scores}
+    for response in responses:
+        question = questions.get(response.question_id)
+        if not question or question['response_type'] != 'likert_7':
+            continue
+        value = response.response_value - 1
+        if question['reverse_scored']:
+            value = 6 - value
+        if question.get('factor_loadings'):
+            for dimension, loading in question['factor_loadings'].items():
+                if dimension in scores:
+                    scores[dimension] += value * loading
+                    counts[dimension] += abs(loading)
+    for dimension in scores:
+        if counts[dimension] > 0:
+            scores[dimension] = scores[dimension] / counts[dimension] * 100 / 6
+    return scores
+
+
+def reference_facet_scores(questions: Dict, responses: List[QuestionResponse]) -> Dict[str, Dict[str, float]]:
+    facet_scores, facet_counts = {}, {}
+    for response in responses:
+        question = questions.get(response.question_id)
+        if not question or not question.get('facet'):
+            continue
+        dimension, facet = question['dimension'], question['facet']
+        facet_scores.setdefault(dimension, {}).setdefault(facet, 0)
+        facet_counts.setdefault(dimension, {}).setdefault(facet, 0)
+        value = response.response_value - 1
+        if question['reverse_scored']:
+            value = 6 - value
+        facet_scores[dimension][facet] += value
+        facet_counts[dimension][facet] += 1
+    return {
+        dimension: {facet: round(total / facet_counts[dimension][facet] / 6 * 100, 1)
+                    for facet, total in facets.items()}
+        for dimension, facets in facet_scores.items()
+    }
+
+
+def reference_depth(questions: Dict, responses: List[QuestionResponse]) -> Dict:
+    shadow_scores, archetype_scores, individuation_scores = [], {}, []
+    for response in responses:
+        question = questions.get(response.question_id)
+        if not question:
+            continue
+        if question.get('dimension') == 'Shadow_Integration':
+            if response.response_value:
+                shadow_scores.append((response.response_value - 1) / 4)
+        elif question.get('dimension') == 'Archetype':
+            archetype = question.get('archetype')
+            if archetype and response.response_value:
+                archetype_scores.setdefault(archetype, []).append(response.response_value)
+        elif question.get('dimension') == 'Individuation':
+            if response.response_value:
+                individuation_scores.append((response.response_value - 1) / 4)
+
+    archetype_profile = {archetype: round(np.mean(scores) / 5, 2) for archetype, scores in archetype_scores.items()}
+    individuation = np.mean(individuation_scores) if individuation_scores else 0.5
+    return {
+        'shadow_integration': round(np.mean(shadow_scores) if shadow_scores else 0.5, 2),
+        'archetype_profile': archetype_profile,
+        'primary_archetype': max(archetype_profile, key=archetype_profile.get) if archetype_profile else None,
+        'individuation_stage': ScoringService._determine_individuation_stage(None, individuation)
+    }
+
+
+def generated_submissions(questions: Dict, n: int = 200, seed: int = 0) -> List[List[QuestionResponse]]:
+    # Random answers in random order, with about 10% skipped; some submissions skip whole scales
+    rng = random.Random(seed)
+    submissions = []
+    for row in range(n):
+        skip_rate = 0.1 if row % 10 else 0.9
+        responses = []
+        for question_id, question in questions.items():
+            if rng.random() < skip_rate:
+                continue
+            if question['response_type'] == 'forced_choice':
+                responses.append(QuestionResponse(question_id=question_id, selected_option=rng.choice('ab')))
+            else:
+                high = 7 if question['response_type'] == 'likert_7' else 5
+                responses.append(QuestionResponse(question_id=question_id, response_value=rng.randint(1, high)))
+        rng.shuffle(responses)
+        submissions.append(responses)
+    return submissions
+
+
+@pytest.fixture(scope='module')
+def scoring() -> ScoringService:
+    return ScoringService()
+
+
+@pytest.fixture(scope='module')
+def submissions(scoring) -> List[List[QuestionResponse]]:
+    return generated_submissions(scoring.questions)
+
+
+def _assert_depth_equal(actual: Dict, expected: Dict):
+    assert actual['shadow_integration'] == expected['shadow_integration']
+    assert actual['archetype_profile'] == expected['archetype_profile']
+    assert actual['individuation_stage'] == expected['individuation_stage']
+    if actual['primary_archetype'] != expected['primary_archetype']:
+        # The only allowed difference: a tie, broken in question bank order
+        profile = expected['archetype_profile']
+        assert profile[actual['primary_archetype']] == profile[expected['primary_archetype']]
+
+
+def test_single_submission_parity(scoring, submissions):
+    for responses in submissions:
+        expected_raw = reference_raw_scores(scoring.questions, responses)
+        raw = scoring.calculate_raw_scores(responses)
+        assert list(raw) == list(expected_raw)
+        assert np.allclose(list(raw.values()), list(expected_raw.values()), rtol=0, atol=1e-9)
+        assert scoring.calculate_facet_scores(responses) == reference_facet_scores(scoring.questions, responses)
+        _assert_depth_equal(scoring.analyze_depth_responses(responses), reference_depth(scoring.questions, responses))
+
+
+def test_batch_parity(scoring, submissions):
+    X = np.vstack([scoring.encode_responses(responses) for responses in submissions])
+    raw = scoring.plan.raw_score_matrix(X)
+    facets = scoring.facet_score_matrix(X)
+    depth = scoring.analyze_depth_matrix(X)
+    for row, responses in enumerate(submissions):
+        expected_raw = reference_raw_scores(scoring.questions, responses)
+        assert np.allclose(raw[row], [expected_raw[d] for d in scoring.plan.dimensions], rtol=0, atol=1e-9)
+        assert facets[row] == reference_facet_scores(scoring.questions, responses)
+        _assert_depth_equal(depth[row], reference_depth(scoring.questions, responses))
+
+
+def test_archetype_ties_are_exercised(scoring, submissions):
+    # The generated answers must actually produce ties, or the allowed difference is untested
+    ties = sum(
+        list(profile.values()).count(max(profile.values())) > 1
+        for profile in (reference_depth(scoring.questions, responses)['archetype_profile']
+                        for responses in submissions) if profile
+    )
+    assert ties > 0
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.models.assessment import QuestionResponse
+from app.services import wire_format
+from app.services.pipeline import AssessmentPipeline
+
+
+@pytest.fixture(scope='module')
+def pipeline() -> AssessmentPipeline:
+    return AssessmentPipeline()
+
+
+@pytest.fixture(scope='module')
+def plan(pipeline):
+    return pipeline.scoring_service.plan
+
+
+@pytest.fixture
+def X(plan) -> np.ndarray:
+    rng = np.random.RandomState(0)
+    return np.where(plan.is_forced_choice, rng.randint(1, 3, size=(3, plan.n_items)),
+                    rng.randint(1, 6, size=(3, plan.n_items))).astype(np.float64)
+
+
+def _item(plan, scale_max: int) -> int:
+    return int(np.flatnonzero(plan.max_values == scale_max)[0])
+
+
+def test_round_trip(plan, X):
+    X[1, :5] = np.nan
+    decoded, counts, norm_group = wire_format.decode(wire_format.encode_matrix(plan, X, 'age_18_24'), plan)
+    assert np.array_equal(decoded, X, equal_nan=True)
+    assert counts.tolist() == [plan.n_items, plan.n_items - 5, plan.n_items]
+    assert norm_group == 'age_18_24'
+
+
+@pytest.mark.parametrize('scale_max, value', [(7, 0), (7, 8), (7, 255), (5, 6), (5, 0)])
+def test_answers_outside_their_scale_are_rejected(plan, X, scale_max, value):
+    item = _item(plan, scale_max)
+    X[2, item] = value
+    with pytest.raises(wire_format.WireFormatError, match=f"{value} for question {plan.item_ids[item]}"):
+        wire_format.decode(wire_format.encode_matrix(plan, X), plan)
+
+
+def test_forced_choice_answers_are_options(plan, X):
+    X[0, _item(plan, 2)] = 3
+    with pytest.raises(wire_format.WireFormatError, match='Forced-choice'):
+        wire_format.decode(wire_format.encode_matrix(plan, X), plan)
+
+
+def test_json_response_value_is_bounded():
+    QuestionResponse(question_id='BF_E_001', response_value=7)
+    for value in (0, 8, 200):
+        with pytest.raises(ValidationError):
+            QuestionResponse(question_id='BF_E_001', response_value=value)
+
+
+def test_batch_row_with_an_answer_outside_its_scale_fails(pipeline, plan, X):
+    item = _item(plan, 5)
+    X[1, item] = 7
+    outcomes = pipeline.score_encoded_batch(X, [plan.n_items] * 3)
+    assert outcomes[1]['error'] == f"Invalid response_value 7 for question {plan.item_ids[item]}, expected 1-5"
+    assert outcomes[0]['result'] and outcomes[2]['result']
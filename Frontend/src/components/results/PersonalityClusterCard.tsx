@@ -34,7 +34,8 @@ const PersonalityClusterCard: React.FC<PersonalityClusterCardProps> = ({ cluster
     }
   ];
 
-  const currentCluster = clusterInfo[cluster.primary_cluster] || clusterInfo[3];
+  const currentCluster = clusterInfo.find(info => info.name === cluster.cluster_description)
+    || clusterInfo[cluster.primary_cluster] || clusterInfo[3];
 
   return (
     <motion.div